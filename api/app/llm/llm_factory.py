@@ -204,12 +204,50 @@ class LLMService:
             # Groq n'a pas d'API d'embedding native, fallback possible vers OpenAI
             if self.llm_factory.is_provider_available(LLMProvider.OPENAI):
                 logger.info("Groq ne supporte pas les embeddings, fallback vers OpenAI")
-                return await self.get_embedding(text, LLMProvider.OPENAI)
+                return await self.get_embedding(text, LLMProvider.OPENAI, model)
         
         # Fallback si on n'a aucune solution
         logger.error(f"Embeddings non disponibles pour le fournisseur {provider}")
         raise ValueError(f"Embeddings non disponibles pour le fournisseur {provider}")
-    
+
+    async def get_embeddings(
+        self,
+        texts: List[str],
+        provider: Optional[LLMProvider] = None,
+        model: Optional[str] = None
+    ) -> List[List[float]]:
+        """Génère les embeddings d'un lot de textes en une seule requête"""
+
+        if not texts:
+            return []
+
+        provider = provider or self.llm_factory.default_provider
+
+        if provider == LLMProvider.OPENAI:
+            try:
+                model = model or "text-embedding-3-small"
+                client = self.llm_factory.get_client(provider)
+                logger.info(f"Génération de {len(texts)} embeddings avec OpenAI, modèle: {model}")
+                response = client.Embedding.create(
+                    model=model,
+                    input=texts
+                )
+                # L'API ne garantit pas l'ordre: on trie sur l'index d'entrée
+                data = sorted(response.data, key=lambda item: item.index)
+                return [item.embedding for item in data]
+            except Exception as e:
+                logger.error(f"Erreur lors de la génération d'embeddings avec OpenAI: {str(e)}")
+                raise
+
+        elif provider == LLMProvider.GROQ:
+            # Groq n'a pas d'API d'embedding native, fallback possible vers OpenAI
+            if self.llm_factory.is_provider_available(LLMProvider.OPENAI):
+                logger.info("Groq ne supporte pas les embeddings, fallback vers OpenAI")
+                return await self.get_embeddings(texts, LLMProvider.OPENAI, model)
+
+        logger.error(f"Embeddings non disponibles pour le fournisseur {provider}")
+        raise ValueError(f"Embeddings non disponibles pour le fournisseur {provider}")
+
     async def extract_clauses(
         self,
         document_text: str,
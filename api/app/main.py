@@ -1,17 +1,104 @@
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.docs import get_swagger_ui_html
-from fastapi.staticfiles import StaticFiles
 import os
+import asyncio
+from contextlib import asynccontextmanager
 
 from app.routers import documents, analysis, precedents
 from app.services.document_service import DocumentService
 from app.services.analysis_service import AnalysisService
 from app.services.vector_service import VectorService
+from app.services.mongo_client import get_mongo_client, get_mongo_database, close_mongo_client
+from app.services.mongo_indexes import ensure_indexes
+from app.services.progress_events import ProgressEventHub
+from app.services.redis_client import create_async_redis_client
+from app.services.pagination import NEXT_CURSOR_HEADER
+from app.services.upload_storage import UPLOAD_DIR, UploadSizeLimitMiddleware
+from app.services.blob_service import BlobService
+from app.services.text_extraction import shutdown_text_extractor
+from app.services.clause_index_service import ClauseIndexService
 from app.llm.llm_factory import LLMService
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Initialisation des services au démarrage de l'application, puis fermeture
+    des connexions partagées à l'arrêt
+    """
+    # Client MongoDB unique (pool de connexions) partagé par les services
+    mongo_client = get_mongo_client()
+    app.state.mongo_client = mongo_client
+    
+    # Client Redis asynchrone partagé par les routes (suivi des analyses, sans bloquer la boucle)
+    app.state.redis = create_async_redis_client()
+    
+    # Diffusion des événements de progression (un abonnement Redis pour tous les clients SSE)
+    app.state.progress_events = ProgressEventHub()
+    
+    # Index des collections (ID unique, tri par date, statut, etc.)
+    if os.getenv("MONGODB_ENSURE_INDEXES", "true").lower() == "true":
+        try:
+            await ensure_indexes(get_mongo_database(mongo_client))
+        except Exception as e:
+            print(f"Création des index MongoDB impossible: {str(e)}")
+    
+    # Initialiser les services
+    document_service = DocumentService(mongo_client)
+    analysis_service = AnalysisService(mongo_client)
+    vector_service = VectorService()
+    llm_service = LLMService()
+    
+    # Charger les précédents pré-vectorisés dans une collection vide
+    if os.getenv("PRECEDENT_SNAPSHOT_AUTOLOAD", "true").lower() == "true":
+        try:
+            restored = await vector_service.bootstrap_precedents()
+            if restored:
+                print(f"{restored} passages de précédents chargés depuis l'artefact pré-vectorisé")
+        except Exception as e:
+            print(f"Chargement de l'artefact de précédents impossible: {str(e)}")
+            # Artefact attendu (image construite avec): ne pas démarrer sans précédents
+            if vector_service.snapshot_required:
+                raise
+    
+    # Précalculer les listes restreintes de précédents à partir du corpus de clauses
+    if vector_service.shortlists and os.getenv("PRECEDENT_SHORTLIST_PRECOMPUTE", "true").lower() == "true":
+        try:
+            app.state.clause_index_service = ClauseIndexService(vector_service=vector_service)
+            centroids = app.state.clause_index_service.clause_centroids()
+            shortlists = vector_service.precompute_shortlists(centroids)
+            if shortlists:
+                print(f"{len(shortlists)} listes restreintes de précédents précalculées")
+        except Exception as e:
+            print(f"Précalcul des listes restreintes de précédents impossible: {str(e)}")
+    
+    # Créer le répertoire d'uploads s'il n'existe pas
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    
+    # Ramasse-miettes des blobs sans référence (fichiers des documents supprimés)
+    blob_gc = None
+    if os.getenv("BLOB_GC_ENABLED", "true").lower() == "true":
+        blob_gc = asyncio.create_task(BlobService(mongo_client).run_garbage_collector())
+    
+    print("API d'analyse de documents juridiques démarrée avec succès!")
+    
+    yield
+    
+    if blob_gc is not None:
+        blob_gc.cancel()
+        try:
+            await blob_gc
+        except asyncio.CancelledError:
+            pass
+    await app.state.progress_events.close()
+    await app.state.redis.close()
+    shutdown_text_extractor()
+    close_mongo_client()
+
+
 # Création de l'application FastAPI
 app = FastAPI(
+    lifespan=lifespan,
     title="API d'analyse de documents juridiques",
     description="API pour l'extraction de clauses, l'analyse de risques et la génération de recommandations pour des documents juridiques",
     version="1.0.0",
@@ -27,8 +114,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],  # Curseur de pagination lisible par le frontend
 )
 
+# Taille des envois limitée avant la mise en tampon du formulaire par Starlette
+app.add_middleware(UploadSizeLimitMiddleware)
+
 # Montage des routeurs
 app.include_router(documents.router, prefix="/documents", tags=["Documents"])
 app.include_router(analysis.router, prefix="/analysis", tags=["Analyses"])
@@ -52,25 +143,8 @@ async def custom_swagger_ui_html():
         swagger_css_url="https://cdn.jsdelivr.net/npm/swagger-ui-dist@4/swagger-ui.css",
     )
 
-# Événement de démarrage
-@app.on_event("startup")
-async def startup_event():
-    """
-    Initialisation des services au démarrage de l'application
-    """
-    # Initialiser les services
-    document_service = DocumentService()
-    analysis_service = AnalysisService()
-    vector_service = VectorService()
-    llm_service = LLMService()
-    
-    # Créer le répertoire d'uploads s'il n'existe pas
-    os.makedirs("/app/uploads", exist_ok=True)
-    
-    print("API d'analyse de documents juridiques démarrée avec succès!")
-
-# Montage des fichiers statiques pour les uploads
-app.mount("/uploads", StaticFiles(directory="/app/uploads"), name="uploads")
+# Les fichiers téléchargés ne sont pas servis en statique (magasin de blobs):
+# ils sont lus par GET /documents/{document_id}/file
 
 # Si ce fichier est exécuté directement
 if __name__ == "__main__":
@@ -50,6 +50,15 @@ class Clause(BaseModel):
     position: Optional[Dict[str, Any]] = None
     
     
+class ClauseSearchResult(BaseModel):
+    """Modèle pour une clause similaire trouvée dans le corpus des analyses"""
+    analysis_id: str
+    document_id: str
+    document_type: Optional[str] = None
+    clause: Clause
+    similarity_score: float
+
+
 class AnalysisRequest(BaseModel):
     """Modèle pour la requête d'analyse"""
     document_id: str
@@ -82,6 +91,19 @@ class Precedent(BaseModel):
     relevance: str
     source: Optional[str] = None
     similarity_score: float
+    generated: bool = False  # Précédent proposé par le LLM, sans score de similarité
+
+
+class PrecedentFilters(BaseModel):
+    """Filtres applicables à la recherche de précédents juridiques"""
+    type: Optional[str] = None
+    jurisdiction: Optional[str] = None
+    document_type: Optional[str] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+
+    def is_empty(self) -> bool:
+        return not any(value is not None for value in self.dict().values())
 
 
 class AnalysisResults(BaseModel):
@@ -94,6 +116,24 @@ class AnalysisResults(BaseModel):
     metadata: Dict[str, Any] = Field(default_factory=dict)
 
 
+class AnalysisCounters(BaseModel):
+    """Compteurs précalculés à l'enregistrement des résultats (affichage de l'historique)"""
+    clause_count: int = 0
+    max_risk_level: Optional[RiskLevel] = None
+    recommendation_count: int = 0
+    risk_count: int = 0
+
+    @classmethod
+    def from_results(cls, results: AnalysisResults) -> "AnalysisCounters":
+        levels = [clause.risk_level for clause in results.clauses] + [risk.level for risk in results.risks]
+        return cls(
+            clause_count=len(results.clauses),
+            max_risk_level=max(levels) if levels else None,
+            recommendation_count=len(results.recommendations),
+            risk_count=len(results.risks)
+        )
+
+
 class AnalysisBase(BaseModel):
     """Modèle de base pour une analyse de document"""
     document_id: str
@@ -112,6 +152,7 @@ class Analysis(AnalysisBase):
     updated_at: datetime = Field(default_factory=datetime.now)
     status: AnalysisStatus = AnalysisStatus.PENDING
     results: Optional[AnalysisResults] = None
+    counters: Optional[AnalysisCounters] = None
     error: Optional[str] = None
     processing_time: Optional[float] = None
     metadata: Dict[str, Any] = Field(default_factory=dict)  # Ajoutez cette ligne
@@ -196,6 +237,35 @@ class AnalysisResponse(BaseModel):
         }
 
 
+class AnalysisHistoryItem(BaseModel):
+    """Ligne de l'historique des analyses: en-tête et compteurs, sans résultats ni erreur"""
+    id: str
+    document_id: str
+    document_type: Optional[str] = None
+    status: AnalysisStatus
+    created_at: datetime
+    processing_time: Optional[float] = None
+    counters: Optional[AnalysisCounters] = None
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "id": "a47ac10b-58cc-4372-a567-0e02b2c3d479",
+                "document_id": "f47ac10b-58cc-4372-a567-0e02b2c3d479",
+                "document_type": "employment",
+                "status": "completed",
+                "created_at": "2025-03-25T12:00:00",
+                "processing_time": 45.2,
+                "counters": {
+                    "clause_count": 12,
+                    "max_risk_level": 4,
+                    "recommendation_count": 5,
+                    "risk_count": 3
+                }
+            }
+        }
+
+
 class AnalysisStatusResponse(BaseModel):
     """Modèle pour la réponse de statut d'une analyse"""
     id: str
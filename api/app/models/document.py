@@ -40,6 +40,8 @@ class Document(DocumentBase):
     status: DocumentStatus = DocumentStatus.PENDING
     file_path: str
     text_content: Optional[str] = None
+    content_hash: Optional[str] = None  # SHA-256 du fichier téléchargé
+    blob_id: Optional[str] = None  # Blob référencé (empreinte); absent pour les anciens fichiers d'uploads
     metadata: Dict[str, Any] = Field(default_factory=dict)
 
     class Config:
@@ -53,7 +55,8 @@ class Document(DocumentBase):
                 "created_at": "2025-03-25T12:00:00",
                 "updated_at": "2025-03-25T12:05:00",
                 "status": "processed",
-                "file_path": "/app/uploads/f47ac10b-58cc-4372-a567-0e02b2c3d479.pdf",
+                "file_path": "/app/uploads/blobs/9f/86/9f86d081884c7d659a2feaa0c55ad015a3bf4f1b2b0b822cd15d6c15b0f00a08",
+                "blob_id": "9f86d081884c7d659a2feaa0c55ad015a3bf4f1b2b0b822cd15d6c15b0f00a08",
                 "text_content": "Contrat de travail entre...",
                 "metadata": {
                     "page_count": 12,
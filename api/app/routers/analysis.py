@@ -1,14 +1,23 @@
-from fastapi import APIRouter, HTTPException, Depends, Body, Form, UploadFile, File, Path, Query, BackgroundTasks
+from fastapi import APIRouter, HTTPException, Depends, Body, Form, UploadFile, File, Path, Query, BackgroundTasks, Request, Response
+from fastapi.responses import StreamingResponse
 from typing import List, Optional, Dict
 from datetime import datetime
 import os
+import json
 import uuid
+import asyncio
 import logging
 
-from app.models.analysis import AnalysisCreate, AnalysisResponse, Clause, Risk, Recommendation, AnalysisStatus
+from app.models.analysis import AnalysisCreate, AnalysisResponse, AnalysisHistoryItem, Clause, Risk, Recommendation, AnalysisStatus, ClauseSearchResult
 from app.services.analysis_service import AnalysisService
 from app.services.document_service import DocumentService
 from app.services.vector_service import VectorService
+from app.services.clause_index_service import ClauseIndexService
+from app.services.pagination import NEXT_CURSOR_HEADER, decode_cursor, next_cursor
+from app.services.upload_storage import UploadTooLargeError, MAX_UPLOAD_SIZE
+from app.services.progress_reporter import (
+    read_progress, seed_progress, clear_progress, progress_channel, TERMINAL_STATUSES
+)
 from app.workflows.orchestrator import Orchestrator
 
 # Configuration du logger
@@ -17,18 +26,78 @@ logger = logging.getLogger(__name__)
 # Créer le router
 router = APIRouter()
 
-# Service dependencies
-def get_analysis_service():
-    return AnalysisService()
+TERMINAL_STATUS_VALUES = [status.value for status in TERMINAL_STATUSES]
 
-def get_document_service():
-    return DocumentService()
+# Service dependencies (client MongoDB partagé ouvert par le lifespan)
+def get_analysis_service(request: Request):
+    return AnalysisService(request.app.state.mongo_client)
+
+def get_document_service(request: Request):
+    return DocumentService(request.app.state.mongo_client)
 
 def get_vector_service():
     return VectorService()
 
-def get_orchestrator():
-    return Orchestrator()
+def get_clause_index_service(request: Request) -> ClauseIndexService:
+    # Service partagé par les requêtes, créé à la première utilisation (Qdrant joignable)
+    service = getattr(request.app.state, "clause_index_service", None)
+    if service is None:
+        service = ClauseIndexService()
+        request.app.state.clause_index_service = service
+    return service
+
+def get_redis(request: Request):
+    # Client Redis asynchrone partagé, ouvert par le lifespan
+    return request.app.state.redis
+
+def get_orchestrator(request: Request):
+    return Orchestrator(
+        document_service=DocumentService(request.app.state.mongo_client),
+        analysis_service=AnalysisService(request.app.state.mongo_client)
+    )
+
+def _sse_event(data: Dict, event: str = "progress") -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+async def _current_status(
+    analysis_id: str,
+    analysis_service: AnalysisService,
+    redis_client,
+    include_results: bool = False
+) -> Optional[Dict]:
+    """
+    État d'une analyse: hash Redis de suivi si présent (sans MongoDB), sinon
+    MongoDB (projection sans les résultats, sauf `include_results`).
+    """
+    if not include_results:
+        try:
+            state = await read_progress(redis_client, analysis_id)
+        except Exception as e:
+            logger.warning(f"Suivi Redis illisible pour l'analyse {analysis_id}: {str(e)}")
+            state = {}
+        if state and "status" in state:
+            return {"id": analysis_id, **state}
+    
+    logger.info(f"Vérification du statut dans MongoDB: analysis_id={analysis_id}, include_results={include_results}")
+    status_info = await analysis_service.get_analysis_status(analysis_id, include_results)
+    if not status_info:
+        return None
+    
+    # Réamorcer le hash (expiré ou absent) pour que les vérifications suivantes n'atteignent plus MongoDB;
+    # s'il a été créé entretemps, c'est lui qui fait foi (MongoDB n'est écrit qu'en différé)
+    if not include_results:
+        await _seed_status(redis_client, analysis_id, {
+            field: getattr(status_info.get(field), "value", status_info.get(field))
+            for field in ("status", "progress", "stage", "error", "updated_at")
+        })
+    return status_info
+
+async def _seed_status(redis_client, analysis_id: str, state: Dict, reset: bool = False):
+    """Écrit l'état d'une analyse dans son hash Redis de suivi (sans bloquer la route si Redis est indisponible)."""
+    try:
+        await seed_progress(redis_client, analysis_id, state, reset=reset)
+    except Exception as e:
+        logger.warning(f"Suivi Redis non mis à jour pour l'analyse {analysis_id}: {str(e)}")
 
 # ===== ROUTES AVEC CHEMINS FIXES (sans paramètres de chemin) =====
 # Ces routes doivent être définies AVANT les routes avec paramètres dynamiques
@@ -41,7 +110,8 @@ async def analyze_document(
     background_tasks: BackgroundTasks = BackgroundTasks(),
     analysis_service: AnalysisService = Depends(get_analysis_service),
     document_service: DocumentService = Depends(get_document_service),
-    orchestrator: Orchestrator = Depends(get_orchestrator)
+    orchestrator: Orchestrator = Depends(get_orchestrator),
+    redis_client = Depends(get_redis)
 ):
     """
     Analyse un document juridique
@@ -57,43 +127,26 @@ async def analyze_document(
         try:
             logger.info(f"Téléchargement d'un fichier local: {file.filename}")
             
-            # Lire le contenu du fichier
-            content = await file.read()
-            file_size = len(content)
-            
-            # Revenir au début du fichier
-            await file.seek(0)
-            
-            # Créer un document temporaire
-            temp_document_id = str(uuid.uuid4())
-            filename = file.filename
-            file_extension = os.path.splitext(filename)[1].lower()
-            
-            # Créer le chemin de sauvegarde
-            upload_dir = "/app/uploads"
-            os.makedirs(upload_dir, exist_ok=True)
-            file_path = os.path.join(upload_dir, f"{temp_document_id}{file_extension}")
-            
-            # Sauvegarder le fichier
-            with open(file_path, "wb") as f:
-                f.write(content)
-            
-            logger.info(f"Fichier sauvegardé: {file_path}")
+            # Enregistrer le fichier dans le magasin de blobs et créer le document
+            try:
+                document = await document_service.create_document_from_upload(
+                    file,
+                    document_type=document_type  # Utiliser le type de document fourni
+                )
+            except UploadTooLargeError:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Taille du fichier trop importante. Maximum: {MAX_UPLOAD_SIZE // (1024 * 1024)} Mo"
+                )
             
-            # Créer le document dans la base de données
-            document = await document_service.create_document(
-                document_id=temp_document_id,
-                filename=filename,
-                content_type=file.content_type,
-                size=file_size,
-                file_path=file_path,
-                document_type=document_type  # Utiliser le type de document fourni
-            )
+            logger.info(f"Fichier enregistré: {document.file_path}")
             
             # Remplacer l'ID local par l'ID réel
-            document_id = temp_document_id
+            document_id = document.id
             logger.info(f"Document créé avec ID: {document_id}")
             
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Erreur lors du téléchargement du document local: {str(e)}", exc_info=True)
             raise HTTPException(
@@ -131,6 +184,9 @@ async def analyze_document(
             document_id=document_id,
             document_type=document.document_type or document_type
         )
+        await _seed_status(redis_client, analysis.id, {
+            "status": AnalysisStatus.PENDING.value, "progress": 0.0, "stage": "pending", "updated_at": analysis.updated_at.timestamp()
+        })
         
         # Lancer l'analyse en tâche de fond
         logger.info(f"Démarrage de l'analyse en tâche de fond: analysis_id={analysis.id}")
@@ -150,21 +206,35 @@ async def analyze_document(
             detail=f"Erreur lors du démarrage de l'analyse: {str(e)}"
         )
 
-@router.get("/history", response_model=List[AnalysisResponse])
+@router.get("/history", response_model=List[AnalysisHistoryItem])
 async def get_analysis_history(
+    response: Response,
     limit: int = Query(10, description="Nombre maximum d'éléments à retourner"),
-    skip: int = Query(0, description="Nombre d'éléments à sauter"),
+    skip: int = Query(0, description="Nombre d'éléments à sauter (obsolète: utiliser cursor)", deprecated=True),
+    cursor: Optional[str] = Query(None, description="Curseur de la page suivante (en-tête X-Next-Cursor de la page précédente)"),
     analysis_service: AnalysisService = Depends(get_analysis_service)
 ):
     """
     Récupère l'historique des analyses
     
     Cette route permet de récupérer l'historique des analyses effectuées,
-    triées par date de création (la plus récente en premier).
+    triées par date de création (la plus récente en premier). Chaque ligne
+    ne contient que l'en-tête et les compteurs précalculés (clauses, risque
+    maximal, recommandations, durée), sans les résultats. Le curseur de la
+    page suivante est renvoyé dans l'en-tête X-Next-Cursor (absent sur la
+    dernière page).
     """
-    logger.info(f"Récupération de l'historique des analyses: skip={skip}, limit={limit}")
+    logger.info(f"Récupération de l'historique des analyses: skip={skip}, limit={limit}, cursor={cursor}")
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
     try:
-        analyses = await analysis_service.list_analyses(skip, limit)
+        analyses = await analysis_service.list_analyses(skip, limit, cursor=cursor)
+        following = next_cursor(analyses, limit)
+        if following:
+            response.headers[NEXT_CURSOR_HEADER] = following
         logger.info(f"Nombre d'analyses récupérées: {len(analyses)}")
         return analyses
     except Exception as e:
@@ -174,45 +244,33 @@ async def get_analysis_history(
             detail=f"Erreur lors de la récupération de l'historique: {str(e)}"
         )
 
-@router.post("/search", response_model=List[AnalysisResponse])
+@router.post("/search", response_model=List[ClauseSearchResult])
 async def search_analysis(
     query: str = Body(..., embed=True),
     limit: int = Query(10, description="Nombre maximum d'éléments à retourner"),
-    vector_service: VectorService = Depends(get_vector_service)
+    document_type: Optional[str] = Query(None, description="Restreindre à un type de document"),
+    min_risk_level: Optional[int] = Query(None, ge=1, le=5, description="Niveau de risque minimal des clauses"),
+    exclude_analysis_id: Optional[str] = Query(None, description="Exclure les clauses d'une analyse"),
+    clause_index_service: ClauseIndexService = Depends(get_clause_index_service)
 ):
     """
-    Recherche des analyses similaires en utilisant la base vectorielle
+    Recherche des clauses similaires dans les analyses passées
     
-    Cette route permet de rechercher des précédents juridiques similaires
-    à la requête fournie, en utilisant la recherche vectorielle.
+    Cette route interroge le corpus vectoriel des clauses extraites par les
+    analyses terminées et renvoie, pour chaque clause trouvée, l'analyse et
+    le document dont elle provient.
     """
-    logger.info(f"Recherche d'analyses similaires: query={query[:50]}..., limit={limit}")
+    logger.info(f"Recherche de clauses similaires: query={query[:50]}..., limit={limit}")
     try:
-        # Rechercher des précédents similaires
-        precedents = await vector_service.search_precedents(query, limit)
-        logger.info(f"Nombre de précédents trouvés: {len(precedents)}")
-        
-        # Convertir les précédents en format d'analyse pour la réponse
-        analyses = []
-        for precedent in precedents:
-            # Créer une analyse factice basée sur le précédent
-            analysis = AnalysisResponse(
-                id=precedent.id if hasattr(precedent, 'id') else str(uuid.uuid4()),
-                document_id="",  # Pas de document associé
-                document_type=precedent.type,
-                status="completed",
-                created_at=datetime.now(),
-                results={
-                    "clauses": [],
-                    "risks": [],
-                    "recommendations": [],
-                    "precedent": precedent.dict()
-                },
-                similarity_score=precedent.similarity_score
-            )
-            analyses.append(analysis)
-        
-        return analyses
+        results = await clause_index_service.search_similar_clauses(
+            query,
+            limit,
+            document_type=document_type,
+            min_risk_level=min_risk_level,
+            exclude_analysis_id=exclude_analysis_id
+        )
+        logger.info(f"Nombre de clauses trouvées: {len(results)}")
+        return results
     except Exception as e:
         logger.error(f"Erreur lors de la recherche: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -246,45 +304,89 @@ async def get_analysis(
 @router.get("/{analysis_id}/status")
 async def get_analysis_status(
     analysis_id: str,
-    analysis_service: AnalysisService = Depends(get_analysis_service)
+    include_results: bool = Query(False, description="Inclure les résultats si l'analyse est terminée"),
+    analysis_service: AnalysisService = Depends(get_analysis_service),
+    redis_client = Depends(get_redis)
 ):
     """
     Récupère le statut d'une analyse en cours
     
     Cette route permet de vérifier l'état d'avancement d'une analyse.
-    Elle retourne des informations différentes selon le statut de l'analyse.
+    Le statut est lu dans le hash Redis tenu à jour par l'orchestrateur (sans
+    accès à MongoDB); MongoDB n'est interrogé que si le hash est absent ou si
+    les résultats sont demandés (`include_results`).
     """
-    logger.info(f"Vérification du statut: analysis_id={analysis_id}")
-    analysis = await analysis_service.get_analysis(analysis_id)
-    if not analysis:
+    status_info = await _current_status(analysis_id, analysis_service, redis_client, include_results)
+    if not status_info:
         logger.error(f"Analyse non trouvée: analysis_id={analysis_id}")
         raise HTTPException(status_code=404, detail="Analyse non trouvée")
-    
-    status_info = {
-        "id": analysis.id,
-        "status": analysis.status,
-        "created_at": analysis.created_at,
-        "updated_at": analysis.updated_at
-    }
-    
-    # Ajouter des informations supplémentaires selon le statut
-    if analysis.status == "completed" and analysis.results:
-        status_info["results"] = analysis.results
-    elif analysis.status == "failed" and analysis.error:
-        status_info["error"] = analysis.error
-    elif analysis.status == "in_progress" and analysis.metadata and "progress" in analysis.metadata:
-        status_info["progress"] = analysis.metadata["progress"]
-    
-    logger.info(f"Statut récupéré: status={analysis.status}")
     return status_info
 
+@router.get("/{analysis_id}/events")
+async def stream_analysis_events(
+    analysis_id: str,
+    request: Request,
+    analysis_service: AnalysisService = Depends(get_analysis_service),
+    redis_client = Depends(get_redis)
+):
+    """
+    Suit une analyse en temps réel (Server-Sent Events)
+    
+    Le premier événement est l'état courant, puis chaque transition publiée
+    par l'orchestrateur (statut, progression, étape, résultats partiels) est
+    transmise jusqu'au statut final (ou un événement `not_found` si l'analyse
+    est supprimée entre-temps). Remplace l'interrogation périodique de
+    /status, qui reste disponible en repli.
+    """
+    if not await _current_status(analysis_id, analysis_service, redis_client):
+        logger.error(f"Analyse non trouvée: analysis_id={analysis_id}")
+        raise HTTPException(status_code=404, detail="Analyse non trouvée")
+    
+    hub = request.app.state.progress_events
+    try:
+        await hub.start()
+    except Exception as e:
+        # Le client se replie sur l'interrogation de /status
+        logger.error(f"Abonnement aux événements d'analyse impossible: {str(e)}")
+        raise HTTPException(status_code=503, detail="Suivi en temps réel indisponible")
+    heartbeat = float(os.getenv("PROGRESS_EVENTS_HEARTBEAT", "15"))
+    
+    async def event_stream():
+        # Abonnement avant la lecture de l'état courant: aucune transition n'est perdue entre les deux
+        async with hub.watch(progress_channel(analysis_id)) as queue:
+            state = await _current_status(analysis_id, analysis_service, redis_client)
+            if not state:
+                # Analyse supprimée entre la vérification et l'abonnement: événement final
+                yield _sse_event({"id": analysis_id, "error": "Analyse non trouvée"}, event="not_found")
+                return
+            yield f"retry: 3000\n{_sse_event(state)}"
+            if state["status"] in TERMINAL_STATUS_VALUES:
+                return
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    # Commentaire SSE: garde la connexion ouverte à travers les proxys
+                    yield ": keepalive\n\n"
+                    continue
+                yield _sse_event({"id": analysis_id, **event})
+                if event.get("status") in TERMINAL_STATUS_VALUES:
+                    return
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.post("/{analysis_id}/retry", response_model=AnalysisResponse)
 async def retry_analysis(
     analysis_id: str,
     background_tasks: BackgroundTasks = BackgroundTasks(),
     analysis_service: AnalysisService = Depends(get_analysis_service),
     document_service: DocumentService = Depends(get_document_service),
-    orchestrator: Orchestrator = Depends(get_orchestrator)
+    orchestrator: Orchestrator = Depends(get_orchestrator),
+    redis_client = Depends(get_redis)
 ):
     """
     Relance une analyse qui a échoué
@@ -322,6 +424,10 @@ async def retry_analysis(
         # Mettre à jour le statut
         logger.info(f"Mise à jour du statut: analysis_id={analysis_id}, status=pending")
         await analysis_service.update_analysis_status(analysis_id, AnalysisStatus.PENDING)
+        # Effacer l'état du passage précédent (statut "failed", erreur) du suivi Redis
+        await _seed_status(redis_client, analysis_id, {
+            "status": AnalysisStatus.PENDING.value, "progress": 0.0, "stage": "pending", "updated_at": datetime.now().timestamp()
+        }, reset=True)
         
         # Lancer l'analyse en tâche de fond
         logger.info(f"Redémarrage de l'analyse en tâche de fond: analysis_id={analysis_id}")
@@ -346,7 +452,9 @@ async def retry_analysis(
 @router.delete("/{analysis_id}")
 async def delete_analysis(
     analysis_id: str,
-    analysis_service: AnalysisService = Depends(get_analysis_service)
+    request: Request,
+    analysis_service: AnalysisService = Depends(get_analysis_service),
+    redis_client = Depends(get_redis)
 ):
     """
     Supprime une analyse
@@ -360,6 +468,17 @@ async def delete_analysis(
             logger.error(f"Analyse non trouvée: analysis_id={analysis_id}")
             raise HTTPException(status_code=404, detail="Analyse non trouvée")
         
+        # Nettoyage du corpus de clauses: Qdrant indisponible ne bloque pas la suppression
+        try:
+            await get_clause_index_service(request).delete_analysis_clauses(analysis_id)
+        except Exception as e:
+            logger.warning(f"Clauses de l'analyse {analysis_id} non retirées du corpus: {str(e)}")
+        
+        try:
+            await clear_progress(redis_client, analysis_id)
+        except Exception as e:
+            logger.warning(f"Suivi Redis de l'analyse {analysis_id} non supprimé: {str(e)}")
+        
         logger.info(f"Analyse supprimée avec succès: analysis_id={analysis_id}")
         return {"status": "success", "message": "Analyse supprimée avec succès"}
     except HTTPException:
@@ -393,12 +512,14 @@ async def get_analysis_results(
         logger.error(f"Analyse non terminée: analysis_id={analysis_id}, status={analysis.status}")
         raise HTTPException(status_code=400, detail="L'analyse n'est pas encore terminée")
     
-    if not analysis.results:
+    # Résultats chargés à la demande depuis leur collection
+    results = await analysis_service.get_analysis_results(analysis_id)
+    if not results:
         logger.error(f"Résultats d'analyse non disponibles: analysis_id={analysis_id}")
         raise HTTPException(status_code=404, detail="Résultats d'analyse non disponibles")
     
     logger.info(f"Résultats d'analyse récupérés: analysis_id={analysis_id}")
-    return analysis.results
+    return results
 
 @router.get("/{analysis_id}/document")
 async def get_analysis_document(
@@ -1,19 +1,26 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, BackgroundTasks, Query, Path
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, BackgroundTasks, Query, Path, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from typing import List, Optional
 import os
 import uuid
+import asyncio
+from urllib.parse import quote
 from datetime import datetime
 
 from app.models.document import Document, DocumentResponse, DocumentType, DocumentStatus
 from app.services.document_service import DocumentService
+from app.services.pagination import NEXT_CURSOR_HEADER, decode_cursor, next_cursor
+from app.services.upload_storage import UploadTooLargeError, MAX_UPLOAD_SIZE, UPLOAD_CHUNK_SIZE
 
 router = APIRouter()
 
+def get_document_service(request: Request):
+    return DocumentService(request.app.state.mongo_client)
+
 @router.post("/upload", response_model=DocumentResponse)
 async def upload_document(
     file: UploadFile = File(...),
-    document_service: DocumentService = Depends()
+    document_service: DocumentService = Depends(get_document_service)
 ):
     """
     Télécharge un document juridique pour analyse
@@ -33,48 +40,15 @@ async def upload_document(
                 detail="Type de fichier non supporté. Formats acceptés: PDF, DOCX, DOC, TXT"
             )
         
-        # Vérifier la taille du fichier (10 Mo max)
-        max_size = 10 * 1024 * 1024  # 10 Mo en octets
-        file_size = 0
-        
-        # Lire le contenu du fichier pour obtenir sa taille
-        content = await file.read()
-        file_size = len(content)
-        
-        # Revenir au début du fichier pour le traitement ultérieur
-        await file.seek(0)
-        
-        if file_size > max_size:
+        # Enregistrer le fichier dans le magasin de blobs (par blocs, 10 Mo max) et créer le document
+        try:
+            document = await document_service.create_document_from_upload(file)
+        except UploadTooLargeError:
             raise HTTPException(
                 status_code=400, 
-                detail=f"Taille du fichier trop importante. Maximum: 10 Mo"
+                detail=f"Taille du fichier trop importante. Maximum: {MAX_UPLOAD_SIZE // (1024 * 1024)} Mo"
             )
         
-        # Créer un identifiant unique pour le document
-        document_id = str(uuid.uuid4())
-        
-        # Déterminer l'extension du fichier
-        filename = file.filename
-        file_extension = os.path.splitext(filename)[1].lower()
-        
-        # Créer le chemin de sauvegarde
-        upload_dir = "/app/uploads"
-        os.makedirs(upload_dir, exist_ok=True)
-        file_path = os.path.join(upload_dir, f"{document_id}{file_extension}")
-        
-        # Sauvegarder le fichier
-        with open(file_path, "wb") as f:
-            f.write(content)
-        
-        # Créer le document dans la base de données
-        document = await document_service.create_document(
-            document_id=document_id,
-            filename=filename,
-            content_type=file.content_type,
-            size=file_size,
-            file_path=file_path
-        )
-        
         return DocumentResponse(
             id=document.id,
             filename=document.filename,
@@ -84,6 +58,8 @@ async def upload_document(
             size=document.size
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -94,7 +70,7 @@ async def upload_document(
 @router.get("/{document_id}", response_model=DocumentResponse)
 async def get_document(
     document_id: str = Path(..., description="ID du document à récupérer"),
-    document_service: DocumentService = Depends()
+    document_service: DocumentService = Depends(get_document_service)
 ):
     """
     Récupère les informations d'un document
@@ -126,11 +102,53 @@ async def get_document(
         )
 
 
+@router.get("/{document_id}/file")
+async def download_document_file(
+    document_id: str = Path(..., description="ID du document"),
+    document_service: DocumentService = Depends(get_document_service)
+):
+    """
+    Télécharge le fichier d'un document, sous son nom d'origine
+    """
+    try:
+        document = await document_service.get_document(document_id)
+
+        if not document:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Document avec l'ID {document_id} non trouvé"
+            )
+
+        async def file_chunks():
+            # Le fichier reste ouvert (copie locale conservée pour un stockage S3) pendant l'envoi
+            async with document_service.open_document_file(document) as path:
+                with open(path, "rb") as f:
+                    while True:
+                        chunk = await asyncio.to_thread(f.read, UPLOAD_CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        yield chunk
+
+        return StreamingResponse(
+            file_chunks(),
+            media_type=document.content_type,
+            headers={"Content-Disposition": f"attachment; filename*=UTF-8''{quote(document.filename)}"}
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Erreur lors de la récupération du fichier: {str(e)}"
+        )
+
+
 @router.put("/{document_id}/type", response_model=DocumentResponse)
 async def update_document_type(
     document_id: str = Path(..., description="ID du document à mettre à jour"),
     document_type: DocumentType = Query(..., description="Type de document"),
-    document_service: DocumentService = Depends()
+    document_service: DocumentService = Depends(get_document_service)
 ):
     """
     Met à jour le type d'un document
@@ -165,7 +183,7 @@ async def update_document_type(
 @router.delete("/{document_id}", response_model=dict)
 async def delete_document(
     document_id: str = Path(..., description="ID du document à supprimer"),
-    document_service: DocumentService = Depends()
+    document_service: DocumentService = Depends(get_document_service)
 ):
     """
     Supprime un document
@@ -192,27 +210,29 @@ async def delete_document(
 
 @router.get("/", response_model=List[DocumentResponse])
 async def list_documents(
-    skip: int = Query(0, description="Nombre d'éléments à sauter"),
+    response: Response,
+    skip: int = Query(0, description="Nombre d'éléments à sauter (obsolète: utiliser cursor)", deprecated=True),
     limit: int = Query(100, description="Nombre maximum d'éléments à retourner"),
-    document_service: DocumentService = Depends()
+    cursor: Optional[str] = Query(None, description="Curseur de la page suivante (en-tête X-Next-Cursor de la page précédente)"),
+    document_service: DocumentService = Depends(get_document_service)
 ):
     """
-    Liste tous les documents
+    Liste tous les documents, du plus récent au plus ancien
+    
+    Le curseur de la page suivante est renvoyé dans l'en-tête X-Next-Cursor
+    (absent sur la dernière page).
     """
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
     try:
-        documents = await document_service.list_documents(skip, limit)
-        
-        return [
-            DocumentResponse(
-                id=doc.id,
-                filename=doc.filename,
-                document_type=doc.document_type,
-                created_at=doc.created_at,
-                status=doc.status,
-                size=doc.size
-            )
-            for doc in documents
-        ]
+        documents = await document_service.list_documents(skip, limit, cursor=cursor)
+        following = next_cursor(documents, limit)
+        if following:
+            response.headers[NEXT_CURSOR_HEADER] = following
+        return documents
         
     except Exception as e:
         raise HTTPException(
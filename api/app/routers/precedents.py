@@ -1,10 +1,12 @@
-from fastapi import APIRouter, HTTPException, Depends, Query, Path, Body
+from fastapi import APIRouter, HTTPException, Depends, Query, Path, Body, BackgroundTasks
 from fastapi.responses import JSONResponse
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Any
 from datetime import datetime
 
-from app.models.analysis import Precedent
+from app.models.analysis import Precedent, PrecedentFilters
 from app.services.vector_service import VectorService
+from app.services.reindex_service import ReindexService
+from app.services.search_cache import get_search_cache
 
 router = APIRouter()
 
@@ -15,13 +17,29 @@ def get_vector_service():
 async def search_precedents(
     query: str = Query(..., description="Requête de recherche"),
     limit: int = Query(10, description="Nombre maximum de résultats à retourner"),
+    hybrid: Optional[bool] = Query(None, description="Combiner recherche vectorielle et lexicale (BM25)"),
+    type: Optional[str] = Query(None, description="Type de précédent (ex: Jurisprudence)"),
+    jurisdiction: Optional[str] = Query(None, description="Juridiction (ex: Cour de cassation)"),
+    document_type: Optional[str] = Query(None, description="Type de document concerné (ex: employment)"),
+    created_after: Optional[datetime] = Query(None, description="Précédents ajoutés après cette date"),
+    created_before: Optional[datetime] = Query(None, description="Précédents ajoutés avant cette date"),
+    clause_type: Optional[str] = Query(None, description="Type de la clause recherchée (liste restreinte par type de document)"),
     vector_service: VectorService = Depends(get_vector_service)
 ):
     """
     Recherche des précédents juridiques similaires
     """
     try:
-        precedents = await vector_service.search_precedents(query, limit)
+        filters = PrecedentFilters(
+            type=type,
+            jurisdiction=jurisdiction,
+            document_type=document_type,
+            created_after=created_after,
+            created_before=created_before
+        )
+        precedents = await vector_service.search_precedents(
+            query, limit, hybrid=hybrid, filters=filters, clause_type=clause_type
+        )
         return precedents
         
     except Exception as e:
@@ -30,6 +48,16 @@ async def search_precedents(
             detail=f"Erreur lors de la recherche de précédents: {str(e)}"
         )
 
+@router.get("/cache/stats", response_model=Dict[str, Any])
+async def get_search_cache_stats():
+    """
+    Statistiques du cache de recherche (taux de succès, latence économisée)
+    """
+    search_cache = get_search_cache()
+    if search_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **search_cache.stats()}
+
 @router.get("/{precedent_id}", response_model=Precedent)
 async def get_precedent(
     precedent_id: str = Path(..., description="ID du précédent à récupérer"),
@@ -64,6 +92,8 @@ async def add_precedent(
     precedent_type: str = Body(...),
     relevance: str = Body(...),
     source: Optional[str] = Body(None),
+    jurisdiction: Optional[str] = Body(None),
+    document_types: Optional[List[str]] = Body(None),
     vector_service: VectorService = Depends(get_vector_service)
 ):
     """
@@ -75,7 +105,9 @@ async def add_precedent(
             description=description,
             precedent_type=precedent_type,
             relevance=relevance,
-            source=source
+            source=source,
+            jurisdiction=jurisdiction,
+            document_types=document_types
         )
         
         return {"id": precedent_id, "status": "success"}
@@ -102,4 +134,69 @@ async def seed_precedents(
         raise HTTPException(
             status_code=500,
             detail=f"Erreur lors de l'initialisation des précédents: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+@router.post("/dedup", response_model=Dict[str, Any])
+async def deduplicate_precedents(
+    apply: bool = Body(False, embed=True, description="Supprimer les doublons (sinon simple rapport)"),
+    vector_service: VectorService = Depends(get_vector_service)
+):
+    """
+    Détecte les doublons exacts et quasi-doublons (MinHash/LSH) de la collection
+    
+    Avec apply=true, le plus ancien précédent de chaque groupe est conservé et
+    reçoit les métadonnées de ses doublons, qui sont supprimés.
+    """
+    try:
+        return await vector_service.deduplicate_collection(apply=apply)
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Erreur lors de la déduplication des précédents: {str(e)}"
+        )
+
+@router.post("/reindex", response_model=Dict[str, Any])
+async def reindex_precedents(
+    model: Optional[str] = Body(None, description="Modèle d'embedding de la nouvelle version"),
+    batch_size: int = Body(64, description="Taille des lots d'embeddings"),
+    keep_previous: bool = Body(True, description="Conserver l'ancienne version après la bascule"),
+    background_tasks: BackgroundTasks = BackgroundTasks(),
+    vector_service: VectorService = Depends(get_vector_service)
+):
+    """
+    Reconstruit la collection de précédents dans une nouvelle version puis bascule l'alias
+    
+    Les recherches continuent d'être servies par la version courante pendant la réindexation.
+    """
+    try:
+        reindex_service = ReindexService(vector_service=vector_service)
+        job = reindex_service.create_job(model)
+        background_tasks.add_task(
+            reindex_service.run_reindex,
+            job_id=job["id"],
+            batch_size=batch_size,
+            keep_previous=keep_previous
+        )
+        return job
+        
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Erreur lors du lancement de la réindexation: {str(e)}"
+        )
+
+@router.get("/reindex/{job_id}", response_model=Dict[str, Any])
+async def get_reindex_status(
+    job_id: str = Path(..., description="ID de la réindexation"),
+    vector_service: VectorService = Depends(get_vector_service)
+):
+    """
+    Récupère l'état d'une réindexation (quel que soit le worker qui l'exécute)
+    """
+    job = ReindexService(vector_service=vector_service).get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Réindexation {job_id} non trouvée")
+    return job
@@ -7,39 +7,33 @@ import logging
 from motor.motor_asyncio import AsyncIOMotorClient
 from pymongo.errors import DuplicateKeyError
 
-from app.models.analysis import Analysis, AnalysisStatus, AnalysisResults
+from app.services.mongo_client import get_mongo_client, get_mongo_database
+from app.services.pagination import KEYSET_SORT, keyset_filter
+
+from app.models.analysis import Analysis, AnalysisStatus, AnalysisResults, AnalysisCounters, AnalysisHistoryItem
 from app.models.document import Document, DocumentStatus
 
 # Configuration du logger
 logger = logging.getLogger(__name__)
 
+# En-tête d'une analyse: tout sauf les résultats, rangés dans la collection
+# analysis_results (les analyses antérieures peuvent encore les embarquer)
+HEADER_PROJECTION = {"_id": 0, "results": 0}
+
+# Ligne d'historique: quelques centaines d'octets (ni résultats, ni erreur, ni métadonnées)
+HISTORY_PROJECTION = {field: 1 for field in AnalysisHistoryItem.__fields__}
+HISTORY_PROJECTION["_id"] = 0
+
 class AnalysisService:
     """Service pour la gestion des analyses de documents juridiques"""
     
-    def __init__(self):
-        # Connexion à MongoDB
-        # Récupérer les variables d'environnement pour MongoDB
-        mongodb_user = os.getenv("MONGODB_USER", "admin")
-        mongodb_password = os.getenv("MONGODB_PASSWORD", "password_securise")
-        mongodb_host = os.getenv("MONGODB_HOST", "mongodb")
-        mongodb_port = os.getenv("MONGODB_PORT", "27017")
-        mongodb_db = os.getenv("MONGODB_DB", "legal_analyzer")
-
-        # Construire l'URI avec authentification
-        mongodb_uri = f"mongodb://{mongodb_user}:{mongodb_password}@{mongodb_host}:{mongodb_port}/{mongodb_db}?authSource=admin"
-        
-        try:
-            # Connexion à MongoDB avec l'URI authentifié
-            self.client = AsyncIOMotorClient(mongodb_uri)
-            self.db = self.client.get_database()
-            self.collection = self.db.analyses
-            
-            # Créer un index sur le champ "id" pour optimiser les recherches
-            logger.info("Initialisation du service d'analyse avec la connexion à MongoDB")
-            
-        except Exception as e:
-            logger.error(f"Erreur lors de la connexion à MongoDB: {str(e)}", exc_info=True)
-            raise
+    def __init__(self, client: Optional[AsyncIOMotorClient] = None):
+        # Client MongoDB partagé par l'application (un seul pool de connexions)
+        self.client = client or get_mongo_client()
+        self.db = get_mongo_database(self.client)
+        self.collection = self.db.analyses
+        # Résultats (clauses, recommandations, risques, précédents, résumé), un document par analyse
+        self.results_collection = self.db.analysis_results
         
     async def create_analysis(
         self,
@@ -77,15 +71,20 @@ class AnalysisService:
             logger.error(f"Erreur lors de la création de l'analyse: {str(e)}", exc_info=True)
             raise
     
-    async def get_analysis(self, analysis_id: str) -> Optional[Analysis]:
-        """Récupère une analyse par son ID"""
+    async def get_analysis(self, analysis_id: str, include_results: bool = False) -> Optional[Analysis]:
+        """
+        Récupère l'en-tête d'une analyse par son ID; les résultats ne sont
+        chargés (collection analysis_results) que si `include_results` est demandé.
+        """
         try:
-            analysis_dict = await self.collection.find_one({"id": analysis_id})
+            analysis_dict = await self.collection.find_one({"id": analysis_id}, HEADER_PROJECTION)
             
             if not analysis_dict:
                 logger.info(f"Analyse non trouvée: analysis_id={analysis_id}")
                 return None
-                
+            
+            if include_results:
+                analysis_dict["results"] = await self.get_analysis_results(analysis_id)
             return Analysis(**analysis_dict)
         except Exception as e:
             logger.error(f"Erreur lors de la récupération de l'analyse: {str(e)}", exc_info=True)
@@ -96,51 +95,64 @@ class AnalysisService:
         analysis_id: str,
         status: AnalysisStatus,
         error: Optional[str] = None
-    ) -> Optional[Analysis]:
-        """Met à jour le statut d'une analyse"""
+    ) -> bool:
+        """Met à jour le statut d'une analyse; False si l'analyse n'existe pas."""
         logger.info(f"Mise à jour du statut: analysis_id={analysis_id}, status={status}")
+        return await self.update_analysis_state(analysis_id, status=status, error=error)
+    
+    async def update_analysis_state(
+        self,
+        analysis_id: str,
+        status: Optional[AnalysisStatus] = None,
+        progress: Optional[float] = None,
+        stage: Optional[str] = None,
+        error: Optional[str] = None
+    ) -> bool:
+        """
+        Met à jour en une seule écriture le statut, la progression et l'étape
+        d'une analyse; False si l'analyse n'existe pas.
         
+        Pour un statut final, le temps de traitement est calculé par MongoDB
+        (mise à jour par pipeline d'agrégation: updated_at - created_at), sans
+        relire l'analyse.
+        """
         try:
-            # Vérifier que l'analyse existe
-            analysis = await self.get_analysis(analysis_id)
+            now = datetime.now()
+            # $literal: une valeur commençant par "$" ne doit pas être lue comme un champ
+            update_data: Dict[str, Any] = {"updated_at": now}
+            
+            if status is not None:
+                update_data["status"] = {"$literal": getattr(status, "value", status)}
+            if progress is not None:
+                update_data["metadata.progress"] = progress
+            if stage is not None:
+                update_data["metadata.stage"] = {"$literal": stage}
+            if error is not None:
+                update_data["error"] = {"$literal": error}
             
-            if not analysis:
+            is_final = status in [AnalysisStatus.COMPLETED, AnalysisStatus.FAILED]
+            if is_final:
+                update_data["processing_time"] = {
+                    "$divide": [{"$subtract": [now, "$created_at"]}, 1000]
+                }
+            
+            result = await self.collection.update_one(
+                {"id": analysis_id},
+                [{"$set": update_data}]
+            )
+            
+            if result.matched_count == 0:
                 logger.warning(f"Tentative de mise à jour d'une analyse inexistante: analysis_id={analysis_id}")
-                return None
-                
-            # Mettre à jour le statut, l'erreur et la date de mise à jour
-            analysis.status = status
-            analysis.error = error
-            analysis.updated_at = datetime.now()
+                return False
             
-            # Si l'analyse est terminée, calculer le temps de traitement
-            if status in [AnalysisStatus.COMPLETED, AnalysisStatus.FAILED]:
-                processing_time = (analysis.updated_at - analysis.created_at).total_seconds()
-                analysis.processing_time = processing_time
-                logger.info(f"Analyse terminée: analysis_id={analysis_id}, temps={processing_time}s, statut={status}")
+            if is_final:
+                logger.info(f"Analyse terminée: analysis_id={analysis_id}, statut={status}")
                 
                 # Si l'analyse a échoué, enregistrer l'erreur
                 if status == AnalysisStatus.FAILED and error:
                     logger.error(f"Échec de l'analyse: analysis_id={analysis_id}, erreur={error}")
             
-            # Mettre à jour dans MongoDB
-            update_data = {
-                "status": status,
-                "updated_at": analysis.updated_at
-            }
-            
-            if error is not None:
-                update_data["error"] = error
-                
-            if status in [AnalysisStatus.COMPLETED, AnalysisStatus.FAILED]:
-                update_data["processing_time"] = analysis.processing_time
-            
-            await self.collection.update_one(
-                {"id": analysis_id},
-                {"$set": update_data}
-            )
-            
-            return analysis
+            return True
         except Exception as e:
             logger.error(f"Erreur lors de la mise à jour du statut: {str(e)}", exc_info=True)
             raise
@@ -149,70 +161,75 @@ class AnalysisService:
         self,
         analysis_id: str,
         progress: float
-    ) -> Optional[Analysis]:
-        """Met à jour la progression d'une analyse"""
+    ) -> bool:
+        """Met à jour la progression d'une analyse; False si l'analyse n'existe pas"""
         logger.debug(f"Mise à jour de la progression: analysis_id={analysis_id}, progress={progress:.1f}")
         
         try:
-            # Vérifier que l'analyse existe
-            analysis = await self.get_analysis(analysis_id)
-            
-            if not analysis:
-                logger.warning(f"Tentative de mise à jour d'une analyse inexistante: analysis_id={analysis_id}")
-                return None
-                
-            # Mettre à jour la progression et la date de mise à jour
-            if not analysis.metadata:
-                analysis.metadata = {}
-                
-            analysis.metadata["progress"] = progress
-            analysis.updated_at = datetime.now()
-            
-            # Mettre à jour dans MongoDB
-            await self.collection.update_one(
+            result = await self.collection.update_one(
                 {"id": analysis_id},
                 {"$set": {
                     "metadata.progress": progress,
-                    "updated_at": analysis.updated_at
+                    "updated_at": datetime.now()
                 }}
             )
             
-            return analysis
+            if result.matched_count == 0:
+                logger.warning(f"Tentative de mise à jour d'une analyse inexistante: analysis_id={analysis_id}")
+                return False
+            
+            return True
         except Exception as e:
             logger.error(f"Erreur lors de la mise à jour de la progression: {str(e)}", exc_info=True)
             raise
     
+    async def get_analysis_results(self, analysis_id: str) -> Optional[AnalysisResults]:
+        """Résultats d'une analyse (None s'ils n'ont pas encore été enregistrés)"""
+        try:
+            results_dict = await self.results_collection.find_one({"analysis_id": analysis_id}, {"_id": 0, "results": 1})
+            if results_dict is None:
+                # Analyse antérieure à la séparation: résultats embarqués dans l'en-tête
+                results_dict = await self.collection.find_one({"id": analysis_id, "results": {"$ne": None}}, {"_id": 0, "results": 1})
+            if not results_dict or not results_dict.get("results"):
+                return None
+            return AnalysisResults(**results_dict["results"])
+        except Exception as e:
+            logger.error(f"Erreur lors de la récupération des résultats: {str(e)}", exc_info=True)
+            raise
+    
     async def update_analysis_results(
         self,
         analysis_id: str,
         results: AnalysisResults
-    ) -> Optional[Analysis]:
-        """Met à jour les résultats d'une analyse"""
+    ) -> bool:
+        """
+        Enregistre les résultats d'une analyse dans analysis_results (l'en-tête
+        ne garde que leurs compteurs); False si l'analyse n'existe pas
+        """
         logger.info(f"Mise à jour des résultats: analysis_id={analysis_id}")
         
         try:
-            # Vérifier que l'analyse existe
-            analysis = await self.get_analysis(analysis_id)
+            now = datetime.now()
+            result = await self.collection.update_one(
+                {"id": analysis_id},
+                {
+                    "$set": {"updated_at": now, "counters": AnalysisCounters.from_results(results).dict()},
+                    "$unset": {"results": ""}
+                }
+            )
             
-            if not analysis:
+            if result.matched_count == 0:
                 logger.warning(f"Tentative de mise à jour d'une analyse inexistante: analysis_id={analysis_id}")
-                return None
-                
-            # Mettre à jour les résultats et la date de mise à jour
-            analysis.results = results
-            analysis.updated_at = datetime.now()
+                return False
             
-            # Mettre à jour dans MongoDB
-            await self.collection.update_one(
-                {"id": analysis_id},
-                {"$set": {
-                    "results": results.dict(),
-                    "updated_at": analysis.updated_at
-                }}
+            await self.results_collection.replace_one(
+                {"analysis_id": analysis_id},
+                {"analysis_id": analysis_id, "results": results.dict(), "updated_at": now},
+                upsert=True
             )
             
             logger.info(f"Résultats mis à jour: analysis_id={analysis_id}")
-            return analysis
+            return True
         except Exception as e:
             logger.error(f"Erreur lors de la mise à jour des résultats: {str(e)}", exc_info=True)
             raise
@@ -222,21 +239,15 @@ class AnalysisService:
         logger.info(f"Suppression d'analyse: analysis_id={analysis_id}")
         
         try:
-            # Vérifier que l'analyse existe
-            analysis = await self.get_analysis(analysis_id)
-            
-            if not analysis:
-                logger.warning(f"Tentative de suppression d'une analyse inexistante: analysis_id={analysis_id}")
-                return False
-                
-            # Supprimer de MongoDB
+            # Supprimer de MongoDB (en-tête puis résultats)
             result = await self.collection.delete_one({"id": analysis_id})
             
             success = result.deleted_count > 0
             if success:
+                await self.results_collection.delete_one({"analysis_id": analysis_id})
                 logger.info(f"Analyse supprimée: analysis_id={analysis_id}")
             else:
-                logger.warning(f"Échec de la suppression: analysis_id={analysis_id}")
+                logger.warning(f"Tentative de suppression d'une analyse inexistante: analysis_id={analysis_id}")
                 
             return success
         except Exception as e:
@@ -246,17 +257,25 @@ class AnalysisService:
     async def list_analyses(
         self,
         skip: int = 0,
-        limit: int = 100
-    ) -> List[Analysis]:
-        """Liste toutes les analyses"""
-        logger.info(f"Récupération de la liste des analyses: skip={skip}, limit={limit}")
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> List[AnalysisHistoryItem]:
+        """
+        Liste les analyses (en-têtes et compteurs uniquement), de la plus
+        récente à la plus ancienne. Avec `cursor`, la page suivante est lue par
+        l'index (created_at, id); `skip` reste accepté pour compatibilité.
+        """
+        logger.info(f"Récupération de la liste des analyses: skip={skip}, limit={limit}, cursor={cursor}")
         
         try:
-            cursor = self.collection.find().skip(skip).limit(limit).sort("created_at", -1)
+            query = keyset_filter(cursor)
+            analyses_cursor = self.collection.find(query, HISTORY_PROJECTION).sort(KEYSET_SORT).limit(limit)
+            if skip and not cursor:
+                analyses_cursor = analyses_cursor.skip(skip)
             analyses = []
             
-            async for analysis_dict in cursor:
-                analyses.append(Analysis(**analysis_dict))
+            async for analysis_dict in analyses_cursor:
+                analyses.append(AnalysisHistoryItem(**analysis_dict))
                 
             logger.info(f"Analyses récupérées: count={len(analyses)}")
             return analyses
@@ -328,7 +347,7 @@ class AnalysisService:
             await self.update_analysis_status(analysis.id, AnalysisStatus.COMPLETED)
             
             # Récupérer l'analyse complète
-            return await self.get_analysis(analysis.id)
+            return await self.get_analysis(analysis.id, include_results=True)
             
         except Exception as e:
             # En cas d'erreur, mettre à jour le statut
@@ -340,34 +359,39 @@ class AnalysisService:
             )
             raise
             
-    async def get_history(self, limit: int = 10) -> List[Analysis]:
+    async def get_history(self, limit: int = 10) -> List[AnalysisHistoryItem]:
         """Récupère l'historique des analyses"""
         return await self.list_analyses(limit=limit)
         
-    async def get_analysis_status(self, analysis_id: str) -> Dict[str, Any]:
-        """Obtient le statut actuel d'une analyse"""
-        analysis = await self.get_analysis(analysis_id)
+    async def get_analysis_status(self, analysis_id: str, include_results: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Obtient le statut actuel d'une analyse sans charger ses résultats
+        (projection), sauf si `include_results` est demandé.
+        """
+        projection = {"_id": 0, "id": 1, "status": 1, "metadata": 1, "error": 1, "created_at": 1, "updated_at": 1}
+        analysis_dict = await self.collection.find_one({"id": analysis_id}, projection)
         
-        if not analysis:
+        if not analysis_dict:
             return None
-            
+        
+        metadata = analysis_dict.get("metadata") or {}
         status_info = {
-            "id": analysis.id,
-            "status": analysis.status,
-            "created_at": analysis.created_at,
-            "updated_at": analysis.updated_at
+            "id": analysis_dict["id"],
+            "status": analysis_dict["status"],
+            "progress": metadata.get("progress", 0.0),
+            "stage": metadata.get("stage"),
+            "created_at": analysis_dict.get("created_at"),
+            # Horodatage epoch, comme dans le hash Redis de suivi
+            "updated_at": analysis_dict["updated_at"].timestamp() if analysis_dict.get("updated_at") else None
         }
         
         # Ajouter des informations supplémentaires selon le statut
-        if analysis.status == AnalysisStatus.COMPLETED and analysis.results:
-            status_info["results"] = analysis.results
-        elif analysis.status == AnalysisStatus.FAILED and analysis.error:
-            status_info["error"] = analysis.error
-        elif analysis.status == AnalysisStatus.IN_PROGRESS:
-            if analysis.metadata and "progress" in analysis.metadata:
-                status_info["progress"] = analysis.metadata["progress"]
-            else:
-                status_info["progress"] = 0.0
+        if analysis_dict["status"] == AnalysisStatus.COMPLETED and include_results:
+            results = await self.get_analysis_results(analysis_id)
+            if results:
+                status_info["results"] = results
+        elif analysis_dict["status"] == AnalysisStatus.FAILED and analysis_dict.get("error"):
+            status_info["error"] = analysis_dict["error"]
         
         return status_info
         
@@ -411,7 +435,7 @@ class AnalysisService:
             
             # Récupérer le document
             from app.services.document_service import DocumentService
-            document_service = DocumentService()
+            document_service = DocumentService(self.client)
             document = await document_service.get_document(document_id)
             
             if not document:
@@ -425,7 +449,10 @@ class AnalysisService:
             
             # Lancer l'analyse complète via l'orchestrateur
             from app.workflows.orchestrator import Orchestrator
-            orchestrator = Orchestrator()
+            orchestrator = Orchestrator(
+                document_service=document_service,
+                analysis_service=self
+            )
             await orchestrator.run_analysis_workflow(
                 analysis_id=analysis_id,
                 document_id=document_id,
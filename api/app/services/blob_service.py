@@ -0,0 +1,208 @@
+from typing import Optional, AsyncIterator
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+import os
+import asyncio
+import logging
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.services.mongo_client import get_mongo_client, get_mongo_database
+from app.services.blob_store import get_blob_store
+
+logger = logging.getLogger(__name__)
+
+# Délai avant suppression d'un blob sans référence (un envoi du même contenu
+# pendant ce délai le réutilise), et période du ramasse-miettes
+BLOB_GC_GRACE_SECONDS = int(os.getenv("BLOB_GC_GRACE_SECONDS", "3600"))
+BLOB_GC_INTERVAL = int(os.getenv("BLOB_GC_INTERVAL", "900"))
+BLOB_GC_BATCH_SIZE = int(os.getenv("BLOB_GC_BATCH_SIZE", "100"))
+# Suppression abandonnée (ramasse-miettes arrêté en cours de route) reprise après ce délai
+BLOB_GC_DELETE_TIMEOUT = int(os.getenv("BLOB_GC_DELETE_TIMEOUT", "300"))
+BLOB_DELETE_POLL_SECONDS = 0.1
+
+
+def _discard(path: str):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+class BlobService:
+    """
+    Fichiers téléchargés adressés par leur contenu (SHA-256), avec comptage
+    des références.
+
+    La collection `blobs` tient un enregistrement par contenu (_id = empreinte,
+    refcount = nombre de documents qui le référencent); le contenu lui-même est
+    dans le magasin de blobs (disque local ou bucket S3). Un contenu téléchargé
+    plusieurs fois n'est stocké qu'une fois. Un blob dont la dernière référence
+    est libérée est marqué orphelin, puis supprimé par le ramasse-miettes
+    après BLOB_GC_GRACE_SECONDS.
+
+    Le ramasse-miettes marque l'enregistrement `deleting` avant de supprimer
+    le contenu, puis supprime l'enregistrement. Tant que la marque est posée,
+    aucune référence ne peut être ajoutée: un envoi du même contenu attend la
+    fin de la suppression, puis enregistre de nouveau le contenu.
+    """
+
+    def __init__(self, client: Optional[AsyncIOMotorClient] = None, store=None):
+        self.client = client or get_mongo_client()
+        self.db = get_mongo_database(self.client)
+        self.collection = self.db.blobs
+        self.store = store or get_blob_store()
+
+    def uri(self, digest: str) -> str:
+        return self.store.uri(digest)
+
+    async def add_reference(
+        self,
+        digest: str,
+        source_path: str,
+        size: int,
+        content_type: Optional[str] = None
+    ) -> str:
+        """
+        Ajoute une référence au blob `digest` dont le contenu est le fichier
+        `source_path`: le fichier est déplacé dans le magasin si le contenu
+        n'y est pas encore, sinon simplement supprimé. Renvoie l'URI du blob.
+        """
+        while True:
+            now = datetime.now()
+            try:
+                # Un blob en cours de suppression (marque `deleting`) ne correspond pas au filtre:
+                # l'insertion échoue sur l'_id déjà pris
+                previous = await self.collection.find_one_and_update(
+                    {"_id": digest, "deleting": {"$exists": False}},
+                    {
+                        "$inc": {"refcount": 1},
+                        "$unset": {"orphaned_at": ""},
+                        "$set": {"updated_at": now},
+                        "$setOnInsert": {"size": size, "content_type": content_type, "created_at": now}
+                    },
+                    upsert=True,
+                    return_document=ReturnDocument.BEFORE
+                )
+                break
+            except DuplicateKeyError:
+                await self._wait_for_deletion(digest)
+
+        # Contenu nouveau (ou supprimé par le ramasse-miettes avant l'enregistrement)
+        if previous is None or not await self.store.exists(digest):
+            try:
+                await self.store.put_file(digest, source_path)
+            except BaseException:
+                await self.release(digest)
+                await asyncio.to_thread(_discard, source_path)
+                raise
+            logger.info(f"Blob enregistré: {digest} ({size} octets)")
+        else:
+            await asyncio.to_thread(_discard, source_path)
+            logger.info(f"Blob déjà présent, référence ajoutée: {digest} ({previous.get('refcount', 0) + 1} références)")
+
+        return self.uri(digest)
+
+    async def _wait_for_deletion(self, digest: str):
+        """Attend la fin de la suppression du blob par le ramasse-miettes."""
+        await asyncio.sleep(BLOB_DELETE_POLL_SECONDS)
+        blob = await self.collection.find_one({"_id": digest}, {"deleting": 1})
+        deleting = blob.get("deleting") if blob else None
+        if deleting and deleting < datetime.now() - timedelta(seconds=BLOB_GC_DELETE_TIMEOUT):
+            # Suppression abandonnée: le contenu sera enregistré de nouveau
+            await self.collection.delete_one({"_id": digest, "deleting": deleting})
+            logger.warning(f"Suppression abandonnée du blob {digest} reprise")
+
+    async def release(self, digest: str) -> Optional[int]:
+        """
+        Libère une référence au blob; le marque orphelin s'il n'en a plus.
+        Renvoie le nombre de références restantes (None si le blob est inconnu).
+        """
+        blob = await self.collection.find_one_and_update(
+            {"_id": digest},
+            {"$inc": {"refcount": -1}, "$set": {"updated_at": datetime.now()}},
+            projection={"refcount": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        if blob is None:
+            logger.warning(f"Libération d'un blob inconnu: {digest}")
+            return None
+
+        refcount = blob.get("refcount", 0)
+        if refcount <= 0:
+            # Condition sur refcount: une référence ajoutée entre-temps annule le marquage
+            await self.collection.update_one(
+                {"_id": digest, "refcount": {"$lte": 0}},
+                {"$set": {"orphaned_at": datetime.now()}}
+            )
+        return refcount
+
+    @asynccontextmanager
+    async def open_local(self, digest: str, suffix: str = "") -> AsyncIterator[str]:
+        """Chemin local du contenu du blob (copie temporaire pour un magasin distant)."""
+        async with self.store.open_local(digest, suffix) as path:
+            yield path
+
+    async def collect_garbage(
+        self,
+        grace_seconds: Optional[int] = None,
+        batch_size: Optional[int] = None
+    ) -> int:
+        """
+        Supprime les blobs orphelins depuis plus de `grace_seconds`: marque
+        `deleting` (à condition que le blob soit toujours sans référence),
+        suppression du contenu, puis de l'enregistrement. Renvoie le nombre
+        de blobs supprimés.
+        """
+        grace_seconds = grace_seconds if grace_seconds is not None else BLOB_GC_GRACE_SECONDS
+        batch_size = batch_size or BLOB_GC_BATCH_SIZE
+        now = datetime.now()
+        cutoff = now - timedelta(seconds=grace_seconds)
+        abandoned = now - timedelta(seconds=BLOB_GC_DELETE_TIMEOUT)
+
+        orphans = await self.collection.find(
+            {"orphaned_at": {"$lt": cutoff}, "refcount": {"$lte": 0}},
+            {"_id": 1}
+        ).limit(batch_size).to_list(batch_size)
+
+        removed = 0
+        for blob in orphans:
+            digest = blob["_id"]
+            marker = datetime.now()
+            claimed = await self.collection.update_one(
+                {
+                    "_id": digest,
+                    "refcount": {"$lte": 0},
+                    "$or": [{"deleting": {"$exists": False}}, {"deleting": {"$lt": abandoned}}]
+                },
+                {"$set": {"deleting": marker}}
+            )
+            if not claimed.modified_count:
+                continue
+            try:
+                await self.store.delete(digest)
+            except Exception as e:
+                logger.error(f"Suppression du blob {digest} impossible: {str(e)}")
+                await self.collection.update_one({"_id": digest, "deleting": marker}, {"$unset": {"deleting": ""}})
+                continue
+            await self.collection.delete_one({"_id": digest, "deleting": marker})
+            removed += 1
+
+        if removed:
+            logger.info(f"Ramasse-miettes: {removed} blobs supprimés")
+        return removed
+
+    async def run_garbage_collector(self, interval: Optional[int] = None):
+        """Boucle du ramasse-miettes (tâche de fond de l'application)."""
+        interval = interval or BLOB_GC_INTERVAL
+        while True:
+            try:
+                while await self.collect_garbage() >= BLOB_GC_BATCH_SIZE:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ramasse-miettes des blobs en échec: {str(e)}")
+            await asyncio.sleep(interval)
@@ -0,0 +1,202 @@
+from typing import Optional, AsyncIterator
+from contextlib import asynccontextmanager
+import os
+import re
+import shutil
+import asyncio
+import logging
+import tempfile
+
+from app.services.upload_storage import UPLOAD_DIR
+
+logger = logging.getLogger(__name__)
+
+BLOB_STORE_BACKEND = os.getenv("BLOB_STORE_BACKEND", "local")
+BLOB_STORE_DIR = os.getenv("BLOB_STORE_DIR", os.path.join(UPLOAD_DIR, "blobs"))
+
+_DIGEST_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+def blob_key(digest: str) -> str:
+    """
+    Clé d'un blob: répertoires de deux niveaux tirés de l'empreinte
+    (ab/cd/abcd…), pour ne pas accumuler des milliers de fichiers dans un
+    seul répertoire. ValueError si l'empreinte n'est pas un SHA-256.
+    """
+    if not _DIGEST_PATTERN.match(digest or ""):
+        raise ValueError(f"Empreinte SHA-256 invalide: {digest}")
+    return f"{digest[:2]}/{digest[2:4]}/{digest}"
+
+
+class LocalBlobStore:
+    """Blobs sur le système de fichiers local, sous `root/ab/cd/<sha256>`."""
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or BLOB_STORE_DIR
+
+    def path(self, digest: str) -> str:
+        return os.path.join(self.root, blob_key(digest))
+
+    def uri(self, digest: str) -> str:
+        return self.path(digest)
+
+    async def exists(self, digest: str) -> bool:
+        return await asyncio.to_thread(os.path.exists, self.path(digest))
+
+    def _put(self, digest: str, source_path: str):
+        destination = self.path(digest)
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        try:
+            # Même système de fichiers (cas courant): renommage atomique
+            os.replace(source_path, destination)
+        except OSError:
+            temp_path = f"{destination}.part"
+            shutil.move(source_path, temp_path)
+            os.replace(temp_path, destination)
+
+    async def put_file(self, digest: str, source_path: str):
+        """Déplace le fichier `source_path` (contenu d'empreinte `digest`) dans le magasin."""
+        await asyncio.to_thread(self._put, digest, source_path)
+
+    def _delete(self, digest: str) -> bool:
+        try:
+            os.remove(self.path(digest))
+            return True
+        except FileNotFoundError:
+            return False
+
+    async def delete(self, digest: str) -> bool:
+        return await asyncio.to_thread(self._delete, digest)
+
+    @asynccontextmanager
+    async def open_local(self, digest: str, suffix: str = "") -> AsyncIterator[str]:
+        """Chemin local du blob (le fichier du magasin lui-même, en lecture seule)."""
+        yield self.path(digest)
+
+
+class S3BlobStore:
+    """
+    Blobs dans un bucket compatible S3 (AWS S3, MinIO...), sous
+    `prefix/ab/cd/<sha256>`.
+
+    Le client doit fournir les opérations boto3 head_object, upload_file,
+    download_file, delete_object, head_bucket et create_bucket; par défaut
+    un client boto3 est créé à partir de BLOB_S3_ENDPOINT_URL,
+    BLOB_S3_ACCESS_KEY, BLOB_S3_SECRET_KEY et BLOB_S3_REGION. Les appels
+    (bloquants) passent par un thread.
+    """
+
+    def __init__(
+        self,
+        bucket: Optional[str] = None,
+        prefix: Optional[str] = None,
+        client=None
+    ):
+        self.bucket = bucket or os.getenv("BLOB_S3_BUCKET", "legal-analyzer-blobs")
+        self.prefix = (prefix if prefix is not None else os.getenv("BLOB_S3_PREFIX", "blobs")).strip("/")
+        self.client = client or self._create_client()
+        self._bucket_checked = False
+
+    @staticmethod
+    def _create_client():
+        try:
+            import boto3
+        except ImportError as e:
+            raise RuntimeError("Le stockage S3 (BLOB_STORE_BACKEND=s3) nécessite le paquet boto3 (api/requirements.txt)") from e
+        return boto3.client(
+            "s3",
+            endpoint_url=os.getenv("BLOB_S3_ENDPOINT_URL") or None,
+            aws_access_key_id=os.getenv("BLOB_S3_ACCESS_KEY") or None,
+            aws_secret_access_key=os.getenv("BLOB_S3_SECRET_KEY") or None,
+            region_name=os.getenv("BLOB_S3_REGION", "us-east-1")
+        )
+
+    def key(self, digest: str) -> str:
+        key = blob_key(digest)
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def uri(self, digest: str) -> str:
+        return f"s3://{self.bucket}/{self.key(digest)}"
+
+    @staticmethod
+    def _is_not_found(error: Exception) -> bool:
+        response = getattr(error, "response", None) or {}
+        code = str(response.get("Error", {}).get("Code", ""))
+        return code in ("404", "NoSuchKey", "NotFound", "NoSuchBucket")
+
+    def _ensure_bucket(self):
+        if self._bucket_checked:
+            return
+        try:
+            self.client.head_bucket(Bucket=self.bucket)
+        except Exception as e:
+            if not self._is_not_found(e):
+                raise
+            # Déploiement local (MinIO): le bucket est créé au premier envoi
+            self.client.create_bucket(Bucket=self.bucket)
+            logger.info(f"Bucket S3 créé: {self.bucket}")
+        self._bucket_checked = True
+
+    def _exists(self, digest: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self.key(digest))
+            return True
+        except Exception as e:
+            if self._is_not_found(e):
+                return False
+            raise
+
+    async def exists(self, digest: str) -> bool:
+        return await asyncio.to_thread(self._exists, digest)
+
+    def _put(self, digest: str, source_path: str):
+        self._ensure_bucket()
+        self.client.upload_file(source_path, self.bucket, self.key(digest))
+        os.remove(source_path)
+
+    async def put_file(self, digest: str, source_path: str):
+        """Envoie le fichier `source_path` dans le bucket puis le supprime localement."""
+        await asyncio.to_thread(self._put, digest, source_path)
+
+    def _delete(self, digest: str) -> bool:
+        try:
+            self.client.delete_object(Bucket=self.bucket, Key=self.key(digest))
+            return True
+        except Exception as e:
+            if self._is_not_found(e):
+                return False
+            raise
+
+    async def delete(self, digest: str) -> bool:
+        return await asyncio.to_thread(self._delete, digest)
+
+    @asynccontextmanager
+    async def open_local(self, digest: str, suffix: str = "") -> AsyncIterator[str]:
+        """Copie locale temporaire du blob, supprimée à la sortie du contexte."""
+        fd, temp_path = tempfile.mkstemp(prefix=".blob-", suffix=suffix)
+        os.close(fd)
+        try:
+            await asyncio.to_thread(self.client.download_file, self.bucket, self.key(digest), temp_path)
+            yield temp_path
+        finally:
+            try:
+                os.unlink(temp_path)
+            except FileNotFoundError:
+                pass
+
+
+_blob_store = None
+
+
+def get_blob_store():
+    """Magasin de blobs de l'application, choisi par BLOB_STORE_BACKEND (local ou s3)."""
+    global _blob_store
+    if _blob_store is None:
+        if BLOB_STORE_BACKEND == "s3":
+            _blob_store = S3BlobStore()
+        elif BLOB_STORE_BACKEND == "local":
+            _blob_store = LocalBlobStore()
+        else:
+            raise ValueError(f"Stockage de blobs inconnu: {BLOB_STORE_BACKEND}")
+        logger.info(f"Stockage des fichiers: {BLOB_STORE_BACKEND}")
+    return _blob_store
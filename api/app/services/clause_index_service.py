@@ -0,0 +1,242 @@
+from typing import List, Optional, Dict, Any, Tuple
+import os
+import time
+import uuid
+import logging
+import numpy as np
+from qdrant_client.http import models
+
+from app.models.analysis import Clause, ClauseSearchResult, ClauseType
+from app.models.document import DocumentType
+from app.services.vector_service import VectorService, CollectionConfig, embedding_dimension
+
+logger = logging.getLogger(__name__)
+
+# Collections de clauses déjà initialisées par ce processus
+_initialized_clause_collections = set()
+
+# Champs de payload indexés pour filtrer le corpus de clauses
+CLAUSE_PAYLOAD_INDEXES = {
+    "analysis_id": models.PayloadSchemaType.KEYWORD,
+    "document_type": models.PayloadSchemaType.KEYWORD,
+    "type": models.PayloadSchemaType.KEYWORD,
+    "risk_level": models.PayloadSchemaType.INTEGER,
+    "created_at_ts": models.PayloadSchemaType.FLOAT,
+}
+
+
+class ClauseIndexService:
+    """
+    Corpus vectoriel des clauses extraites par les analyses.
+
+    Chaque clause d'une analyse terminée est indexée (upserts par lots) avec
+    l'ID d'analyse, le type de document et le niveau de risque, ce qui permet
+    de retrouver les contrats passés contenant des clauses similaires. Par
+    défaut, les vecteurs sont stockés sur disque avec une quantification
+    scalaire en RAM pour que la recherche reste rapide à plusieurs millions
+    de clauses.
+    """
+
+    def __init__(self, vector_service: Optional[VectorService] = None):
+        self.vector_service = vector_service or VectorService()
+        self.client = self.vector_service.client
+
+        self.collection_name = os.getenv("CLAUSE_COLLECTION", "legal_clauses")
+        self.embedding_model = self.vector_service.embedding_model
+        self.vector_size = embedding_dimension(self.embedding_model)
+        self.batch_size = int(os.getenv("CLAUSE_INDEX_BATCH_SIZE", "64"))
+        self.collection_config = CollectionConfig.from_env(
+            "CLAUSE_",
+            on_disk=True,
+            quantization="scalar"
+        )
+
+        self._init_collection()
+
+    @property
+    def _cache_key(self) -> str:
+        return f"{self.vector_service.backend}:{self.collection_name}"
+
+    def _init_collection(self):
+        """Crée la collection de clauses et ses index de payload si nécessaire."""
+        if self._cache_key not in _initialized_clause_collections:
+            self._create_collection()
+            _initialized_clause_collections.add(self._cache_key)
+
+        # La disposition des vecteurs (dimension réduite ou non) est celle de la
+        # collection existante, quelle que soit la configuration courante
+        self.collection_config = self.collection_config.with_reduced_dimension(
+            self.vector_service.collection_reduced_dimension(self.collection_name)
+        )
+
+    def _create_collection(self):
+        """Crée la collection (avec la configuration courante) et ses index de payload."""
+        collection_names = [col.name for col in self.client.get_collections().collections]
+        if self.collection_name not in collection_names:
+            config = self.collection_config
+            if not self.vector_service.supports_aliases:
+                config = config.with_reduced_dimension(None)
+            self.client.create_collection(
+                collection_name=self.collection_name,
+                vectors_config=config.vectors_config(self.vector_size),
+                hnsw_config=config.hnsw_config(),
+                quantization_config=config.quantization_config()
+            )
+
+        for field_name, field_schema in CLAUSE_PAYLOAD_INDEXES.items():
+            try:
+                self.client.create_payload_index(
+                    collection_name=self.collection_name,
+                    field_name=field_name,
+                    field_schema=field_schema
+                )
+            except Exception as e:
+                logger.warning(f"Index de payload {field_name} non créé: {str(e)}")
+
+    @staticmethod
+    def _clause_text(clause: Clause) -> str:
+        return f"{clause.title}\n{clause.content}"
+
+    @staticmethod
+    def _point_id(analysis_id: str, position: int) -> str:
+        """ID déterministe d'une clause (position dans l'analyse)."""
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{analysis_id}:{position}"))
+
+    async def index_analysis_clauses(
+        self,
+        analysis_id: str,
+        document_id: str,
+        document_type: Optional[str],
+        clauses: List[Clause]
+    ) -> int:
+        """
+        Indexe les clauses d'une analyse terminée, par lots, et renvoie leur
+        nombre. Les clauses d'une indexation précédente de la même analyse
+        (relance) sont d'abord retirées: une relance qui extrait moins de
+        clauses ne laisse pas d'anciennes clauses en trop.
+        """
+        await self.delete_analysis_clauses(analysis_id)
+        if not clauses:
+            return 0
+
+        document_type = getattr(document_type, "value", document_type)
+        created_at_ts = time.time()
+        indexed = 0
+
+        for start in range(0, len(clauses), self.batch_size):
+            batch = clauses[start:start + self.batch_size]
+            vectors = await self.vector_service._vectorize_many(
+                [self._clause_text(clause) for clause in batch],
+                self.embedding_model
+            )
+            self.client.upsert(
+                collection_name=self.collection_name,
+                wait=False,
+                points=[
+                    models.PointStruct(
+                        id=self._point_id(analysis_id, start + offset),
+                        vector=self.collection_config.point_vector(vector),
+                        payload={
+                            **clause.dict(),
+                            "type": getattr(clause.type, "value", clause.type),
+                            "risk_level": int(clause.risk_level),
+                            "analysis_id": analysis_id,
+                            "document_id": document_id,
+                            "document_type": document_type,
+                            "created_at_ts": created_at_ts
+                        }
+                    )
+                    for offset, (clause, vector) in enumerate(zip(batch, vectors))
+                ]
+            )
+            indexed += len(batch)
+
+        logger.info(f"{indexed} clauses indexées pour analysis_id={analysis_id}")
+        return indexed
+
+    async def delete_analysis_clauses(self, analysis_id: str):
+        """Retire du corpus les clauses d'une analyse supprimée."""
+        self.client.delete(
+            collection_name=self.collection_name,
+            points_selector=models.FilterSelector(
+                filter=models.Filter(must=[
+                    models.FieldCondition(key="analysis_id", match=models.MatchValue(value=analysis_id))
+                ])
+            )
+        )
+
+    async def search_similar_clauses(
+        self,
+        query: str,
+        limit: int = 10,
+        document_type: Optional[str] = None,
+        min_risk_level: Optional[int] = None,
+        exclude_analysis_id: Optional[str] = None
+    ) -> List[ClauseSearchResult]:
+        """Recherche les clauses les plus proches d'un texte dans les analyses passées."""
+        must: List[Any] = []
+        must_not: List[Any] = []
+        if document_type:
+            must.append(models.FieldCondition(key="document_type", match=models.MatchValue(value=document_type)))
+        if min_risk_level:
+            must.append(models.FieldCondition(key="risk_level", range=models.Range(gte=min_risk_level)))
+        if exclude_analysis_id:
+            must_not.append(models.FieldCondition(key="analysis_id", match=models.MatchValue(value=exclude_analysis_id)))
+        query_filter = models.Filter(must=must or None, must_not=must_not or None) if (must or must_not) else None
+
+        query_vector = await self.vector_service._vectorize(query, self.embedding_model)
+        search_result = self.client.search(
+            collection_name=self.collection_name,
+            query_vector=self.collection_config.query_vector(query_vector),
+            query_filter=query_filter,
+            search_params=self.collection_config.search_params(),
+            limit=self.collection_config.search_limit(limit),
+            with_vectors=self.collection_config.search_vectors(False)
+        )
+        search_result = self.collection_config.rescore(query_vector, search_result, limit)
+
+        results = []
+        for point in search_result:
+            payload: Dict[str, Any] = point.payload or {}
+            try:
+                clause = Clause(**{field: payload.get(field) for field in Clause.__fields__})
+            except Exception as e:
+                logger.warning(f"Clause indexée invalide ignorée ({point.id}): {str(e)}")
+                continue
+            results.append(ClauseSearchResult(
+                analysis_id=payload.get("analysis_id", ""),
+                document_id=payload.get("document_id", ""),
+                document_type=payload.get("document_type"),
+                clause=clause,
+                similarity_score=point.score
+            ))
+        return results
+
+    def clause_centroids(self, sample_size: int = 256) -> Dict[Tuple[str, str], List[float]]:
+        """
+        Centroïde des clauses de chaque couple (type de document, type de clause),
+        calculé sur un échantillon d'au plus `sample_size` clauses du corpus.
+        Sert à précalculer les listes restreintes de précédents; le type de
+        document "other" correspond à une recherche sans filtre de type.
+        """
+        centroids = {}
+        for document_type in DocumentType:
+            for clause_type in ClauseType:
+                points, _ = self.client.scroll(
+                    collection_name=self.collection_name,
+                    scroll_filter=models.Filter(must=[
+                        models.FieldCondition(key="document_type", match=models.MatchValue(value=document_type.value)),
+                        models.FieldCondition(key="type", match=models.MatchValue(value=clause_type.value))
+                    ]),
+                    limit=sample_size,
+                    with_payload=False,
+                    with_vectors=self.collection_config.search_vectors(True)
+                )
+                vectors = [CollectionConfig.full_vector(point.vector) for point in points if point.vector is not None]
+                if not vectors:
+                    continue
+                matrix = np.asarray(vectors, dtype=np.float32)
+                matrix /= np.linalg.norm(matrix, axis=1, keepdims=True).clip(min=1e-12)
+                key_type = "" if document_type == DocumentType.OTHER else document_type.value
+                centroids[(key_type, clause_type.value)] = matrix.mean(axis=0).tolist()
+        return centroids
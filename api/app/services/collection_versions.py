@@ -0,0 +1,98 @@
+from typing import Dict, Optional
+import os
+import time
+import logging
+import threading
+
+from app.services.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+REDIS_PREFIX = "precedent_search:version"
+
+# Après une erreur Redis, durée pendant laquelle le compteur local sert seul
+VERSION_REDIS_RETRY_SECONDS = float(os.getenv("COLLECTION_VERSION_REDIS_RETRY", "30"))
+
+
+class CollectionVersions:
+    """
+    Numéro de version des données de chaque collection de précédents.
+
+    Toute écriture (ajout, fusion, déduplication, chargement d'un artefact)
+    incrémente la version de sa collection; le cache de recherche et les
+    index en mémoire (BM25, MinHash) comparent la version à celle qu'ils
+    ont vue pour se savoir périmés. Le compteur est dans Redis, partagé par
+    les workers de l'API et les scripts. Si Redis est injoignable, un
+    compteur propre au processus prend le relais: les versions sont alors
+    préfixées différemment ("l" au lieu de "r") pour ne jamais retomber sur
+    une version déjà vue via Redis.
+    """
+
+    def __init__(self, redis_client=None, use_redis: bool = True):
+        self._redis = redis_client
+        self._use_redis = use_redis
+        self._local: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._redis_retry_at = 0.0
+
+    def _client(self):
+        if not self._use_redis or time.monotonic() < self._redis_retry_at:
+            return None
+        if self._redis is None:
+            self._redis = get_redis_client()
+        return self._redis
+
+    def _redis_failed(self, action: str, error: Exception):
+        if self._redis_retry_at == 0.0:
+            logger.warning(f"Versions des collections: Redis indisponible ({action}), compteur local: {str(error)}")
+        else:
+            logger.debug(f"Versions des collections: Redis toujours indisponible ({action}): {str(error)}")
+        self._redis_retry_at = time.monotonic() + VERSION_REDIS_RETRY_SECONDS
+
+    def get(self, namespace: str) -> str:
+        """Version courante des données d'une collection."""
+        client = self._client()
+        if client is not None:
+            try:
+                value = client.get(f"{REDIS_PREFIX}:{namespace}")
+                self._redis_retry_at = 0.0
+                return f"r{int(value) if value else 0}"
+            except Exception as e:
+                self._redis_failed("lecture", e)
+        with self._lock:
+            return f"l{self._local.get(namespace, 0)}"
+
+    @staticmethod
+    def follows(previous: Optional[str], version: str) -> bool:
+        """Vrai si `version` est la version suivant immédiatement `previous` (même compteur)."""
+        if not previous or previous[0] != version[0]:
+            return False
+        return int(version[1:]) == int(previous[1:]) + 1
+
+    def bump(self, namespace: str) -> str:
+        """Signale une écriture dans la collection."""
+        with self._lock:
+            self._local[namespace] = self._local.get(namespace, 0) + 1
+            local = f"l{self._local[namespace]}"
+        client = self._client()
+        if client is not None:
+            try:
+                value = client.incr(f"{REDIS_PREFIX}:{namespace}")
+                self._redis_retry_at = 0.0
+                return f"r{int(value)}"
+            except Exception as e:
+                self._redis_failed("incrément", e)
+        return local
+
+
+_collection_versions: Optional[CollectionVersions] = None
+
+
+def get_collection_versions() -> CollectionVersions:
+    """Versions partagées par le processus."""
+    global _collection_versions
+    if _collection_versions is None:
+        _collection_versions = CollectionVersions(
+            use_redis=os.getenv("COLLECTION_VERSION_REDIS", "true").lower() == "true"
+        )
+    return _collection_versions
@@ -0,0 +1,165 @@
+from typing import List, Dict, Optional, Tuple, Set
+import re
+import zlib
+import hashlib
+import threading
+from collections import defaultdict
+import numpy as np
+
+from app.services.lexical_index import _strip_accents
+
+WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+# Nombre premier de Mersenne utilisé par les permutations (a * x + b) mod p
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def normalize_text(text: str) -> str:
+    """Texte normalisé (casse, accents, ponctuation, espaces) pour la comparaison."""
+    return " ".join(WORD_PATTERN.findall(_strip_accents((text or "").lower())))
+
+
+def content_hash(text: str) -> str:
+    """Empreinte exacte du texte normalisé."""
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def shingles(text: str, size: int = 3) -> Set[str]:
+    """Ensemble des n-grammes de mots (shingles) d'un texte normalisé."""
+    words = normalize_text(text).split()
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+class MinHasher:
+    """Signatures MinHash calculées de façon vectorisée avec NumPy."""
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 3, seed: int = 1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        generator = np.random.RandomState(seed)
+        self.a = generator.randint(1, np.iinfo(np.int64).max, size=num_perm, dtype=np.int64).astype(np.uint64) % MERSENNE_PRIME
+        self.b = generator.randint(0, np.iinfo(np.int64).max, size=num_perm, dtype=np.int64).astype(np.uint64) % MERSENNE_PRIME
+
+    def signature(self, text: str) -> np.ndarray:
+        grams = shingles(text, self.shingle_size)
+        if not grams:
+            return np.full(self.num_perm, MAX_HASH, dtype=np.uint64)
+        hashes = np.fromiter(
+            (zlib.crc32(gram.encode("utf-8")) for gram in grams),
+            dtype=np.uint64,
+            count=len(grams)
+        )
+        # Matrice (shingles x permutations), puis minimum par permutation
+        with np.errstate(over="ignore"):
+            permuted = (np.outer(hashes, self.a) + self.b) % MERSENNE_PRIME & MAX_HASH
+        return permuted.min(axis=0)
+
+    @staticmethod
+    def jaccard(first: np.ndarray, second: np.ndarray) -> float:
+        """Estimation de la similarité de Jaccard entre deux signatures."""
+        return float(np.mean(first == second))
+
+
+def optimal_bands(num_perm: int, threshold: float, false_negative_weight: float = 0.8) -> Tuple[int, int]:
+    """
+    Choisit (bandes, lignes), avec bandes x lignes = num_perm, qui minimisent
+    la somme pondérée des probabilités de faux positifs (similarité < seuil) et
+    de faux négatifs (similarité >= seuil), intégrées sur la courbe en S
+    P(candidat) = 1 - (1 - s ** lignes) ** bandes.
+
+    Les faux positifs sont éliminés ensuite par la vérification sur la signature
+    complète: ils ne coûtent que du calcul, d'où un poids plus faible.
+    """
+    below = np.linspace(0.0, threshold, 200)
+    above = np.linspace(threshold, 1.0, 200)
+    best = (num_perm, 1)
+    best_error = float("inf")
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        false_positive = np.mean(1 - (1 - below ** rows) ** bands) * threshold
+        false_negative = np.mean((1 - above ** rows) ** bands) * (1.0 - threshold)
+        error = (1.0 - false_negative_weight) * false_positive + false_negative_weight * false_negative
+        if error < best_error:
+            best, best_error = (bands, rows), error
+    return best
+
+
+class DuplicateIndex:
+    """
+    Index de détection des doublons exacts (empreinte SHA-256 du texte
+    normalisé) et quasi-doublons (MinHash + LSH par bandes).
+
+    Les candidats renvoyés par LSH sont confirmés par la similarité de Jaccard
+    estimée sur la signature complète.
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 128, shingle_size: int = 3):
+        self.threshold = threshold
+        self.hasher = MinHasher(num_perm, shingle_size)
+        self.bands, self.rows = optimal_bands(num_perm, threshold)
+        self.exact: Dict[str, str] = {}
+        self.signatures: Dict[str, np.ndarray] = {}
+        self.hashes: Dict[str, str] = {}
+        self.buckets: List[Dict[bytes, Set[str]]] = [defaultdict(set) for _ in range(self.bands)]
+        # Version des données de la collection indexée (renseignée par le service)
+        self.data_version: Optional[Tuple[str, str]] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [
+            signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            for band in range(self.bands)
+        ]
+
+    def find(self, text: str, signature: Optional[np.ndarray] = None) -> Optional[Tuple[str, float]]:
+        """Renvoie (id, similarité) du meilleur doublon connu, ou None."""
+        digest = content_hash(text)
+        with self._lock:
+            if digest in self.exact:
+                return self.exact[digest], 1.0
+
+        signature = self.hasher.signature(text) if signature is None else signature
+        with self._lock:
+            candidates = set()
+            for band, key in enumerate(self._band_keys(signature)):
+                candidates |= self.buckets[band].get(key, set())
+
+            best = None
+            for doc_id in candidates:
+                similarity = MinHasher.jaccard(signature, self.signatures[doc_id])
+                if similarity >= self.threshold and (best is None or similarity > best[1]):
+                    best = (doc_id, similarity)
+            return best
+
+    def add(self, doc_id: str, text: str, signature: Optional[np.ndarray] = None):
+        signature = self.hasher.signature(text) if signature is None else signature
+        digest = content_hash(text)
+        with self._lock:
+            self.exact.setdefault(digest, doc_id)
+            self.hashes[doc_id] = digest
+            self.signatures[doc_id] = signature
+            for band, key in enumerate(self._band_keys(signature)):
+                self.buckets[band][key].add(doc_id)
+
+    def remove(self, doc_id: str):
+        with self._lock:
+            signature = self.signatures.pop(doc_id, None)
+            if signature is None:
+                return
+            digest = self.hashes.pop(doc_id)
+            if self.exact.get(digest) == doc_id:
+                del self.exact[digest]
+            for band, key in enumerate(self._band_keys(signature)):
+                bucket = self.buckets[band].get(key)
+                if bucket is not None:
+                    bucket.discard(doc_id)
+                    if not bucket:
+                        del self.buckets[band][key]
@@ -1,30 +1,39 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, AsyncIterator
+from contextlib import asynccontextmanager
 from datetime import datetime
 import os
 import uuid
+import asyncio
+import logging
+from fastapi import UploadFile
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument
 from pymongo.errors import DuplicateKeyError
 
-from app.models.document import Document, DocumentType, DocumentStatus
+from app.models.document import Document, DocumentType, DocumentStatus, DocumentResponse
+from app.services.mongo_client import get_mongo_client, get_mongo_database
+from app.services.pagination import KEYSET_SORT, keyset_filter
+from app.services.upload_storage import save_upload, UPLOAD_DIR
+from app.services.blob_service import BlobService
+
+logger = logging.getLogger(__name__)
+
+# Champs renvoyés par les mises à jour: tout sauf le contenu texte (volumineux)
+DOCUMENT_SUMMARY_PROJECTION = {"_id": 0, "text_content": 0}
+
+# Champs d'une ligne de la liste des documents (DocumentResponse)
+DOCUMENT_LIST_PROJECTION = {field: 1 for field in DocumentResponse.__fields__}
+DOCUMENT_LIST_PROJECTION["_id"] = 0
 
 class DocumentService:
     """Service pour la gestion des documents juridiques"""
     
-    def __init__(self):
-        # Récupérer les variables d'environnement pour MongoDB
-        mongodb_user = os.getenv("MONGODB_USER", "admin")
-        mongodb_password = os.getenv("MONGODB_PASSWORD", "password_securise")
-        mongodb_host = os.getenv("MONGODB_HOST", "mongodb")
-        mongodb_port = os.getenv("MONGODB_PORT", "27017")
-        mongodb_db = os.getenv("MONGODB_DB", "legal_analyzer")
-        
-        # Construire l'URI avec authentification
-        mongodb_uri = f"mongodb://{mongodb_user}:{mongodb_password}@{mongodb_host}:{mongodb_port}/{mongodb_db}?authSource=admin"
-        
-        # Connexion à MongoDB avec l'URI authentifié
-        self.client = AsyncIOMotorClient(mongodb_uri)
-        self.db = self.client[mongodb_db]
+    def __init__(self, client: Optional[AsyncIOMotorClient] = None, blob_service: Optional[BlobService] = None):
+        # Client MongoDB partagé par l'application (un seul pool de connexions)
+        self.client = client or get_mongo_client()
+        self.db = get_mongo_database(self.client)
         self.collection = self.db.documents
+        self.blobs = blob_service or BlobService(self.client)
         
     async def create_document(
         self,
@@ -33,7 +42,9 @@ class DocumentService:
         content_type: str,
         size: int,
         file_path: str,
-        document_type: Optional[DocumentType] = None
+        document_type: Optional[DocumentType] = None,
+        content_hash: Optional[str] = None,
+        blob_id: Optional[str] = None
     ) -> Document:
         """Crée un nouveau document dans la base de données"""
         
@@ -44,6 +55,8 @@ class DocumentService:
             size=size,
             file_path=file_path,
             document_type=document_type,
+            content_hash=content_hash,
+            blob_id=blob_id,
             status=DocumentStatus.PENDING
         )
         
@@ -59,6 +72,62 @@ class DocumentService:
             
         return document
     
+    async def create_document_from_upload(
+        self,
+        file: UploadFile,
+        document_id: Optional[str] = None,
+        document_type: Optional[DocumentType] = None
+    ) -> Document:
+        """
+        Enregistre un fichier téléchargé dans le magasin de blobs et crée le
+        document qui le référence. Le fichier est copié par blocs dans un
+        fichier d'attente (taille et empreinte calculées au passage), puis
+        déplacé vers son blob, ou supprimé si le même contenu est déjà stocké.
+        UploadTooLargeError si le fichier dépasse la taille maximale.
+        """
+        document_id = document_id or str(uuid.uuid4())
+        incoming_path = os.path.join(UPLOAD_DIR, ".incoming", document_id)
+        size, content_hash = await save_upload(file, incoming_path)
+        
+        file_path = await self.blobs.add_reference(content_hash, incoming_path, size, file.content_type)
+        try:
+            return await self.create_document(
+                document_id=document_id,
+                filename=file.filename,
+                content_type=file.content_type,
+                size=size,
+                file_path=file_path,
+                document_type=document_type,
+                content_hash=content_hash,
+                blob_id=content_hash
+            )
+        except BaseException:
+            await self.blobs.release(content_hash)
+            raise
+    
+    @asynccontextmanager
+    async def open_document_file(self, document: Document) -> AsyncIterator[str]:
+        """Chemin local du fichier d'un document (blob, ou ancien fichier d'uploads)"""
+        if document.blob_id:
+            suffix = os.path.splitext(document.filename)[1].lower()
+            async with self.blobs.open_local(document.blob_id, suffix) as path:
+                yield path
+        else:
+            yield document.file_path
+    
+    async def find_by_content_hash(self, content_hash: str) -> Optional[Document]:
+        """Récupère le dernier document téléchargé avec le même contenu"""
+        
+        document_dict = await self.collection.find_one(
+            {"content_hash": content_hash},
+            sort=[("created_at", -1)]
+        )
+        
+        if not document_dict:
+            return None
+            
+        return Document(**document_dict)
+    
     async def get_document(self, document_id: str) -> Optional[Document]:
         """Récupère un document par son ID"""
         
@@ -74,114 +143,106 @@ class DocumentService:
         document_id: str,
         document_type: DocumentType
     ) -> Optional[Document]:
-        """Met à jour le type d'un document"""
+        """Met à jour le type d'un document (une seule requête, sans le contenu texte)"""
         
-        # Vérifier que le document existe
-        document = await self.get_document(document_id)
-        
-        if not document:
-            return None
-            
-        # Mettre à jour le type et la date de mise à jour
-        document.document_type = document_type
-        document.updated_at = datetime.now()
-        
-        # Mettre à jour dans MongoDB
-        await self.collection.update_one(
+        document_dict = await self.collection.find_one_and_update(
             {"id": document_id},
             {"$set": {
                 "document_type": document_type,
-                "updated_at": document.updated_at
-            }}
+                "updated_at": datetime.now()
+            }},
+            projection=DOCUMENT_SUMMARY_PROJECTION,
+            return_document=ReturnDocument.AFTER
         )
         
-        return document
+        if not document_dict:
+            return None
+            
+        return Document(**document_dict)
     
     async def update_document_status(
         self,
         document_id: str,
         status: DocumentStatus
-    ) -> Optional[Document]:
-        """Met à jour le statut d'un document"""
+    ) -> bool:
+        """Met à jour le statut d'un document; False si le document n'existe pas"""
         
-        # Vérifier que le document existe
-        document = await self.get_document(document_id)
-        
-        if not document:
-            return None
-            
-        # Mettre à jour le statut et la date de mise à jour
-        document.status = status
-        document.updated_at = datetime.now()
-        
-        # Mettre à jour dans MongoDB
-        await self.collection.update_one(
+        result = await self.collection.update_one(
             {"id": document_id},
             {"$set": {
                 "status": status,
-                "updated_at": document.updated_at
+                "updated_at": datetime.now()
             }}
         )
         
-        return document
+        return result.matched_count > 0
     
     async def update_document_text_content(
         self,
         document_id: str,
         text_content: str
-    ) -> Optional[Document]:
-        """Met à jour le contenu texte d'un document"""
+    ) -> bool:
+        """Met à jour le contenu texte d'un document; False si le document n'existe pas"""
         
-        # Vérifier que le document existe
-        document = await self.get_document(document_id)
-        
-        if not document:
-            return None
-            
-        # Mettre à jour le contenu texte et la date de mise à jour
-        document.text_content = text_content
-        document.updated_at = datetime.now()
-        
-        # Mettre à jour dans MongoDB
-        await self.collection.update_one(
+        result = await self.collection.update_one(
             {"id": document_id},
             {"$set": {
                 "text_content": text_content,
-                "updated_at": document.updated_at
+                "updated_at": datetime.now()
             }}
         )
         
-        return document
+        return result.matched_count > 0
     
     async def delete_document(self, document_id: str) -> bool:
         """Supprime un document"""
         
-        # Vérifier que le document existe
-        document = await self.get_document(document_id)
+        # Supprimer de MongoDB en récupérant la référence au fichier
+        document_dict = await self.collection.find_one_and_delete(
+            {"id": document_id},
+            projection={"_id": 0, "file_path": 1, "blob_id": 1}
+        )
         
-        if not document:
+        if not document_dict:
             return False
-            
-        # Supprimer le fichier
-        if os.path.exists(document.file_path):
-            os.remove(document.file_path)
-            
-        # Supprimer de MongoDB
-        result = await self.collection.delete_one({"id": document_id})
         
-        return result.deleted_count > 0
+        blob_id = document_dict.get("blob_id")
+        if blob_id:
+            # Libérer la référence: le contenu est supprimé par le ramasse-miettes
+            await self.blobs.release(blob_id)
+        else:
+            # Ancien fichier d'uploads, propre au document
+            file_path = document_dict.get("file_path")
+            if file_path:
+                try:
+                    await asyncio.to_thread(os.remove, file_path)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    logger.warning(f"Suppression du fichier {file_path} impossible: {str(e)}")
+        
+        return True
     
     async def list_documents(
         self,
         skip: int = 0,
-        limit: int = 100
-    ) -> List[Document]:
-        """Liste tous les documents"""
-        
-        cursor = self.collection.find().skip(skip).limit(limit).sort("created_at", -1)
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> List[DocumentResponse]:
+        """
+        Liste les documents (champs de la liste uniquement, sans le contenu texte).
+        
+        Avec `cursor` (pagination par curseur), la page suivante est lue par
+        l'index (created_at, id) sans parcourir les pages précédentes; `skip`
+        reste accepté pour compatibilité.
+        """
+        query = keyset_filter(cursor)
+        documents_cursor = self.collection.find(query, DOCUMENT_LIST_PROJECTION).sort(KEYSET_SORT).limit(limit)
+        if skip and not cursor:
+            documents_cursor = documents_cursor.skip(skip)
         documents = []
         
-        async for document_dict in cursor:
-            documents.append(Document(**document_dict))
+        async for document_dict in documents_cursor:
+            documents.append(DocumentResponse(**document_dict))
             
         return documents
\ No newline at end of file
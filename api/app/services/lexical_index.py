@@ -0,0 +1,160 @@
+from typing import List, Dict, Tuple, Iterable, Optional, Callable, Any
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+
+# Un jeton est soit un mot, soit une référence juridique composée
+# (ex: "L1237-19", "20-22.210", "SAN-2023-012") conservée d'un seul tenant
+TOKEN_PATTERN = re.compile(r"\w+(?:[-./]\w+)*", re.UNICODE)
+
+# Mots vides français les plus fréquents (n'apportent rien au score BM25)
+STOPWORDS = {
+    "a", "au", "aux", "avec", "ce", "ces", "dans", "de", "des", "du", "elle",
+    "en", "et", "il", "ils", "la", "le", "les", "leur", "lui", "mais", "ne",
+    "ni", "ou", "par", "pas", "pour", "qu", "que", "qui", "sa", "se", "ses",
+    "son", "sur", "un", "une", "est", "sont", "l", "d", "s", "n", "y",
+}
+
+
+def _strip_accents(text: str) -> str:
+    """Supprime les accents pour rendre la recherche insensible aux diacritiques."""
+    normalized = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in normalized if not unicodedata.combining(c))
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Découpe un texte en jetons pour l'index lexical.
+
+    Les références composées sont indexées telles quelles ET par morceaux,
+    afin que "L1237-19" corresponde aussi bien à "L1237-19" qu'à "L1237".
+    """
+    if not text:
+        return []
+
+    tokens = []
+    for match in TOKEN_PATTERN.finditer(_strip_accents(text.lower())):
+        token = match.group(0)
+        if re.search(r"[-./]", token):
+            tokens.append(token)
+            tokens.extend(part for part in re.split(r"[-./]", token) if part)
+        elif token not in STOPWORDS:
+            tokens.append(token)
+    return tokens
+
+
+class BM25Index:
+    """Index inversé en mémoire avec un score BM25 (Okapi)."""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        # terme -> {doc_id: fréquence du terme}
+        self.postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        # doc_id -> longueur du document (en jetons)
+        self.doc_lengths: Dict[str, int] = {}
+        # doc_id -> termes distincts du document (retrait sans parcourir tout le vocabulaire)
+        self.doc_terms: Dict[str, List[str]] = {}
+        # doc_id -> métadonnées filtrables (type, juridiction, ...)
+        self.metadata: Dict[str, Dict[str, Any]] = {}
+        self.total_length = 0
+        # Version des données de la collection indexée (renseignée par le service)
+        self.data_version: Optional[Any] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self.doc_lengths
+
+    def add(self, doc_id: str, text: str, metadata: Optional[Dict[str, Any]] = None):
+        """Ajoute (ou remplace) un document dans l'index."""
+        with self._lock:
+            if doc_id in self.doc_lengths:
+                self._remove_unlocked(doc_id)
+
+            tokens = tokenize(text)
+            frequencies = Counter(tokens)
+            for term, freq in frequencies.items():
+                self.postings[term][doc_id] = freq
+            self.doc_terms[doc_id] = list(frequencies)
+            self.doc_lengths[doc_id] = len(tokens)
+            self.metadata[doc_id] = metadata or {}
+            self.total_length += len(tokens)
+
+    def add_many(self, documents: Iterable[Tuple[str, str, Optional[Dict[str, Any]]]]):
+        """Ajoute plusieurs triplets (doc_id, texte, métadonnées) dans l'index."""
+        for doc_id, text, metadata in documents:
+            self.add(doc_id, text, metadata)
+
+    def remove(self, doc_id: str):
+        """Retire un document de l'index."""
+        with self._lock:
+            self._remove_unlocked(doc_id)
+
+    def _remove_unlocked(self, doc_id: str):
+        length = self.doc_lengths.pop(doc_id, None)
+        if length is None:
+            return
+        self.metadata.pop(doc_id, None)
+        self.total_length -= length
+        for term in self.doc_terms.pop(doc_id, []):
+            postings = self.postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self.postings[term]
+
+    def search(
+        self,
+        query: str,
+        limit: int = 10,
+        where: Optional[Callable[[Dict[str, Any]], bool]] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Retourne les couples (doc_id, score BM25) triés par score décroissant.
+        Le prédicat `where` filtre les documents sur leurs métadonnées.
+        """
+        n_docs = len(self.doc_lengths)
+        if n_docs == 0:
+            return []
+
+        avg_length = self.total_length / n_docs
+        scores: Dict[str, float] = defaultdict(float)
+
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            df = len(postings)
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            for doc_id, freq in postings.items():
+                if where is not None and not where(self.metadata.get(doc_id, {})):
+                    continue
+                norm = 1 - self.b + self.b * self.doc_lengths[doc_id] / avg_length
+                scores[doc_id] += idf * freq * (self.k1 + 1) / (freq + self.k1 * norm)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        return ranked[:limit]
+
+
+def reciprocal_rank_fusion(
+    rankings: List[List[str]],
+    k: int = 60,
+    limit: Optional[int] = None
+) -> List[Tuple[str, float]]:
+    """
+    Fusionne plusieurs classements par Reciprocal Rank Fusion.
+
+    score(d) = somme sur chaque classement de 1 / (k + rang(d))
+    """
+    fused: Dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            fused[doc_id] += 1.0 / (k + rank)
+
+    ranked = sorted(fused.items(), key=lambda item: item[1], reverse=True)
+    return ranked[:limit] if limit is not None else ranked
@@ -0,0 +1,397 @@
+from typing import List, Optional, Dict, Any, Tuple, Iterable
+import os
+import json
+import sqlite3
+import threading
+import logging
+import numpy as np
+from qdrant_client.http import models
+
+logger = logging.getLogger(__name__)
+
+# Capacité initiale (en vecteurs) de la matrice mappée en mémoire
+INITIAL_CAPACITY = 1024
+
+
+class LocalCollection:
+    """
+    Collection vectorielle embarquée.
+
+    Les vecteurs (normalisés, float32) sont stockés dans une matrice contiguë
+    mappée en mémoire (`vectors.npy`), les payloads dans une table SQLite
+    annexe (`payloads.sqlite`). La recherche cosinus est un produit
+    matrice-vecteur suivi d'un `argpartition` pour le top-k.
+    """
+
+    def __init__(self, path: str, dim: Optional[int] = None):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._lock = threading.RLock()
+
+        self.db = sqlite3.connect(os.path.join(path, "payloads.sqlite"), check_same_thread=False)
+        self.db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS points (row INTEGER PRIMARY KEY, id TEXT UNIQUE, payload TEXT)"
+        )
+        self.db.commit()
+
+        stored_dim = self._get_meta("dim")
+        self.dim = int(stored_dim) if stored_dim else dim
+        if self.dim is None:
+            raise ValueError(f"Dimension inconnue pour la collection locale {path}")
+        self._set_meta("dim", str(self.dim))
+
+        # Chargement des payloads et des correspondances id <-> ligne; les lignes
+        # absentes de la table correspondent à des points supprimés
+        stored_count = self._get_meta("count")
+        self.count = int(stored_count) if stored_count else 0
+        self.row_ids: List[Any] = [None] * self.count
+        self.payloads: List[Dict[str, Any]] = [{} for _ in range(self.count)]
+        self.id_rows: Dict[Any, int] = {}
+        self.deleted_rows = set(range(self.count))
+        for row, point_id, payload in self.db.execute("SELECT row, id, payload FROM points ORDER BY row"):
+            point_id = json.loads(point_id)
+            self.row_ids[row] = point_id
+            self.id_rows[point_id] = row
+            self.payloads[row] = json.loads(payload)
+            self.deleted_rows.discard(row)
+
+        self.vectors = self._open_matrix(max(INITIAL_CAPACITY, self.count))
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str):
+        self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+        self.db.commit()
+
+    def _open_matrix(self, capacity: int) -> np.ndarray:
+        """Ouvre (ou agrandit) la matrice mappée en mémoire."""
+        matrix_path = os.path.join(self.path, "vectors.npy")
+        if os.path.exists(matrix_path):
+            current = np.load(matrix_path, mmap_mode="r+")
+            if current.shape[0] >= capacity:
+                return current
+            # Agrandir: copie dans un nouveau fichier puis remplacement atomique
+            tmp_path = matrix_path + ".tmp"
+            grown = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float32, shape=(capacity, self.dim))
+            grown[:current.shape[0]] = current
+            grown.flush()
+            del current, grown
+            os.replace(tmp_path, matrix_path)
+            return np.load(matrix_path, mmap_mode="r+")
+        return np.lib.format.open_memmap(matrix_path, mode="w+", dtype=np.float32, shape=(capacity, self.dim))
+
+    def upsert(self, points: Iterable[Tuple[Any, List[float], Optional[Dict[str, Any]]]]):
+        """Insère ou remplace des points (id, vecteur, payload)."""
+        with self._lock:
+            rows = []
+            for point_id, vector, payload in points:
+                vector = np.asarray(vector, dtype=np.float32)
+                norm = np.linalg.norm(vector)
+                if norm > 0:
+                    vector = vector / norm
+
+                row = self.id_rows.get(point_id)
+                if row is None:
+                    if self.count >= self.vectors.shape[0]:
+                        self.vectors.flush()
+                        self.vectors = self._open_matrix(self.vectors.shape[0] * 2)
+                    row = self.count
+                    self.count += 1
+                    self.row_ids.append(point_id)
+                    self.payloads.append({})
+                    self.id_rows[point_id] = row
+
+                self.vectors[row] = vector
+                self.payloads[row] = payload or {}
+                rows.append((row, json.dumps(point_id), json.dumps(payload or {}, ensure_ascii=False)))
+
+            self.vectors.flush()
+            self.db.executemany("INSERT OR REPLACE INTO points (row, id, payload) VALUES (?, ?, ?)", rows)
+            self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('count', ?)", (str(self.count),))
+            self.db.commit()
+
+    def delete(self, point_ids: Iterable[Any]):
+        """Supprime des points (la ligne devient inutilisée dans la matrice)."""
+        with self._lock:
+            rows = []
+            for point_id in point_ids:
+                row = self.id_rows.pop(point_id, None)
+                if row is None:
+                    continue
+                self.deleted_rows.add(row)
+                self.payloads[row] = {}
+                rows.append((row,))
+            self.db.executemany("DELETE FROM points WHERE row = ?", rows)
+            self.db.commit()
+
+    def set_payload(self, point_ids: Iterable[Any], payload: Dict[str, Any]):
+        """Fusionne `payload` dans le payload existant des points."""
+        with self._lock:
+            rows = []
+            for point_id in point_ids:
+                row = self.id_rows.get(point_id)
+                if row is None:
+                    continue
+                self.payloads[row] = {**self.payloads[row], **payload}
+                rows.append((json.dumps(self.payloads[row], ensure_ascii=False), row))
+            self.db.executemany("UPDATE points SET payload = ? WHERE row = ?", rows)
+            self.db.commit()
+
+    def alive_rows(self) -> Iterable[int]:
+        return (row for row in range(self.count) if row not in self.deleted_rows)
+
+    def search(self, query_vector: List[float], limit: int, mask: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """Top-k cosinus vectorisé; `mask` restreint les lignes candidates."""
+        if self.count == 0 or limit <= 0:
+            return []
+
+        query = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+
+        scores = self.vectors[:self.count] @ query
+        if self.deleted_rows:
+            alive = np.ones(self.count, dtype=bool)
+            alive[list(self.deleted_rows)] = False
+            mask = alive if mask is None else (mask & alive)
+        if mask is not None:
+            scores = np.where(mask, scores, -np.inf)
+            available = int(mask.sum())
+        else:
+            available = self.count
+        k = min(limit, available)
+        if k == 0:
+            return []
+
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(row), float(scores[row])) for row in top]
+
+
+def _condition_matches(payload: Dict[str, Any], point_id: Any, condition: Any) -> bool:
+    """Évalue une condition de filtre Qdrant sur un payload."""
+    if isinstance(condition, models.Filter):
+        return filter_matches(payload, point_id, condition)
+    if isinstance(condition, models.IsEmptyCondition):
+        value = payload.get(condition.is_empty.key)
+        return value is None or value == []
+    if isinstance(condition, models.HasIdCondition):
+        return point_id in condition.has_id or str(point_id) in condition.has_id
+    if isinstance(condition, models.FieldCondition):
+        value = payload.get(condition.key)
+        if condition.match is not None:
+            values = value if isinstance(value, list) else [value]
+            if isinstance(condition.match, models.MatchValue):
+                return condition.match.value in values
+            if isinstance(condition.match, models.MatchAny):
+                return any(v in condition.match.any for v in values)
+            return False
+        if condition.range is not None:
+            if value is None:
+                return False
+            r = condition.range
+            return (
+                (r.gte is None or value >= r.gte) and (r.gt is None or value > r.gt)
+                and (r.lte is None or value <= r.lte) and (r.lt is None or value < r.lt)
+            )
+    logger.warning(f"Condition de filtre non supportée par l'index local: {type(condition).__name__}")
+    return False
+
+
+def filter_matches(payload: Dict[str, Any], point_id: Any, query_filter: Optional[models.Filter]) -> bool:
+    """Évalue un filtre Qdrant (must / should / must_not) sur un payload."""
+    if query_filter is None:
+        return True
+    if query_filter.must and not all(_condition_matches(payload, point_id, c) for c in query_filter.must):
+        return False
+    if query_filter.should and not any(_condition_matches(payload, point_id, c) for c in query_filter.should):
+        return False
+    if query_filter.must_not and any(_condition_matches(payload, point_id, c) for c in query_filter.must_not):
+        return False
+    return True
+
+
+class LocalVectorClient:
+    """
+    Sous-ensemble de l'API de QdrantClient utilisé par VectorService, servi par
+    des collections embarquées (NumPy + SQLite). Sert aux tests, aux petits
+    déploiements et de repli en cas d'indisponibilité de Qdrant.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._collections: Dict[str, LocalCollection] = {}
+        self._lock = threading.Lock()
+
+    def _collection(self, collection_name: str, dim: Optional[int] = None) -> LocalCollection:
+        with self._lock:
+            collection = self._collections.get(collection_name)
+            if collection is None:
+                path = os.path.join(self.root, collection_name)
+                if dim is None and not os.path.exists(path):
+                    raise ValueError(f"Collection locale inexistante: {collection_name}")
+                collection = LocalCollection(path, dim)
+                self._collections[collection_name] = collection
+            return collection
+
+    def get_collections(self) -> models.CollectionsResponse:
+        names = [
+            name for name in sorted(os.listdir(self.root))
+            if os.path.isdir(os.path.join(self.root, name))
+        ]
+        return models.CollectionsResponse(
+            collections=[models.CollectionDescription(name=name) for name in names]
+        )
+
+    def create_collection(self, collection_name: str, vectors_config: models.VectorParams, **kwargs):
+        self._collection(collection_name, vectors_config.size)
+        return True
+
+    def recreate_collection(self, collection_name: str, vectors_config: models.VectorParams, **kwargs):
+        self.delete_collection(collection_name)
+        return self.create_collection(collection_name, vectors_config, **kwargs)
+
+    def delete_collection(self, collection_name: str):
+        import shutil
+        with self._lock:
+            self._collections.pop(collection_name, None)
+        shutil.rmtree(os.path.join(self.root, collection_name), ignore_errors=True)
+        return True
+
+    def create_payload_index(self, collection_name: str, field_name: str, field_schema: Any = None, **kwargs):
+        # Le filtrage local parcourt les payloads en mémoire: aucun index nécessaire
+        return None
+
+    def upsert(self, collection_name: str, points: List[models.PointStruct], **kwargs):
+        self._collection(collection_name).upsert(
+            (point.id, point.vector, point.payload) for point in points
+        )
+
+    def upload_collection(self, collection_name: str, vectors, ids=None, payload=None, batch_size: int = 1024, **kwargs):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        ids = list(ids) if ids is not None else list(range(len(vectors)))
+        payloads = list(payload) if payload is not None else [None] * len(vectors)
+        collection = self._collection(collection_name)
+        for start in range(0, len(vectors), batch_size):
+            end = start + batch_size
+            collection.upsert(zip(ids[start:end], vectors[start:end], payloads[start:end]))
+
+    def _selected_ids(self, collection: LocalCollection, points_selector: Any) -> List[Any]:
+        """IDs désignés par un sélecteur Qdrant (filtre ou liste d'IDs)."""
+        if isinstance(points_selector, models.FilterSelector):
+            points_selector = points_selector.filter
+        if isinstance(points_selector, models.Filter):
+            return [
+                collection.row_ids[row] for row in collection.alive_rows()
+                if filter_matches(collection.payloads[row], collection.row_ids[row], points_selector)
+            ]
+        if isinstance(points_selector, models.PointIdsList):
+            return points_selector.points
+        return list(points_selector)
+
+    def delete(self, collection_name: str, points_selector: Any, **kwargs):
+        """Supprime des points par liste d'IDs ou par filtre."""
+        collection = self._collection(collection_name)
+        collection.delete(self._selected_ids(collection, points_selector))
+
+    def set_payload(self, collection_name: str, payload: Dict[str, Any], points: Any, **kwargs):
+        """Met à jour le payload des points désignés par IDs ou par filtre."""
+        collection = self._collection(collection_name)
+        collection.set_payload(self._selected_ids(collection, points), payload)
+
+    def count(self, collection_name: str, count_filter: Optional[models.Filter] = None, **kwargs) -> models.CountResult:
+        collection = self._collection(collection_name)
+        total = sum(
+            1 for row in collection.alive_rows()
+            if filter_matches(collection.payloads[row], collection.row_ids[row], count_filter)
+        )
+        return models.CountResult(count=total)
+
+    def _record(self, collection: LocalCollection, row: int, with_payload: bool, with_vectors: bool) -> models.Record:
+        return models.Record(
+            id=collection.row_ids[row],
+            payload=collection.payloads[row] if with_payload else None,
+            vector=collection.vectors[row].tolist() if with_vectors else None
+        )
+
+    def retrieve(self, collection_name: str, ids: List[Any], with_payload: bool = True, with_vectors: bool = False, **kwargs) -> List[models.Record]:
+        collection = self._collection(collection_name)
+        records = []
+        for point_id in ids:
+            row = collection.id_rows.get(point_id)
+            if row is not None:
+                records.append(self._record(collection, row, with_payload, with_vectors))
+        return records
+
+    def scroll(
+        self,
+        collection_name: str,
+        scroll_filter: Optional[models.Filter] = None,
+        limit: int = 10,
+        offset: Optional[int] = None,
+        with_payload: bool = True,
+        with_vectors: bool = False,
+        **kwargs
+    ) -> Tuple[List[models.Record], Optional[int]]:
+        collection = self._collection(collection_name)
+        row = offset or 0
+        records = []
+        while row < collection.count and len(records) < limit:
+            if row not in collection.deleted_rows and filter_matches(collection.payloads[row], collection.row_ids[row], scroll_filter):
+                records.append(self._record(collection, row, with_payload, with_vectors))
+            row += 1
+        next_offset = row if row < collection.count else None
+        return records, next_offset
+
+    def search(
+        self,
+        collection_name: str,
+        query_vector: List[float],
+        query_filter: Optional[models.Filter] = None,
+        search_params: Optional[models.SearchParams] = None,
+        limit: int = 10,
+        with_payload: bool = True,
+        with_vectors: bool = False,
+        **kwargs
+    ) -> List[models.ScoredPoint]:
+        collection = self._collection(collection_name)
+        mask = None
+        if query_filter is not None:
+            mask = np.fromiter(
+                (
+                    filter_matches(collection.payloads[row], collection.row_ids[row], query_filter)
+                    for row in range(collection.count)
+                ),
+                dtype=bool,
+                count=collection.count
+            )
+
+        return [
+            models.ScoredPoint(
+                id=collection.row_ids[row],
+                version=0,
+                score=score,
+                payload=collection.payloads[row] if with_payload else None,
+                vector=collection.vectors[row].tolist() if with_vectors else None
+            )
+            for row, score in collection.search(query_vector, limit, mask)
+        ]
+
+
+# Clients locaux partagés par répertoire (les collections restent chargées entre les requêtes)
+_local_clients: Dict[str, LocalVectorClient] = {}
+
+
+def get_local_vector_client(root: Optional[str] = None) -> LocalVectorClient:
+    """Retourne le client local partagé pour un répertoire de stockage."""
+    root = root or os.getenv("LOCAL_VECTOR_DIR", "/app/data/vector_index")
+    client = _local_clients.get(root)
+    if client is None:
+        client = LocalVectorClient(root)
+        _local_clients[root] = client
+    return client
@@ -0,0 +1,65 @@
+import os
+import logging
+from typing import Optional
+
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+
+logger = logging.getLogger(__name__)
+
+# Client partagé par tout le processus: un seul pool de connexions, ouvert par le
+# lifespan de l'application (ou au premier usage hors API: scripts, tâches)
+_client: Optional[AsyncIOMotorClient] = None
+
+
+def mongodb_database_name() -> str:
+    return os.getenv("MONGODB_DB", "legal_analyzer")
+
+
+def create_mongo_client(**options) -> AsyncIOMotorClient:
+    """
+    Crée un client MongoDB à partir de MONGODB_USER, MONGODB_PASSWORD,
+    MONGODB_HOST et MONGODB_PORT, avec un pool et des délais configurables.
+    Les `options` supplémentaires sont transmises au client (ex: event_listeners).
+    """
+    mongodb_user = os.getenv("MONGODB_USER", "admin")
+    mongodb_password = os.getenv("MONGODB_PASSWORD", "password_securise")
+    mongodb_host = os.getenv("MONGODB_HOST", "mongodb")
+    mongodb_port = os.getenv("MONGODB_PORT", "27017")
+    mongodb_db = mongodb_database_name()
+
+    # Construire l'URI avec authentification
+    mongodb_uri = f"mongodb://{mongodb_user}:{mongodb_password}@{mongodb_host}:{mongodb_port}/{mongodb_db}?authSource=admin"
+
+    return AsyncIOMotorClient(
+        mongodb_uri,
+        maxPoolSize=int(os.getenv("MONGODB_MAX_POOL_SIZE", "50")),
+        minPoolSize=int(os.getenv("MONGODB_MIN_POOL_SIZE", "0")),
+        maxIdleTimeMS=int(os.getenv("MONGODB_MAX_IDLE_TIME_MS", "300000")),
+        waitQueueTimeoutMS=int(os.getenv("MONGODB_WAIT_QUEUE_TIMEOUT_MS", "10000")),
+        serverSelectionTimeoutMS=int(os.getenv("MONGODB_SERVER_SELECTION_TIMEOUT_MS", "5000")),
+        connectTimeoutMS=int(os.getenv("MONGODB_CONNECT_TIMEOUT_MS", "5000")),
+        socketTimeoutMS=int(os.getenv("MONGODB_SOCKET_TIMEOUT_MS", "30000")),
+        **options
+    )
+
+
+def get_mongo_client() -> AsyncIOMotorClient:
+    """Client MongoDB partagé, créé au premier appel s'il n'a pas été ouvert par le lifespan."""
+    global _client
+    if _client is None:
+        _client = create_mongo_client()
+        logger.info("Client MongoDB partagé créé")
+    return _client
+
+
+def get_mongo_database(client: Optional[AsyncIOMotorClient] = None) -> AsyncIOMotorDatabase:
+    return (client or get_mongo_client())[mongodb_database_name()]
+
+
+def close_mongo_client():
+    """Ferme le pool de connexions partagé (arrêt de l'application)."""
+    global _client
+    if _client is not None:
+        _client.close()
+        _client = None
+        logger.info("Client MongoDB partagé fermé")
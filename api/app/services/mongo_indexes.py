@@ -0,0 +1,123 @@
+from typing import List, Dict, Any, Optional
+from datetime import datetime
+import logging
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+from app.services.pagination import KEYSET_SORT, keyset_filter, encode_cursor
+
+logger = logging.getLogger(__name__)
+
+# Curseur d'exemple pour contrôler le plan d'une page profonde
+_SAMPLE_CURSOR = encode_cursor(datetime(2025, 1, 1), "_")
+
+# Index de chaque collection: recherche par ID (unique), listes triées par date (pagination par curseur),
+# filtres par statut, analyses d'un document, documents par empreinte du contenu, blobs orphelins
+MONGO_INDEXES: Dict[str, List[IndexModel]] = {
+    "documents": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel(KEYSET_SORT, name="created_at_desc_id_desc"),
+        IndexModel([("status", ASCENDING)], name="status"),
+        IndexModel([("content_hash", ASCENDING)], name="content_hash", sparse=True),
+    ],
+    "analyses": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel(KEYSET_SORT, name="created_at_desc_id_desc"),
+        IndexModel([("status", ASCENDING)], name="status"),
+        IndexModel([("document_id", ASCENDING)], name="document_id"),
+    ],
+    "analysis_results": [
+        IndexModel([("analysis_id", ASCENDING)], name="analysis_id_unique", unique=True),
+    ],
+    "blobs": [
+        IndexModel([("orphaned_at", ASCENDING)], name="orphaned_at", sparse=True),
+    ],
+}
+
+# Formes des requêtes émises par les services (filtre, tri), contrôlées par
+# explain: aucune ne doit parcourir toute la collection (COLLSCAN)
+QUERY_SHAPES: List[Dict[str, Any]] = [
+    {"collection": "documents", "name": "get_document", "filter": {"id": "_"}},
+    {"collection": "documents", "name": "list_documents", "filter": {}, "sort": KEYSET_SORT, "limit": 100},
+    {"collection": "documents", "name": "list_documents_after_cursor", "filter": keyset_filter(_SAMPLE_CURSOR), "sort": KEYSET_SORT, "limit": 100},
+    {"collection": "documents", "name": "documents_by_status", "filter": {"status": "pending"}},
+    {"collection": "documents", "name": "find_by_content_hash", "filter": {"content_hash": "_"}, "sort": [("created_at", DESCENDING)], "limit": 1},
+    {"collection": "analyses", "name": "get_analysis", "filter": {"id": "_"}},
+    {"collection": "analyses", "name": "get_history", "filter": {}, "sort": KEYSET_SORT, "limit": 10},
+    {"collection": "analyses", "name": "get_history_after_cursor", "filter": keyset_filter(_SAMPLE_CURSOR), "sort": KEYSET_SORT, "limit": 10},
+    {"collection": "analyses", "name": "analyses_by_status", "filter": {"status": "in_progress"}},
+    {"collection": "analyses", "name": "analyses_of_document", "filter": {"document_id": "_"}},
+    {"collection": "analysis_results", "name": "get_analysis_results", "filter": {"analysis_id": "_"}},
+    {"collection": "blobs", "name": "orphaned_blobs", "filter": {"orphaned_at": {"$lt": datetime(2025, 1, 1)}, "refcount": {"$lte": 0}}, "limit": 100},
+]
+
+
+async def ensure_indexes(db: AsyncIOMotorDatabase) -> Dict[str, List[str]]:
+    """
+    Crée les index manquants (opération idempotente). Une collection en échec
+    (ex: IDs déjà dupliqués empêchant l'index unique) est journalisée sans
+    bloquer les autres.
+    """
+    created = {}
+    for collection_name, indexes in MONGO_INDEXES.items():
+        try:
+            created[collection_name] = await db[collection_name].create_indexes(indexes)
+        except Exception as e:
+            logger.error(f"Création des index de {collection_name} impossible: {str(e)}")
+    logger.info(f"Index MongoDB vérifiés: {created}")
+    return created
+
+
+def _plan_stages(plan: Dict[str, Any]) -> List[str]:
+    """Étapes d'un plan d'exécution (stage et ses sous-plans)."""
+    stages = [plan.get("stage", "")]
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            stages.extend(_plan_stages(plan[key]))
+    for child in plan.get("inputStages", []):
+        stages.extend(_plan_stages(child))
+    return stages
+
+
+async def explain_query(
+    db: AsyncIOMotorDatabase,
+    collection: str,
+    filter: Dict[str, Any],
+    sort: Optional[List] = None,
+    limit: int = 0
+) -> Dict[str, Any]:
+    """Plan retenu par MongoDB pour une forme de requête."""
+    cursor = db[collection].find(filter)
+    if sort:
+        cursor = cursor.sort(sort)
+    if limit:
+        cursor = cursor.limit(limit)
+    explain = await cursor.explain()
+    winning_plan = explain.get("queryPlanner", {}).get("winningPlan", {})
+    stages = _plan_stages(winning_plan)
+    return {
+        "collection": collection,
+        "stages": stages,
+        "collscan": "COLLSCAN" in stages,
+        "index": next(_index_names(winning_plan), None)
+    }
+
+
+def _index_names(plan: Dict[str, Any]):
+    if "indexName" in plan:
+        yield plan["indexName"]
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            yield from _index_names(plan[key])
+    for child in plan.get("inputStages", []):
+        yield from _index_names(child)
+
+
+async def audit_query_shapes(db: AsyncIOMotorDatabase) -> List[Dict[str, Any]]:
+    """Plan d'exécution de chaque forme de requête des services."""
+    results = []
+    for shape in QUERY_SHAPES:
+        plan = await explain_query(db, shape["collection"], shape["filter"], shape.get("sort"), shape.get("limit", 0))
+        results.append({"name": shape["name"], **plan})
+    return results
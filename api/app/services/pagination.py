@@ -0,0 +1,49 @@
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime
+import json
+import base64
+
+from pymongo import DESCENDING
+
+# Ordre des listes (historique des analyses, documents): du plus récent au plus
+# ancien, l'ID départageant les créations simultanées. Cet ordre est total,
+# ce qui permet la pagination par curseur (keyset).
+KEYSET_SORT: List[Tuple[str, int]] = [("created_at", DESCENDING), ("id", DESCENDING)]
+
+# En-tête de réponse portant le curseur de la page suivante
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(created_at: datetime, item_id: str) -> str:
+    """Curseur opaque désignant la position juste après un élément."""
+    payload = json.dumps({"c": created_at.isoformat(), "i": item_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Position (created_at, id) d'un curseur; ValueError s'il est invalide."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload["c"]), str(payload["i"])
+    except Exception as e:
+        raise ValueError(f"Curseur de pagination invalide: {cursor}") from e
+
+
+def keyset_filter(cursor: Optional[str]) -> Dict[str, Any]:
+    """Filtre MongoDB des éléments situés après le curseur (tous si aucun curseur)."""
+    if not cursor:
+        return {}
+    created_at, item_id = decode_cursor(cursor)
+    return {"$or": [
+        {"created_at": {"$lt": created_at}},
+        {"created_at": created_at, "id": {"$lt": item_id}},
+    ]}
+
+
+def next_cursor(items: List[Any], limit: int) -> Optional[str]:
+    """Curseur de la page suivante, ou None si la page est la dernière."""
+    if not items or len(items) < limit:
+        return None
+    last = items[-1]
+    return encode_cursor(last.created_at, last.id)
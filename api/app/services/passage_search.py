@@ -0,0 +1,91 @@
+from typing import List, Iterable, Any, Optional
+import re
+import numpy as np
+
+# Découpage en mots (la ponctuation reste attachée au mot précédent)
+WORD_PATTERN = re.compile(r"\S+")
+
+
+def split_passages(text: str, passage_words: int = 200, overlap_words: int = 50) -> List[str]:
+    """
+    Découpe un texte long en passages de `passage_words` mots qui se
+    chevauchent de `overlap_words` mots. Un texte court donne un seul passage.
+    """
+    words = WORD_PATTERN.findall(text or "")
+    if len(words) <= passage_words:
+        return [text or ""]
+
+    step = max(1, passage_words - overlap_words)
+    passages = []
+    for start in range(0, len(words), step):
+        passages.append(" ".join(words[start:start + passage_words]))
+        if start + passage_words >= len(words):
+            break
+    return passages
+
+
+def group_by_parent(hits: Iterable[Any], parent_of) -> List[Any]:
+    """
+    Ne garde que le meilleur passage de chaque document parent.
+
+    `hits` est supposé trié par score décroissant (ordre renvoyé par Qdrant);
+    l'ordre des parents suit celui de leur meilleur passage.
+    """
+    seen = set()
+    grouped = []
+    for hit in hits:
+        parent_id = parent_of(hit)
+        if parent_id in seen:
+            continue
+        seen.add(parent_id)
+        grouped.append(hit)
+    return grouped
+
+
+def maximal_marginal_relevance(
+    query_vector: List[float],
+    candidate_vectors: List[List[float]],
+    limit: int,
+    lambda_mult: float = 0.7,
+    relevance: Optional[List[float]] = None
+) -> List[int]:
+    """
+    Sélection MMR: à chaque étape, le candidat qui maximise
+    lambda * pertinence - (1 - lambda) * similarité max aux candidats déjà retenus.
+
+    La pertinence est la similarité cosinus à la requête, sauf si `relevance`
+    est fourni (ex: score de fusion RRF). Renvoie les indices retenus, dans l'ordre.
+    """
+    if not candidate_vectors or limit <= 0:
+        return []
+
+    vectors = np.asarray(candidate_vectors, dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True).clip(min=1e-12)
+
+    if relevance is None:
+        query = np.asarray(query_vector, dtype=np.float32)
+        query /= max(float(np.linalg.norm(query)), 1e-12)
+        scores = vectors @ query
+    else:
+        scores = np.asarray(relevance, dtype=np.float32)
+        top = float(scores.max())
+        if top > 0:
+            scores = scores / top
+
+    # Similarités entre candidats, calculées en une seule multiplication matricielle
+    pairwise = vectors @ vectors.T
+    redundancy = np.full(len(vectors), -np.inf, dtype=np.float32)
+    available = np.ones(len(vectors), dtype=bool)
+
+    selected = []
+    for _ in range(min(limit, len(vectors))):
+        if selected:
+            mmr = lambda_mult * scores - (1.0 - lambda_mult) * redundancy
+        else:
+            mmr = scores.copy()
+        mmr[~available] = -np.inf
+        best = int(np.argmax(mmr))
+        selected.append(best)
+        available[best] = False
+        redundancy = np.maximum(redundancy, pairwise[best])
+    return selected
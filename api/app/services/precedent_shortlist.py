@@ -0,0 +1,114 @@
+from typing import List, Dict, Any, Optional, Tuple
+import threading
+import numpy as np
+
+# Clé d'une liste restreinte: (type de document, type de clause)
+ShortlistKey = Tuple[str, str]
+
+
+def _normalize(vector: Any) -> np.ndarray:
+    array = np.asarray(vector, dtype=np.float32)
+    return array / max(float(np.linalg.norm(array)), 1e-12)
+
+
+class PrecedentShortlist:
+    """
+    Liste restreinte de passages de précédents pour un couple (type de document,
+    type de clause): les `size` passages les plus proches du centroïde du
+    couple, gardés en mémoire sous forme de matrice normalisée pour une
+    recherche exacte par simple produit matriciel.
+    """
+
+    def __init__(self, centroid: List[float], size: int = 200):
+        self.size = size
+        self.centroid = _normalize(centroid)
+        self.queries = 1
+        self.queries_since_build = 0
+        # ID de point -> (payload, vecteur normalisé, similarité au centroïde)
+        self.members: Dict[str, Tuple[Dict[str, Any], np.ndarray, float]] = {}
+        self._ids: List[str] = []
+        self._matrix: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.members)
+
+    def observe(self, query_vector: List[float]):
+        """Fait glisser le centroïde vers une requête reçue pour ce couple (moyenne courante)."""
+        with self._lock:
+            self.queries += 1
+            self.queries_since_build += 1
+            self.centroid = _normalize(self.centroid + (_normalize(query_vector) - self.centroid) / self.queries)
+
+    def consider(self, point_id: str, payload: Dict[str, Any], vector: List[float]) -> bool:
+        """
+        Ajoute un passage s'il est plus proche du centroïde que le membre le plus
+        éloigné (ou si la liste n'est pas pleine). Renvoie True s'il est retenu.
+        """
+        normalized = _normalize(vector)
+        similarity = float(normalized @ self.centroid)
+        with self._lock:
+            if point_id not in self.members and len(self.members) >= self.size:
+                weakest = min(self.members, key=lambda member: self.members[member][2])
+                if self.members[weakest][2] >= similarity:
+                    return False
+                del self.members[weakest]
+            self.members[point_id] = (payload, normalized, similarity)
+            self._matrix = None
+            return True
+
+    def search(self, query_vector: List[float], limit: int) -> List[Tuple[str, float, Dict[str, Any], List[float]]]:
+        """Les `limit` passages les plus proches de la requête: (ID, cosinus, payload, vecteur)."""
+        with self._lock:
+            if self._matrix is None:
+                self._ids = list(self.members)
+                self._matrix = (
+                    np.stack([self.members[point_id][1] for point_id in self._ids])
+                    if self._ids else np.empty((0, len(self.centroid)), dtype=np.float32)
+                )
+            ids, matrix = self._ids, self._matrix
+            members = self.members
+
+        if not ids:
+            return []
+        scores = matrix @ _normalize(query_vector)
+        count = min(limit, len(ids))
+        top = np.argpartition(-scores, count - 1)[:count]
+        top = top[np.argsort(-scores[top])]
+        return [
+            (ids[i], float(scores[i]), members[ids[i]][0], matrix[i].tolist())
+            for i in top
+            if ids[i] in members
+        ]
+
+
+class ShortlistIndex:
+    """Listes restreintes d'une collection, par couple (type de document, type de clause)."""
+
+    def __init__(self, size: int = 200):
+        self.size = size
+        self.shortlists: Dict[ShortlistKey, PrecedentShortlist] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: ShortlistKey) -> Optional[PrecedentShortlist]:
+        return self.shortlists.get(key)
+
+    def set(self, key: ShortlistKey, shortlist: PrecedentShortlist):
+        with self._lock:
+            self.shortlists[key] = shortlist
+
+    def add_points(self, points: List[Tuple[str, Dict[str, Any], List[float]]]):
+        """
+        Mise à jour incrémentale après l'ajout d'un précédent: chacun de ses
+        passages est proposé aux listes des types de documents auxquels il s'applique.
+        """
+        with self._lock:
+            shortlists = list(self.shortlists.items())
+        for (document_type, _), shortlist in shortlists:
+            for point_id, payload, vector in points:
+                # Un précédent sans types de documents déclarés s'applique à tous les types,
+                # et une liste sans type de document (recherche non filtrée) accepte tous les précédents
+                document_types = payload.get("document_types") or []
+                if document_type and document_types and document_type not in document_types:
+                    continue
+                shortlist.consider(point_id, payload, vector)
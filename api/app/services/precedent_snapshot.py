@@ -0,0 +1,104 @@
+from typing import List, Dict, Any, Iterator, Tuple
+import os
+import json
+import hashlib
+import logging
+from datetime import datetime
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Version du format de l'artefact (manifest.json + vectors.npy + payloads.jsonl)
+SNAPSHOT_FORMAT_VERSION = 1
+
+MANIFEST_FILE = "manifest.json"
+VECTORS_FILE = "vectors.npy"
+PAYLOADS_FILE = "payloads.jsonl"
+
+DEFAULT_SNAPSHOT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "precedent_snapshot")
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_snapshot(
+    path: str,
+    ids: List[str],
+    vectors: np.ndarray,
+    payloads: List[Dict[str, Any]],
+    embedding_model: str,
+    **metadata
+) -> Dict[str, Any]:
+    """
+    Écrit un artefact de précédents pré-vectorisés: matrice float32 (.npy),
+    payloads (une ligne JSON par point, dans le même ordre) et manifeste.
+    """
+    if not (len(ids) == len(payloads) == vectors.shape[0]):
+        raise ValueError("Nombre de points incohérent entre IDs, vecteurs et payloads")
+
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, VECTORS_FILE), np.ascontiguousarray(vectors, dtype=np.float32))
+    with open(os.path.join(path, PAYLOADS_FILE), "w", encoding="utf-8") as f:
+        for point_id, payload in zip(ids, payloads):
+            f.write(json.dumps({"id": point_id, "payload": payload}, ensure_ascii=False) + "\n")
+
+    manifest = {
+        "format_version": SNAPSHOT_FORMAT_VERSION,
+        "embedding_model": embedding_model,
+        "dimension": int(vectors.shape[1]),
+        "points": len(ids),
+        "created_at": datetime.now().isoformat(),
+        "vectors_sha256": file_sha256(os.path.join(path, VECTORS_FILE)),
+        "payloads_sha256": file_sha256(os.path.join(path, PAYLOADS_FILE)),
+        **metadata
+    }
+    with open(os.path.join(path, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
+
+
+def read_manifest(path: str) -> Dict[str, Any]:
+    with open(os.path.join(path, MANIFEST_FILE), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+        raise ValueError(f"Format d'artefact non supporté: {manifest.get('format_version')}")
+    return manifest
+
+
+def snapshot_exists(path: str) -> bool:
+    return all(os.path.exists(os.path.join(path, name)) for name in (MANIFEST_FILE, VECTORS_FILE, PAYLOADS_FILE))
+
+
+def read_snapshot(path: str, verify: bool = True) -> Tuple[Dict[str, Any], np.ndarray, List[str], Iterator[Dict[str, Any]]]:
+    """
+    Ouvre un artefact: (manifeste, vecteurs mappés en mémoire, IDs, itérateur de payloads).
+    Avec `verify`, les empreintes SHA-256 du manifeste sont contrôlées.
+    """
+    manifest = read_manifest(path)
+    vectors_path = os.path.join(path, VECTORS_FILE)
+    payloads_path = os.path.join(path, PAYLOADS_FILE)
+    if verify:
+        for file_path, key in ((vectors_path, "vectors_sha256"), (payloads_path, "payloads_sha256")):
+            if file_sha256(file_path) != manifest[key]:
+                raise ValueError(f"Artefact corrompu: empreinte invalide pour {os.path.basename(file_path)}")
+
+    vectors = np.load(vectors_path, mmap_mode="r")
+    if vectors.shape != (manifest["points"], manifest["dimension"]):
+        raise ValueError(f"Artefact incohérent: matrice {vectors.shape} pour {manifest['points']} points")
+
+    ids = []
+    with open(payloads_path, "r", encoding="utf-8") as f:
+        for line in f:
+            ids.append(json.loads(line)["id"])
+
+    def payloads() -> Iterator[Dict[str, Any]]:
+        with open(payloads_path, "r", encoding="utf-8") as f:
+            for line in f:
+                yield json.loads(line)["payload"]
+
+    return manifest, vectors, ids, payloads()
@@ -0,0 +1,122 @@
+from typing import Dict, Set, Optional, Any, AsyncIterator
+from contextlib import asynccontextmanager
+import os
+import json
+import asyncio
+import logging
+
+from app.services.redis_client import create_async_redis_client
+
+logger = logging.getLogger(__name__)
+
+# Motif des canaux publiés par le ProgressReporter (analysis:{id}:events)
+EVENTS_PATTERN = "analysis:*:events"
+
+
+class ProgressEventHub:
+    """
+    Diffusion des événements de progression aux clients abonnés (SSE).
+
+    Un seul abonnement Redis (PSUBSCRIBE sur tous les canaux d'analyse) par
+    processus, quel que soit le nombre de clients: chaque message est recopié
+    dans la file des clients qui suivent l'analyse concernée. Une file pleine
+    (client trop lent) perd ses événements les plus anciens: seul le dernier
+    état compte.
+    """
+
+    def __init__(self, redis_client=None, queue_size: Optional[int] = None):
+        self.redis = redis_client
+        self.queue_size = queue_size if queue_size is not None else int(os.getenv("PROGRESS_EVENTS_QUEUE_SIZE", "32"))
+        self._watchers: Dict[str, Set[asyncio.Queue]] = {}
+        self._pubsub = None
+        self._reader: Optional[asyncio.Task] = None
+        self._start_lock = asyncio.Lock()
+
+    @property
+    def watcher_count(self) -> int:
+        return sum(len(queues) for queues in self._watchers.values())
+
+    async def start(self):
+        """Ouvre l'abonnement Redis au premier client (pas de connexion si personne n'écoute)."""
+        if self._reader is not None and not self._reader.done():
+            return
+        async with self._start_lock:
+            if self._reader is not None and not self._reader.done():
+                return
+            if self.redis is None:
+                self.redis = create_async_redis_client()
+            self._pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+            await self._pubsub.psubscribe(EVENTS_PATTERN)
+            self._reader = asyncio.create_task(self._read())
+            logger.info(f"Abonnement aux événements d'analyse ouvert ({EVENTS_PATTERN})")
+
+    async def _read(self):
+        """Lit les messages Redis et les distribue aux files des clients."""
+        while True:
+            try:
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=None)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # La connexion est rétablie (et l'abonnement renouvelé) à la lecture suivante
+                logger.error(f"Lecture des événements d'analyse impossible: {str(e)}")
+                await asyncio.sleep(1.0)
+                continue
+            if not message or message.get("type") != "pmessage":
+                continue
+
+            channel = message["channel"]
+            channel = channel.decode() if isinstance(channel, bytes) else channel
+            queues = self._watchers.get(channel)
+            if not queues:
+                continue
+            try:
+                event = json.loads(message["data"])
+            except (TypeError, ValueError):
+                logger.warning(f"Événement illisible sur {channel}")
+                continue
+            for queue in list(queues):
+                self._offer(queue, event)
+
+    @staticmethod
+    def _offer(queue: asyncio.Queue, event: Dict[str, Any]):
+        if queue.full():
+            try:
+                queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+        queue.put_nowait(event)
+
+    @asynccontextmanager
+    async def watch(self, channel: str) -> AsyncIterator[asyncio.Queue]:
+        """File des événements d'un canal, alimentée tant que le contexte est ouvert."""
+        await self.start()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._watchers.setdefault(channel, set()).add(queue)
+        try:
+            yield queue
+        finally:
+            queues = self._watchers.get(channel)
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self._watchers[channel]
+
+    async def close(self):
+        """Ferme l'abonnement (arrêt de l'application)."""
+        if self._reader is not None:
+            self._reader.cancel()
+            try:
+                await self._reader
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._reader = None
+        if self._pubsub is not None:
+            try:
+                await self._pubsub.close()
+            except Exception as e:
+                logger.warning(f"Fermeture de l'abonnement aux événements impossible: {str(e)}")
+            self._pubsub = None
+        if self.redis is not None:
+            await self.redis.close()
+            self.redis = None
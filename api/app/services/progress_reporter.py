@@ -0,0 +1,204 @@
+from typing import Optional, Dict, Any
+import os
+import json
+import time
+import asyncio
+import logging
+
+from app.models.analysis import AnalysisStatus
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = (AnalysisStatus.COMPLETED, AnalysisStatus.FAILED)
+
+
+def progress_key(analysis_id: str) -> str:
+    """Hash Redis de l'état courant d'une analyse (status, progress, stage, ...)."""
+    return f"analysis:{analysis_id}"
+
+
+def progress_channel(analysis_id: str) -> str:
+    """Canal Redis sur lequel chaque transition d'une analyse est publiée."""
+    return f"analysis:{analysis_id}:events"
+
+
+# Réamorçage: le hash n'est écrit que s'il n'existe pas (celui de l'orchestrateur fait foi)
+_SEED_IF_ABSENT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return 0
+end
+redis.call('HSET', KEYS[1], unpack(ARGV, 2))
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return 1
+"""
+
+
+async def read_progress(redis_client, analysis_id: str) -> Optional[Dict[str, Any]]:
+    """
+    État d'une analyse lu dans son hash Redis (un seul HGETALL, client
+    asynchrone), ou None si le hash n'existe pas (analyse inconnue, expirée
+    ou antérieure au suivi Redis).
+    """
+    raw = await redis_client.hgetall(progress_key(analysis_id))
+    if not raw:
+        return None
+    state: Dict[str, Any] = {
+        (field.decode() if isinstance(field, bytes) else field): (value.decode() if isinstance(value, bytes) else value)
+        for field, value in raw.items()
+    }
+    for field in ("progress", "updated_at"):
+        if field in state:
+            state[field] = float(state[field])
+    return state
+
+
+async def seed_progress(
+    redis_client,
+    analysis_id: str,
+    state: Dict[str, Any],
+    ttl: Optional[int] = None,
+    reset: bool = False
+) -> bool:
+    """
+    Écrit le hash d'une analyse sans publier de transition (client
+    asynchrone). Par défaut (création, réamorçage depuis MongoDB), le hash
+    n'est écrit que s'il n'existe pas: l'orchestrateur a pu le créer entre
+    la lecture et l'écriture, et ses valeurs sont plus récentes que celles
+    de MongoDB (écrit en différé). `reset` (relance) remplace le hash et
+    efface les champs du passage précédent. Renvoie True si le hash a été
+    écrit.
+    """
+    ttl = ttl if ttl is not None else int(os.getenv("PROGRESS_TTL", "86400"))
+    mapping = {field: value for field, value in state.items() if value is not None}
+    if reset:
+        pipe = redis_client.pipeline(transaction=True)
+        pipe.delete(progress_key(analysis_id))
+        pipe.hset(progress_key(analysis_id), mapping=mapping)
+        pipe.expire(progress_key(analysis_id), ttl)
+        await pipe.execute()
+        return True
+
+    fields = [item for field, value in mapping.items() for item in (field, value)]
+    return bool(await redis_client.eval(_SEED_IF_ABSENT, 1, progress_key(analysis_id), ttl, *fields))
+
+
+async def clear_progress(redis_client, analysis_id: str):
+    """Supprime le hash d'une analyse (analyse supprimée)."""
+    await redis_client.delete(progress_key(analysis_id))
+
+
+class ProgressReporter:
+    """
+    Suivi de la progression d'une analyse.
+
+    Chaque transition (statut, progression, étape) est écrite dans Redis en un
+    seul aller-retour: HSET de l'état + EXPIRE + PUBLISH dans un pipeline.
+    MongoDB est mis à jour en écriture différée: au plus une écriture par
+    intervalle `flush_interval` (la dernière valeur l'emporte), et toujours
+    immédiatement pour un statut final.
+    """
+
+    def __init__(
+        self,
+        analysis_id: str,
+        analysis_service,
+        redis_client,
+        flush_interval: Optional[float] = None,
+        ttl: Optional[int] = None
+    ):
+        self.analysis_id = analysis_id
+        self.analysis_service = analysis_service
+        self.redis = redis_client
+        self.flush_interval = flush_interval if flush_interval is not None else float(os.getenv("PROGRESS_FLUSH_INTERVAL", "2.0"))
+        self.ttl = ttl if ttl is not None else int(os.getenv("PROGRESS_TTL", "86400"))
+
+        self.state: Dict[str, Any] = {}
+        self._pending: Dict[str, Any] = {}
+        self._last_flush = 0.0
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+
+    def _publish(self, state: Dict[str, Any], partial: Optional[Dict[str, Any]] = None):
+        """
+        Écrit l'état dans Redis et le publie (un seul aller-retour). Les
+        résultats partiels ne sont que publiés: le hash ne garde que l'état.
+        """
+        if self.redis is None:
+            return
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.hset(progress_key(self.analysis_id), mapping={
+                field: value for field, value in state.items() if value is not None
+            })
+            pipe.expire(progress_key(self.analysis_id), self.ttl)
+            event = {**state, "partial": partial} if partial else state
+            pipe.publish(progress_channel(self.analysis_id), json.dumps(event, default=str))
+            pipe.execute()
+        except Exception as e:
+            # Redis ne sert qu'au suivi: une panne ne doit pas interrompre l'analyse
+            logger.error(f"Publication de la progression impossible (analysis_id={self.analysis_id}): {str(e)}")
+
+    async def report(
+        self,
+        progress: Optional[float] = None,
+        stage: Optional[str] = None,
+        status: Optional[AnalysisStatus] = None,
+        error: Optional[str] = None,
+        partial: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Enregistre une transition; MongoDB n'est écrit que si elle est finale ou
+        à échéance. `partial` accompagne l'événement publié (résultats déjà
+        disponibles, ex: clauses extraites).
+        """
+        update = {"status": getattr(status, "value", status), "progress": progress, "stage": stage, "error": error}
+        update = {field: value for field, value in update.items() if value is not None}
+        self.state.update(update)
+        self._pending.update(update)
+        self._publish({**self.state, "updated_at": time.time()}, partial)
+
+        if status in TERMINAL_STATUSES:
+            await self.flush()
+        elif time.monotonic() - self._last_flush >= self.flush_interval:
+            await self.flush()
+        elif self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._delayed_flush())
+
+    async def _delayed_flush(self):
+        await asyncio.sleep(max(0.0, self.flush_interval - (time.monotonic() - self._last_flush)))
+        await self.flush()
+
+    async def flush(self):
+        """
+        Écrit dans MongoDB les changements en attente (une seule requête).
+        L'échec d'une écriture finale est propagé à l'appelant.
+        """
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+            status = pending.get("status")
+            try:
+                await self.analysis_service.update_analysis_state(
+                    self.analysis_id,
+                    status=AnalysisStatus(status) if status is not None else None,
+                    progress=pending.get("progress"),
+                    stage=pending.get("stage"),
+                    error=pending.get("error")
+                )
+            except Exception as e:
+                # Les changements restent en attente pour la prochaine écriture
+                self._pending = {**pending, **self._pending}
+                logger.error(f"Écriture différée de la progression impossible (analysis_id={self.analysis_id}): {str(e)}")
+                if status in [s.value for s in TERMINAL_STATUSES]:
+                    raise
+
+    async def start(self, stage: str = "started"):
+        await self.report(progress=0.0, stage=stage, status=AnalysisStatus.IN_PROGRESS)
+
+    async def complete(self):
+        await self.report(progress=1.0, stage="completed", status=AnalysisStatus.COMPLETED)
+
+    async def fail(self, error: str):
+        await self.report(stage="failed", status=AnalysisStatus.FAILED, error=error)
@@ -0,0 +1,55 @@
+import os
+import logging
+from typing import Optional
+from urllib.parse import urlparse
+
+import redis
+import redis.asyncio as aioredis
+
+logger = logging.getLogger(__name__)
+
+# Client partagé par les routes (suivi des analyses): redis-py gère son propre pool
+_client: Optional[redis.Redis] = None
+
+
+def _redis_connection_options() -> dict:
+    """
+    Paramètres de connexion lus dans REDIS_URI et REDIS_PASSWORD.
+
+    Le mot de passe est lu séparément de l'URI, qui ne fournit que
+    l'hôte, le port et la base.
+    """
+    redis_uri = os.getenv("REDIS_URI", "redis://redis:6379/0")
+    redis_password = os.getenv("REDIS_PASSWORD", "")
+
+    # On parse l'URI pour extraire host, port et db
+    parsed_uri = urlparse(redis_uri)
+    host = parsed_uri.hostname or "redis"
+    port = parsed_uri.port or 6379
+
+    db = 0
+    if parsed_uri.path:
+        db_str = parsed_uri.path.lstrip("/")
+        if db_str.isdigit():
+            db = int(db_str)
+
+    return {"host": host, "port": port, "db": db, "password": redis_password}
+
+
+def create_redis_client() -> redis.Redis:
+    """Crée un client Redis à partir de REDIS_URI et REDIS_PASSWORD."""
+    return redis.Redis(**_redis_connection_options())
+
+
+def create_async_redis_client() -> aioredis.Redis:
+    """Client Redis asynchrone (pub/sub des événements d'analyse), même configuration."""
+    return aioredis.Redis(**_redis_connection_options())
+
+
+def get_redis_client() -> redis.Redis:
+    """Client Redis partagé, créé au premier appel."""
+    global _client
+    if _client is None:
+        _client = create_redis_client()
+        logger.info("Client Redis partagé créé")
+    return _client
@@ -0,0 +1,182 @@
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
+from contextlib import asynccontextmanager
+import os
+import json
+import time
+import asyncio
+import logging
+
+from app.services.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+# Un travail sans nouvelles (processus arrêté) libère la collection après ce délai
+REINDEX_JOB_LEASE_SECONDS = int(os.getenv("REINDEX_JOB_LEASE_SECONDS", "600"))
+# Conservation de l'état des réindexations terminées
+REINDEX_JOB_TTL_SECONDS = int(os.getenv("REINDEX_JOB_TTL_SECONDS", str(7 * 24 * 3600)))
+# Attente maximale des écritures en cours avant la bascule, et durée maximale du blocage
+REINDEX_SWAP_DRAIN_SECONDS = float(os.getenv("REINDEX_SWAP_DRAIN_SECONDS", "30"))
+REINDEX_SWAP_BARRIER_SECONDS = int(os.getenv("REINDEX_SWAP_BARRIER_SECONDS", "120"))
+_BARRIER_POLL_SECONDS = 0.2
+
+# Inscription des précédents modifiés, seulement si une réindexation est active
+_RECORD_IF_ACTIVE = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+return redis.call('SADD', KEYS[2], unpack(ARGV))
+"""
+
+
+class ReindexJournal:
+    """
+    État partagé (Redis) des réindexations d'une collection de précédents.
+
+    - L'état de chaque travail (reindex:job:{id}) est visible de tous les
+      workers de l'API; une seule réindexation est active par collection
+      (reindex:{collection}:active, bail renouvelé à chaque lot).
+    - Pendant une réindexation, les écritures dans la version active
+      (ajout, fusion de doublons, suppression) inscrivent les précédents
+      touchés dans reindex:{collection}:dirty; la réindexation les recopie
+      depuis la source avant la bascule.
+    - Pendant la bascule, les écritures sont suspendues (barrière): la
+      réindexation attend la fin des écritures en cours
+      (reindex:{collection}:writers), rejoue les dernières modifications,
+      bascule l'alias, puis lève la barrière.
+    - Lors de la migration initiale, la version cible est inscrite dans
+      reindex:{collection}:pending_alias avant la suppression de la
+      collection historique: tant que l'alias n'est pas créé, elle sert les
+      lectures et tout processus peut terminer la bascule.
+    """
+
+    def __init__(self, collection_key: str, redis_client=None):
+        self.redis = redis_client or get_redis_client()
+        prefix = f"reindex:{collection_key}"
+        self.active_key = f"{prefix}:active"
+        self.dirty_key = f"{prefix}:dirty"
+        self.writers_key = f"{prefix}:writers"
+        self.barrier_key = f"{prefix}:swapping"
+        self.pending_alias_key = f"{prefix}:pending_alias"
+
+    @staticmethod
+    def _job_key(job_id: str) -> str:
+        return f"reindex:job:{job_id}"
+
+    # ----- État des travaux -----
+
+    def acquire(self, job: Dict[str, Any]) -> Optional[str]:
+        """Enregistre le travail s'il n'y en a pas d'autre en cours; sinon renvoie l'ID du travail actif."""
+        if not self.redis.set(self.active_key, job["id"], nx=True, ex=REINDEX_JOB_LEASE_SECONDS):
+            active = self.redis.get(self.active_key)
+            return active.decode() if isinstance(active, bytes) else active
+        # Les modifications antérieures au travail sont déjà dans la source
+        self.redis.delete(self.dirty_key)
+        self.save(job)
+        return None
+
+    def save(self, job: Dict[str, Any]):
+        """Enregistre l'état du travail et renouvelle son bail tant qu'il est en cours."""
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.set(self._job_key(job["id"]), json.dumps(job, default=str), ex=REINDEX_JOB_TTL_SECONDS)
+        if job["status"] in ("pending", "in_progress", "validating", "swapping"):
+            pipe.expire(self.active_key, REINDEX_JOB_LEASE_SECONDS)
+        pipe.execute()
+
+    def release(self, job_id: str):
+        """Libère la collection (fin du travail, réussi ou non)."""
+        if self.active_job_id() == job_id:
+            pipe = self.redis.pipeline(transaction=True)
+            pipe.delete(self.active_key)
+            pipe.delete(self.dirty_key)
+            pipe.delete(self.barrier_key)
+            pipe.execute()
+
+    def active_job_id(self) -> Optional[str]:
+        active = self.redis.get(self.active_key)
+        return active.decode() if isinstance(active, bytes) else active
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        data = self.redis.get(self._job_key(job_id))
+        return json.loads(data) if data else None
+
+    # ----- Écritures concurrentes -----
+
+    @asynccontextmanager
+    async def writing(self) -> AsyncIterator[None]:
+        """
+        Encadre une écriture dans la collection. Sans réindexation en cours, un
+        seul GET et aucune coordination. Sinon, attend la fin d'une bascule en
+        cours, puis signale l'écriture pour que la bascule attende sa fin. Sans
+        Redis, l'écriture a lieu sans coordination.
+        """
+        registered = False
+        try:
+            while self.redis.get(self.active_key) is not None:
+                self.redis.incr(self.writers_key)
+                registered = True
+                if not self.redis.exists(self.barrier_key):
+                    break
+                self.redis.decr(self.writers_key)
+                registered = False
+                await asyncio.sleep(_BARRIER_POLL_SECONDS)
+        except Exception as e:
+            logger.debug(f"Écriture sans coordination avec la réindexation (Redis indisponible): {str(e)}")
+        try:
+            yield
+        finally:
+            if registered:
+                try:
+                    self.redis.decr(self.writers_key)
+                except Exception as e:
+                    logger.error(f"Fin d'écriture non signalée à la réindexation: {str(e)}")
+
+    def record(self, precedent_ids: Iterable[str]):
+        """
+        Inscrit les précédents modifiés si une réindexation est en cours (un
+        aller-retour par lot de 1000). Vérifié après l'écriture: une
+        réindexation démarrée pendant celle-ci la rejouera.
+        """
+        precedent_ids = [str(precedent_id) for precedent_id in precedent_ids]
+        if not precedent_ids:
+            return
+        try:
+            # Par lots: unpack() est limité par la pile Lua
+            for start in range(0, len(precedent_ids), 1000):
+                self.redis.eval(
+                    _RECORD_IF_ACTIVE, 2, self.active_key, self.dirty_key, *precedent_ids[start:start + 1000]
+                )
+        except Exception as e:
+            logger.debug(f"Modifications non inscrites pour la réindexation (Redis indisponible): {str(e)}")
+
+    def pop_dirty(self, count: int) -> List[str]:
+        """Retire et renvoie jusqu'à `count` précédents modifiés."""
+        ids = self.redis.spop(self.dirty_key, count) or []
+        return [i.decode() if isinstance(i, bytes) else i for i in ids]
+
+    # ----- Bascule -----
+
+    async def close_barrier(self):
+        """Suspend les nouvelles écritures et attend la fin de celles en cours."""
+        self.redis.set(self.barrier_key, "1", ex=REINDEX_SWAP_BARRIER_SECONDS)
+        deadline = time.monotonic() + REINDEX_SWAP_DRAIN_SECONDS
+        while int(self.redis.get(self.writers_key) or 0) > 0:
+            if time.monotonic() > deadline:
+                logger.warning("Écritures toujours en cours après le délai d'attente, bascule quand même")
+                break
+            await asyncio.sleep(_BARRIER_POLL_SECONDS)
+
+    def open_barrier(self):
+        self.redis.delete(self.barrier_key)
+
+    # ----- Migration initiale -----
+
+    def set_pending_alias(self, target: str):
+        """Inscrit la version que l'alias doit désigner (sans expiration)."""
+        self.redis.set(self.pending_alias_key, target)
+
+    def pending_alias(self) -> Optional[str]:
+        target = self.redis.get(self.pending_alias_key)
+        return target.decode() if isinstance(target, bytes) else target
+
+    def clear_pending_alias(self):
+        self.redis.delete(self.pending_alias_key)
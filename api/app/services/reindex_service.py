@@ -0,0 +1,279 @@
+from typing import List, Optional, Dict, Any, Set
+import time
+import uuid
+import asyncio
+import logging
+from datetime import datetime
+from qdrant_client.http import models
+
+from app.llm.llm_factory import LLMService
+from app.services.vector_service import VectorService, embedding_dimension
+from app.services.reindex_journal import ReindexJournal
+
+logger = logging.getLogger(__name__)
+
+# Précédents modifiés recopiés par lot, et passes de rattrapage avant la bascule
+REPLAY_BATCH_SIZE = 64
+MAX_REPLAY_ROUNDS = 5
+# Tentatives de création de l'alias lors de la migration initiale
+ALIAS_CREATE_ATTEMPTS = 3
+
+
+class ReindexService:
+    """
+    Réindexation sans interruption de la collection de précédents.
+
+    Une nouvelle collection versionnée (legal_precedents_vN) est construite en
+    arrière-plan à partir des payloads de la version active, avec des embeddings
+    calculés par lots, puis validée avant de basculer l'alias.
+    Les recherches continuent d'être servies par l'ancienne version pendant
+    toute la reconstruction.
+
+    Les écritures dans l'ancienne version pendant la copie (ajouts, fusions
+    et suppressions de doublons) sont inscrites dans le journal de
+    réindexation; les précédents concernés sont recopiés depuis la source
+    (ou supprimés de la cible) avant la bascule. La dernière passe et la
+    bascule ont lieu derrière une barrière qui suspend les écritures.
+    L'état des travaux est dans Redis, visible de tous les workers.
+    """
+
+    def __init__(
+        self,
+        vector_service: Optional[VectorService] = None,
+        llm_service: Optional[LLMService] = None
+    ):
+        self.vector_service = vector_service or VectorService()
+        self.llm_service = llm_service or LLMService()
+        self.client = self.vector_service.client
+        self.journal: Optional[ReindexJournal] = self.vector_service.reindex_journal
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        if self.journal is None:
+            return None
+        return self.journal.get_job(job_id)
+
+    def create_job(self, model: Optional[str] = None) -> Dict[str, Any]:
+        """Enregistre une réindexation en attente et renvoie son état."""
+        if self.journal is None:
+            raise ValueError("La réindexation sans interruption nécessite le backend Qdrant")
+
+        job = {
+            "id": str(uuid.uuid4()),
+            "status": "pending",
+            "model": model or self.vector_service.embedding_model,
+            "source_collection": None,
+            "target_collection": None,
+            "copied": 0,
+            "replayed": 0,
+            "created_at": datetime.now().isoformat(),
+            "error": None
+        }
+        running = self.journal.acquire(job)
+        if running:
+            raise ValueError(f"Une réindexation est déjà en cours: {running}")
+        return job
+
+    async def _copy_points(
+        self,
+        source: str,
+        target: str,
+        model: str,
+        batch_size: int,
+        job: Dict[str, Any],
+        scroll_filter: Optional[models.Filter] = None,
+        skip_ids: Optional[Set[str]] = None
+    ) -> Set[str]:
+        """Recopie les points de `source` dans `target` en recalculant les embeddings par lots."""
+        copied = set()
+        offset = None
+        target_config = self.vector_service.config_for(target)
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=source,
+                scroll_filter=scroll_filter,
+                limit=batch_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=False
+            )
+            points = [p for p in points if not skip_ids or str(p.id) not in skip_ids]
+            if points:
+                texts = [
+                    (p.payload or {}).get("passage") or (p.payload or {}).get("description", "")
+                    for p in points
+                ]
+                vectors = await self.llm_service.get_embeddings(texts, model=model)
+                self.client.upsert(
+                    collection_name=target,
+                    points=[
+                        models.PointStruct(
+                            id=point.id,
+                            vector=target_config.point_vector(vector),
+                            payload={**(point.payload or {}), "embedding_model": model}
+                        )
+                        for point, vector in zip(points, vectors)
+                    ]
+                )
+                copied.update(str(p.id) for p in points)
+                job["copied"] += len(points)
+                self.journal.save(job)
+                logger.info(f"Réindexation {job['id']}: {job['copied']} précédents copiés")
+            if offset is None:
+                break
+        return copied
+
+    async def _replay_mutations(
+        self,
+        source: str,
+        target: str,
+        model: str,
+        batch_size: int,
+        job: Dict[str, Any]
+    ) -> int:
+        """
+        Recopie les précédents modifiés dans la source depuis le début du
+        travail: leurs passages sont supprimés de la cible puis recopiés
+        depuis la source (aucun s'ils y ont été supprimés).
+        """
+        replayed = 0
+        while True:
+            precedent_ids = self.journal.pop_dirty(REPLAY_BATCH_SIZE)
+            if not precedent_ids:
+                return replayed
+            selector = self.vector_service._precedent_selector(precedent_ids)
+            self.client.delete(
+                collection_name=target,
+                points_selector=models.FilterSelector(filter=selector)
+            )
+            await self._copy_points(source, target, model, batch_size, job, selector)
+            replayed += len(precedent_ids)
+            job["replayed"] += len(precedent_ids)
+            self.journal.save(job)
+
+    def _validate(self, source: str, target: str, vector_size: int, sample_size: int = 20, min_self_recall: float = 0.9):
+        """Vérifie le nombre de points, la dimension et que chaque point échantillon se retrouve lui-même."""
+        source_count = self.client.count(collection_name=source, exact=True).count
+        target_count = self.client.count(collection_name=target, exact=True).count
+        if target_count < source_count:
+            raise ValueError(f"Validation échouée: {target_count} points dans {target} pour {source_count} dans {source}")
+
+        config = self.vector_service.config_for(target)
+        sample, _ = self.client.scroll(
+            collection_name=target,
+            limit=sample_size,
+            with_payload=False,
+            with_vectors=True
+        )
+        if not sample:
+            return
+
+        found = 0
+        for point in sample:
+            vector = config.full_vector(point.vector)
+            if len(vector) != vector_size:
+                raise ValueError(f"Validation échouée: dimension {len(vector)} au lieu de {vector_size}")
+            result = self.client.search(
+                collection_name=target,
+                query_vector=config.query_vector(vector),
+                search_params=config.search_params(),
+                limit=1
+            )
+            if result and result[0].id == point.id:
+                found += 1
+
+        self_recall = found / len(sample)
+        if self_recall < min_self_recall:
+            raise ValueError(f"Validation échouée: auto-rappel {self_recall:.2f} < {min_self_recall}")
+
+    async def _swap_alias(self, alias: str, source: str, target: str):
+        """
+        Fait désigner `target` par l'alias.
+
+        D'une version à l'autre, la bascule est atomique (suppression et
+        création de l'alias en une seule opération). Lors de la migration
+        initiale, la collection historique porte le nom de l'alias et doit
+        être supprimée avant sa création: la cible est d'abord inscrite dans
+        le journal, qui sert alors les lectures de tous les processus
+        (VectorService.unaliased_collection). Si la création de l'alias
+        échoue, la migration reste inscrite et le prochain processus qui
+        résout la collection la termine.
+        """
+        if source != alias:
+            await asyncio.to_thread(self.client.update_collection_aliases, change_aliases_operations=[
+                models.DeleteAliasOperation(delete_alias=models.DeleteAlias(alias_name=alias)),
+                models.CreateAliasOperation(create_alias=models.CreateAlias(collection_name=target, alias_name=alias))
+            ])
+            return
+
+        self.journal.set_pending_alias(target)
+        for attempt in range(1, ALIAS_CREATE_ATTEMPTS + 1):
+            try:
+                await asyncio.to_thread(self.vector_service.finish_alias_migration, target)
+                return
+            except Exception as e:
+                if attempt == ALIAS_CREATE_ATTEMPTS:
+                    logger.error(f"Alias {alias} non créé, migration vers {target} inscrite pour reprise: {str(e)}")
+                    raise
+                logger.warning(f"Création de l'alias {alias} impossible (tentative {attempt}): {str(e)}")
+                await asyncio.sleep(attempt)
+
+    async def run_reindex(
+        self,
+        job_id: str,
+        batch_size: int = 64,
+        keep_previous: bool = True
+    ):
+        """Construit, valide puis active une nouvelle version de la collection."""
+        job = self.journal.get_job(job_id)
+        job["status"] = "in_progress"
+        self.journal.save(job)
+        started_ts = time.time()
+        alias = self.vector_service.collection_name
+        model = job["model"]
+        vector_size = embedding_dimension(model)
+        barrier_closed = False
+
+        try:
+            source, _ = self.vector_service.resolve_collection(fresh=True)
+            versions = self.vector_service.collection_versions()
+            target = self.vector_service.versioned_collection_name((versions[-1] if versions else 0) + 1)
+            job["source_collection"] = source
+            job["target_collection"] = target
+            logger.info(f"Réindexation {job_id}: {source} -> {target} (modèle {model}, dimension {vector_size})")
+
+            self.vector_service.create_collection(target, vector_size)
+            await self._copy_points(source, target, model, batch_size, job)
+
+            # Rattrapage des écritures arrivées pendant la copie (sans bloquer les écritures)
+            for _ in range(MAX_REPLAY_ROUNDS):
+                if not await self._replay_mutations(source, target, model, batch_size, job):
+                    break
+
+            job["status"] = "validating"
+            self.journal.save(job)
+            self._validate(source, target, vector_size)
+
+            # Bascule: écritures suspendues, dernier rattrapage, puis alias
+            job["status"] = "swapping"
+            self.journal.save(job)
+            await self.journal.close_barrier()
+            barrier_closed = True
+            await self._replay_mutations(source, target, model, batch_size, job)
+            await self._swap_alias(alias, source, target)
+            self.vector_service.resolve_collection(fresh=True)
+            logger.info(f"Réindexation {job_id}: alias {alias} -> {target}")
+
+            if source != alias and not keep_previous:
+                self.client.delete_collection(source)
+
+            job["status"] = "completed"
+        except Exception as e:
+            logger.error(f"Erreur lors de la réindexation {job_id}: {str(e)}", exc_info=True)
+            job["status"] = "failed"
+            job["error"] = str(e)
+        finally:
+            if barrier_closed:
+                self.journal.open_barrier()
+            job["duration"] = time.time() - started_ts
+            self.journal.save(job)
+            self.journal.release(job_id)
@@ -0,0 +1,104 @@
+from typing import List, Optional
+import os
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Cross-encoder multilingue (français compris), ~120 Mo, utilisable sur CPU
+DEFAULT_RERANK_MODEL = "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1"
+
+
+class CrossEncoderReranker:
+    """
+    Re-classement de candidats par un cross-encoder local exécuté sur CPU.
+
+    Le modèle est chargé au premier appel; l'inférence, par lots, tourne dans un
+    pool de threads dédié pour ne pas bloquer la boucle asyncio. Les logits sont
+    convertis en scores calibrés dans [0, 1] par une sigmoïde
+    (logit - bias) / temperature, ajustable sur un jeu de paires annotées.
+    """
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_RERANK_MODEL,
+        batch_size: int = 16,
+        max_length: int = 512,
+        temperature: float = 1.0,
+        bias: float = 0.0,
+        threads: int = 1
+    ):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.temperature = temperature
+        self.bias = bias
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="rerank")
+        self.model = None
+        self.available = True
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self.model is None:
+                from sentence_transformers import CrossEncoder
+
+                logger.info(f"Chargement du cross-encoder {self.model_name}")
+                self.model = CrossEncoder(self.model_name, max_length=self.max_length, device="cpu")
+        return self.model
+
+    def calibrate(self, logits: np.ndarray) -> np.ndarray:
+        return 1.0 / (1.0 + np.exp(-(np.asarray(logits, dtype=np.float64) - self.bias) / self.temperature))
+
+    def _predict(self, query: str, documents: List[str]) -> np.ndarray:
+        import torch
+
+        model = self._load()
+        logits = model.predict(
+            [(query, document) for document in documents],
+            batch_size=self.batch_size,
+            activation_fct=torch.nn.Identity(),
+            show_progress_bar=False,
+            convert_to_numpy=True
+        )
+        return self.calibrate(np.asarray(logits).reshape(-1))
+
+    async def score(self, query: str, documents: List[str]) -> Optional[List[float]]:
+        """
+        Scores calibrés de pertinence de chaque document pour la requête, ou None
+        si le modèle est indisponible (les scores bi-encodeur sont alors conservés).
+        """
+        if not documents or not self.available:
+            return None
+        try:
+            loop = asyncio.get_running_loop()
+            scores = await loop.run_in_executor(self.executor, self._predict, query, documents)
+            return scores.tolist()
+        except Exception as e:
+            # Modèle absent (pas de réseau, dépendance manquante): ne pas réessayer à chaque requête
+            logger.error(f"Re-classement par cross-encoder désactivé: {str(e)}")
+            self.available = False
+            return None
+
+
+_reranker: Optional[CrossEncoderReranker] = None
+
+
+def get_reranker() -> Optional[CrossEncoderReranker]:
+    """Re-classeur partagé par le processus (None si désactivé)."""
+    global _reranker
+    if os.getenv("PRECEDENT_RERANK", "true").lower() != "true":
+        return None
+    if _reranker is None:
+        _reranker = CrossEncoderReranker(
+            model_name=os.getenv("RERANK_MODEL", DEFAULT_RERANK_MODEL),
+            batch_size=int(os.getenv("RERANK_BATCH_SIZE", "16")),
+            max_length=int(os.getenv("RERANK_MAX_LENGTH", "512")),
+            temperature=float(os.getenv("RERANK_TEMPERATURE", "1.0")),
+            bias=float(os.getenv("RERANK_BIAS", "0.0")),
+            threads=int(os.getenv("RERANK_THREADS", "1"))
+        )
+    return _reranker
@@ -0,0 +1,166 @@
+from typing import List, Optional, Dict, Any
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+from app.services.redis_client import create_redis_client
+from app.services.collection_versions import CollectionVersions, get_collection_versions
+
+logger = logging.getLogger(__name__)
+
+REDIS_PREFIX = "precedent_search"
+
+
+def normalize_query(query: str) -> str:
+    """Normalise une requête (casse, espaces) pour mutualiser les entrées du cache."""
+    return re.sub(r"\s+", " ", query or "").strip().lower()
+
+
+class SearchCache:
+    """
+    Cache des résultats de recherche de précédents.
+
+    Deux niveaux: un LRU en mémoire propre au processus et, en option, Redis
+    partagé entre les workers. Chaque espace de noms (collection) a un numéro
+    de version inclus dans les clés: l'incrémenter invalide toutes ses entrées.
+    Les versions (CollectionVersions) sont dans Redis même sans le niveau
+    Redis des résultats: une écriture d'un autre processus (script, autre
+    worker) invalide aussi le LRU local.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl: float = 3600,
+        use_redis: bool = False,
+        versions: Optional[CollectionVersions] = None
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self.versions = versions or get_collection_versions()
+        self._lock = threading.Lock()
+
+        self.redis = None
+        if use_redis:
+            try:
+                self.redis = create_redis_client()
+                self.redis.ping()
+            except Exception as e:
+                logger.error(f"Cache de recherche: Redis indisponible, cache en mémoire seul: {str(e)}")
+                self.redis = None
+
+        # Statistiques
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.saved_ms = 0.0
+        self._miss_ms_total = 0.0
+        self._computed = 0
+
+    def version(self, namespace: str) -> str:
+        """Version courante d'un espace de noms."""
+        return self.versions.get(namespace)
+
+    def bump_version(self, namespace: str) -> str:
+        """Invalide toutes les entrées d'un espace de noms."""
+        return self.versions.bump(namespace)
+
+    def make_key(self, namespace: str, query: str, **params) -> str:
+        """Clé de cache: (requête normalisée, paramètres, collection, version)."""
+        raw = json.dumps(
+            [namespace, self.version(namespace), normalize_query(query), params],
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._record_hit()
+                    return value
+                del self._entries[key]
+
+        if self.redis is not None:
+            try:
+                raw = self.redis.get(f"{REDIS_PREFIX}:{key}")
+                if raw:
+                    value = json.loads(raw)
+                    self._store_local(key, value)
+                    with self._lock:
+                        self.redis_hits += 1
+                        self._record_hit()
+                    return value
+            except Exception as e:
+                logger.warning(f"Cache de recherche: lecture Redis impossible: {str(e)}")
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: str, value: List[Dict[str, Any]], compute_ms: float = 0.0):
+        """Mémorise un résultat et le temps qu'il a coûté à calculer."""
+        self._store_local(key, value)
+        with self._lock:
+            self._miss_ms_total += compute_ms
+            self._computed += 1
+        if self.redis is not None:
+            try:
+                self.redis.setex(f"{REDIS_PREFIX}:{key}", int(self.ttl), json.dumps(value, default=str))
+            except Exception as e:
+                logger.warning(f"Cache de recherche: écriture Redis impossible: {str(e)}")
+
+    def _store_local(self, key: str, value: List[Dict[str, Any]]):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _record_hit(self):
+        # Appelé sous verrou: le temps économisé est estimé par la latence moyenne d'un échec
+        self.hits += 1
+        if self._computed:
+            self.saved_ms += self._miss_ms_total / self._computed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "redis_hits": self.redis_hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "avg_miss_ms": self._miss_ms_total / self._computed if self._computed else 0.0,
+                "saved_ms": self.saved_ms,
+                "redis": self.redis is not None
+            }
+
+
+_search_cache: Optional[SearchCache] = None
+
+
+def get_search_cache() -> Optional[SearchCache]:
+    """Cache partagé par le processus (None si désactivé)."""
+    global _search_cache
+    if os.getenv("PRECEDENT_CACHE_ENABLED", "true").lower() != "true":
+        return None
+    if _search_cache is None:
+        _search_cache = SearchCache(
+            max_entries=int(os.getenv("PRECEDENT_CACHE_SIZE", "1024")),
+            ttl=float(os.getenv("PRECEDENT_CACHE_TTL", "3600")),
+            use_redis=os.getenv("PRECEDENT_CACHE_REDIS", "false").lower() == "true"
+        )
+    return _search_cache
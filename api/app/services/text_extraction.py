@@ -0,0 +1,186 @@
+from typing import Optional
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import os
+import signal
+import asyncio
+import logging
+import multiprocessing
+
+import pypdf
+import docx2txt
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".doc", ".txt")
+
+# Processus d'extraction (un par cœur par défaut), temps et mémoire maximums d'un travail,
+# nombre de travaux en cours ou en attente au-delà duquel les demandes patientent
+TEXT_EXTRACTION_WORKERS = int(os.getenv("TEXT_EXTRACTION_WORKERS", "0")) or os.cpu_count() or 1
+TEXT_EXTRACTION_TIMEOUT = float(os.getenv("TEXT_EXTRACTION_TIMEOUT", "120"))
+TEXT_EXTRACTION_MAX_MEMORY_MB = int(os.getenv("TEXT_EXTRACTION_MAX_MEMORY_MB", "1024"))
+TEXT_EXTRACTION_MAX_PENDING = int(os.getenv("TEXT_EXTRACTION_MAX_PENDING", "0")) or 4 * TEXT_EXTRACTION_WORKERS
+
+# Délai laissé au processus pour s'interrompre lui-même avant d'être arrêté de force
+_KILL_GRACE_SECONDS = 5.0
+
+
+class TextExtractionError(Exception):
+    """Extraction du texte d'un fichier impossible."""
+
+
+class TextExtractionTimeout(TextExtractionError):
+    """Extraction interrompue après TEXT_EXTRACTION_TIMEOUT secondes."""
+
+
+def read_text(file_path: str, extension: str) -> str:
+    """Texte d'un fichier PDF, Word ou TXT (calcul bloquant, exécuté hors de la boucle d'événements)."""
+    if extension == ".pdf":
+        with open(file_path, "rb") as f:
+            pdf_reader = pypdf.PdfReader(f)
+            return "".join(page.extract_text() + "\n\n" for page in pdf_reader.pages)
+    if extension in (".docx", ".doc"):
+        return docx2txt.process(file_path)
+    if extension == ".txt":
+        with open(file_path, "r", encoding="utf-8") as f:
+            return f.read()
+    raise TextExtractionError(f"Format de fichier non supporté: {extension}")
+
+
+def _init_worker(max_memory_mb: int):
+    """Initialisation d'un processus d'extraction: plafond de mémoire virtuelle (Linux)."""
+    # Ctrl+C et arrêt: c'est le processus API qui arrête le pool
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if max_memory_mb > 0:
+        try:
+            import resource
+            limit = max_memory_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ImportError, ValueError, OSError) as e:
+            logging.getLogger(__name__).warning(f"Plafond mémoire de l'extraction non appliqué: {str(e)}")
+
+
+def _on_alarm(signum, frame):
+    raise TimeoutError
+
+
+def _extract_job(file_path: str, extension: str, timeout: float) -> str:
+    """Travail exécuté dans un processus du pool, interrompu par SIGALRM au-delà de `timeout`."""
+    if timeout > 0:
+        signal.signal(signal.SIGALRM, _on_alarm)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return read_text(file_path, extension)
+    except TimeoutError:
+        raise TextExtractionTimeout(f"Extraction interrompue après {timeout} s: {file_path}")
+    except MemoryError:
+        raise TextExtractionError(f"Mémoire insuffisante pour extraire le texte: {file_path}")
+    except OSError as e:
+        # Fichier absent ou illisible (TimeoutError, sous-classe d'OSError, est traitée plus haut)
+        raise TextExtractionError(f"Fichier illisible: {file_path} ({str(e)})")
+    finally:
+        if timeout > 0:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+class TextExtractor:
+    """
+    Extraction du texte des documents dans un pool de processus.
+
+    L'analyse d'un PDF (pypdf) ou d'un fichier Word (docx2txt) est du calcul
+    Python pur: exécutée dans la boucle d'événements, elle bloque l'API
+    pendant plusieurs secondes sur un gros contrat. Les travaux sont répartis
+    entre TEXT_EXTRACTION_WORKERS processus (un par cœur), chacun plafonné à
+    TEXT_EXTRACTION_MAX_MEMORY_MB de mémoire et interrompu au-delà de
+    TEXT_EXTRACTION_TIMEOUT secondes. Au plus TEXT_EXTRACTION_MAX_PENDING
+    travaux sont soumis à la fois; les suivants attendent leur tour.
+
+    Un processus qui ne s'interrompt pas de lui-même (blocage dans du code
+    natif) ou qui meurt (mémoire) entraîne le remplacement du pool.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        timeout: Optional[float] = None,
+        max_memory_mb: Optional[int] = None,
+        max_pending: Optional[int] = None
+    ):
+        self.max_workers = max_workers or TEXT_EXTRACTION_WORKERS
+        self.timeout = timeout if timeout is not None else TEXT_EXTRACTION_TIMEOUT
+        self.max_memory_mb = max_memory_mb if max_memory_mb is not None else TEXT_EXTRACTION_MAX_MEMORY_MB
+        self.max_pending = max_pending or TEXT_EXTRACTION_MAX_PENDING
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: pas de copie (fork) d'un processus qui a déjà des threads (client MongoDB, etc.)
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.max_memory_mb,)
+            )
+            logger.info(f"Pool d'extraction de texte démarré: {self.max_workers} processus")
+        return self._executor
+
+    def _reset_pool(self, reason: str):
+        """Arrête de force les processus du pool; un nouveau pool est créé au travail suivant."""
+        executor, self._executor = self._executor, None
+        if executor is None:
+            return
+        logger.warning(f"Remplacement du pool d'extraction de texte: {reason}")
+        for process in list((getattr(executor, "_processes", None) or {}).values()):
+            process.kill()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    async def extract(self, file_path: str, extension: str) -> str:
+        """Texte du fichier `file_path` (format donné par `extension`, ex: ".pdf")."""
+        extension = extension.lower()
+        if extension not in SUPPORTED_EXTENSIONS:
+            raise TextExtractionError(f"Format de fichier non supporté: {extension}")
+
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pending)
+        async with self._slots:
+            executor = self._pool()
+            future = asyncio.get_running_loop().run_in_executor(
+                executor, _extract_job, file_path, extension, self.timeout
+            )
+            try:
+                if self.timeout > 0:
+                    return await asyncio.wait_for(future, self.timeout + _KILL_GRACE_SECONDS)
+                return await future
+            except asyncio.TimeoutError:
+                if self._executor is executor:
+                    self._reset_pool(f"travail bloqué au-delà de {self.timeout} s ({file_path})")
+                raise TextExtractionTimeout(f"Extraction interrompue après {self.timeout} s: {file_path}")
+            except BrokenProcessPool:
+                if self._executor is executor:
+                    self._reset_pool(f"processus arrêté pendant l'extraction de {file_path}")
+                raise TextExtractionError(f"Processus d'extraction arrêté (mémoire?): {file_path}")
+
+    def shutdown(self):
+        """Arrête le pool (arrêt de l'application)."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+_text_extractor: Optional[TextExtractor] = None
+
+
+def get_text_extractor() -> TextExtractor:
+    """Extracteur de texte partagé par l'application (un seul pool de processus)."""
+    global _text_extractor
+    if _text_extractor is None:
+        _text_extractor = TextExtractor()
+    return _text_extractor
+
+
+def shutdown_text_extractor():
+    global _text_extractor
+    if _text_extractor is not None:
+        _text_extractor.shutdown()
+        _text_extractor = None
@@ -0,0 +1,170 @@
+from typing import Optional, Tuple
+import os
+import asyncio
+import hashlib
+import logging
+import tempfile
+
+from fastapi import UploadFile
+from starlette.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "/app/uploads")
+MAX_UPLOAD_SIZE = int(os.getenv("MAX_UPLOAD_SIZE", str(10 * 1024 * 1024)))  # 10 Mo
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(256 * 1024)))
+# Taille maximale d'une requête multipart: le fichier plus les autres champs du formulaire
+MAX_UPLOAD_REQUEST_SIZE = int(os.getenv("MAX_UPLOAD_REQUEST_SIZE", "0")) or MAX_UPLOAD_SIZE + 1024 * 1024
+
+
+class UploadTooLargeError(ValueError):
+    """Fichier téléchargé dépassant la taille maximale autorisée."""
+
+
+def _open_temp(directory: str):
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".upload-", suffix=".part")
+    return os.fdopen(fd, "wb"), temp_path
+
+
+def _write_chunk(handle, digest, chunk: bytes):
+    # hashlib libère le GIL sur les gros blocs: empreinte et écriture hors de la boucle d'événements
+    digest.update(chunk)
+    handle.write(chunk)
+
+
+def _finalize(handle, temp_path: str, destination: str):
+    handle.flush()
+    os.fsync(handle.fileno())
+    handle.close()
+    # Renommage atomique: le fichier n'apparaît sous son nom qu'une fois complet
+    os.replace(temp_path, destination)
+
+
+def _discard(handle, temp_path: str):
+    handle.close()
+    try:
+        os.unlink(temp_path)
+    except FileNotFoundError:
+        pass
+
+
+async def save_upload(
+    file: UploadFile,
+    destination: str,
+    max_size: Optional[int] = None,
+    chunk_size: Optional[int] = None
+) -> Tuple[int, str]:
+    """
+    Copie un fichier téléchargé vers `destination` par blocs de `chunk_size`
+    octets, en calculant au passage sa taille et son empreinte SHA-256.
+
+    Les blocs sont écrits dans un fichier temporaire du même répertoire (les
+    écritures disque passent par un thread, jamais par la boucle
+    d'événements), renommé atomiquement à la fin. La copie s'arrête dès que
+    `max_size` est dépassée (UploadTooLargeError) et le fichier temporaire
+    est supprimé. Renvoie (taille en octets, empreinte SHA-256).
+
+    Starlette a déjà reçu le formulaire (mis en tampon sur disque au-delà de
+    1 Mo) quand cette fonction est appelée: la taille des requêtes est
+    d'abord limitée par UploadSizeLimitMiddleware (et client_max_body_size
+    dans nginx), cette vérification ne porte que sur le fichier.
+    """
+    max_size = max_size if max_size is not None else MAX_UPLOAD_SIZE
+    chunk_size = chunk_size or UPLOAD_CHUNK_SIZE
+
+    handle, temp_path = await asyncio.to_thread(_open_temp, os.path.dirname(destination))
+    digest = hashlib.sha256()
+    size = 0
+
+    try:
+        while True:
+            chunk = await file.read(chunk_size)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_size:
+                raise UploadTooLargeError(f"Fichier trop volumineux: plus de {max_size} octets")
+            await asyncio.to_thread(_write_chunk, handle, digest, chunk)
+        await asyncio.to_thread(_finalize, handle, temp_path, destination)
+    except BaseException:
+        await asyncio.to_thread(_discard, handle, temp_path)
+        raise
+
+    logger.info(f"Fichier enregistré: {destination} ({size} octets)")
+    return size, digest.hexdigest()
+
+
+class _RequestTooLarge(Exception):
+    pass
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Refuse (413) les requêtes multipart de plus de `max_size` octets avant
+    que Starlette ne les mette en tampon: d'après l'en-tête Content-Length
+    s'il est présent, sinon dès que le corps reçu dépasse la limite (envoi
+    par morceaux).
+    """
+
+    def __init__(self, app, max_size: Optional[int] = None):
+        self.app = app
+        self.max_size = max_size or MAX_UPLOAD_REQUEST_SIZE
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope.get("headers") or [])
+        if not headers.get(b"content-type", b"").startswith(b"multipart/form-data"):
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            declared = int(headers.get(b"content-length", b"0"))
+        except ValueError:
+            declared = 0
+        if declared > self.max_size:
+            await self._reject(scope, receive, send)
+            return
+
+        received = 0
+        too_large = False
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received, too_large
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_size:
+                    too_large = True
+                    raise _RequestTooLarge()
+            return message
+
+        async def limited_send(message):
+            nonlocal response_started
+            if too_large:
+                # Réponse de l'application à l'interruption de la lecture (400 de FastAPI): remplacée par le 413
+                if message["type"] == "http.response.start" and not response_started:
+                    response_started = True
+                    await self._reject(scope, receive, send)
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, limited_send)
+        except _RequestTooLarge:
+            if not response_started:
+                await self._reject(scope, receive, send)
+
+    async def _reject(self, scope, receive, send):
+        logger.warning(f"Requête refusée (plus de {self.max_size} octets): {scope.get('path')}")
+        response = JSONResponse(
+            status_code=413,
+            content={"detail": f"Taille du fichier trop importante. Maximum: {MAX_UPLOAD_SIZE // (1024 * 1024)} Mo"},
+            headers={"Connection": "close"}
+        )
+        await response(scope, receive, send)
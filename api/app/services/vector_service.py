@@ -1,60 +1,617 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple, Iterable
+from contextlib import asynccontextmanager, nullcontext
 import os
+import re
+import time
 import uuid
 import json
 import numpy as np
 from datetime import datetime
+from pydantic import BaseModel
 from qdrant_client import QdrantClient
 from qdrant_client.http import models
 import logging
 
 # Assurez-vous que l'import LLMService est correct
 from app.llm.llm_factory import LLMService
-from app.models.analysis import Precedent
+from app.models.analysis import Precedent, PrecedentFilters
+from app.services.lexical_index import BM25Index, reciprocal_rank_fusion
+from app.services.dedup_index import DuplicateIndex
+from app.services.precedent_shortlist import PrecedentShortlist, ShortlistIndex, ShortlistKey
+from app.services.passage_search import split_passages, group_by_parent, maximal_marginal_relevance
+from app.services.local_vector_index import get_local_vector_client
+from app.services.search_cache import get_search_cache
+from app.services.collection_versions import CollectionVersions, get_collection_versions
+from app.services.reranker import get_reranker
+from app.services.precedent_snapshot import DEFAULT_SNAPSHOT_DIR, read_snapshot, snapshot_exists
+from app.services.reindex_journal import ReindexJournal
 
 logger = logging.getLogger(__name__)
 
+# Index lexicaux partagés entre les instances du service (une instance par requête),
+# indexés par backend et nom de collection, construits paresseusement depuis les payloads
+# et reconstruits quand la version des données de la collection change (écriture d'un
+# autre processus: script, autre worker)
+_lexical_indexes: Dict[str, BM25Index] = {}
+
+# Index MinHash/LSH de détection des doublons, partagés et invalidés de la même façon
+_duplicate_indexes: Dict[str, DuplicateIndex] = {}
+
+# Listes restreintes par (type de document, type de clause), indexées par backend
+# et collection versionnée (une réindexation repart de listes vides)
+_shortlist_indexes: Dict[str, ShortlistIndex] = {}
+
+# Collections dont la création et les index de payload ont déjà été vérifiés
+_initialized_collections = set()
+
+# Cible courante de l'alias de chaque collection: clé -> (collection, expiration)
+_alias_targets: Dict[str, Tuple[str, float]] = {}
+
+# Modèle d'embedding de chaque collection versionnée (immuable une fois remplie)
+_collection_models: Dict[str, str] = {}
+
+# Dimension réduite (vecteur "fast") de chaque collection, None si vecteur unique
+_collection_reduced_dimensions: Dict[str, Optional[int]] = {}
+
+# Noms des vecteurs d'une collection en mode dimension réduite
+FAST_VECTOR = "fast"
+FULL_VECTOR = "full"
+
+# Dimension des embeddings par modèle
+EMBEDDING_DIMENSIONS = {
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+    "text-embedding-ada-002": 1536,
+    "paraphrase-multilingual-mpnet-base-v2": 768,
+}
+
+DEFAULT_EMBEDDING_MODEL = "text-embedding-3-small"
+
+
+def embedding_dimension(model: str) -> int:
+    """Dimension des vecteurs produits par un modèle d'embedding."""
+    if model in EMBEDDING_DIMENSIONS:
+        return EMBEDDING_DIMENSIONS[model]
+    return int(os.getenv("EMBEDDING_DIMENSION", "1536"))
+
+# Champs de payload indexés, utilisés pour filtrer la recherche
+PAYLOAD_INDEXES = {
+    "type": models.PayloadSchemaType.KEYWORD,
+    "jurisdiction": models.PayloadSchemaType.KEYWORD,
+    "document_types": models.PayloadSchemaType.KEYWORD,
+    "created_at_ts": models.PayloadSchemaType.FLOAT,
+    "parent_id": models.PayloadSchemaType.KEYWORD,
+}
+
+class CollectionConfig(BaseModel):
+    """
+    Paramètres de stockage et de recherche d'une collection Qdrant.
+
+    quantization: "none", "scalar" (int8, x4 moins de RAM) ou "binary" (1 bit, x32);
+    avec rescore, les meilleurs candidats sont re-scorés sur les vecteurs originaux.
+
+    reduced_dimension: si défini, chaque point porte deux vecteurs nommés: "fast",
+    les `reduced_dimension` premières composantes (embeddings Matryoshka, ex:
+    text-embedding-3-*), indexé en HNSW et gardé en RAM, et "full", le vecteur
+    complet sur disque sans index, relu pour re-scorer exactement les
+    `reduced_oversampling` x limit meilleurs candidats.
+    """
+    hnsw_m: int = 16
+    hnsw_ef_construct: int = 100
+    search_ef: Optional[int] = None
+    on_disk: bool = False
+    quantization: str = "none"
+    quantization_always_ram: bool = True
+    quantization_rescore: bool = True
+    quantization_oversampling: float = 2.0
+    reduced_dimension: Optional[int] = None
+    reduced_oversampling: float = 4.0
+
+    @classmethod
+    def from_env(cls, prefix: str = "", **defaults) -> "CollectionConfig":
+        """
+        Construit la configuration depuis les variables d'environnement
+        (QDRANT_HNSW_M, ...), éventuellement préfixées (ex: CLAUSE_QDRANT_HNSW_M).
+        """
+        base = cls(**defaults)
+
+        def env(name: str, default: Any) -> str:
+            value = os.getenv(f"{prefix}QDRANT_{name}")
+            return value if value not in (None, "") else str(default)
+
+        search_ef = env("SEARCH_EF", base.search_ef or "")
+        reduced_dimension = env("REDUCED_DIMENSION", base.reduced_dimension or "")
+        return cls(
+            hnsw_m=int(env("HNSW_M", base.hnsw_m)),
+            hnsw_ef_construct=int(env("HNSW_EF_CONSTRUCT", base.hnsw_ef_construct)),
+            search_ef=int(search_ef) if search_ef else None,
+            on_disk=env("VECTORS_ON_DISK", base.on_disk).lower() == "true",
+            quantization=env("QUANTIZATION", base.quantization).lower(),
+            quantization_always_ram=env("QUANTIZATION_ALWAYS_RAM", base.quantization_always_ram).lower() == "true",
+            quantization_rescore=env("QUANTIZATION_RESCORE", base.quantization_rescore).lower() == "true",
+            quantization_oversampling=float(env("QUANTIZATION_OVERSAMPLING", base.quantization_oversampling)),
+            reduced_dimension=int(reduced_dimension) if reduced_dimension else None,
+            reduced_oversampling=float(env("REDUCED_OVERSAMPLING", base.reduced_oversampling))
+        )
+
+    def vectors_config(self, size: int) -> Any:
+        if self.reduced_dimension is None or self.reduced_dimension >= size:
+            return models.VectorParams(
+                size=size,
+                distance=models.Distance.COSINE,
+                on_disk=self.on_disk
+            )
+        return {
+            FAST_VECTOR: models.VectorParams(
+                size=self.reduced_dimension,
+                distance=models.Distance.COSINE,
+                on_disk=False
+            ),
+            # Lu uniquement pour le re-scoring: sur disque et sans graphe HNSW
+            FULL_VECTOR: models.VectorParams(
+                size=size,
+                distance=models.Distance.COSINE,
+                on_disk=True,
+                hnsw_config=models.HnswConfigDiff(m=0)
+            )
+        }
+
+    def with_reduced_dimension(self, reduced_dimension: Optional[int]) -> "CollectionConfig":
+        """Copie de la configuration pour une collection de disposition donnée."""
+        if reduced_dimension == self.reduced_dimension:
+            return self
+        return self.copy(update={"reduced_dimension": reduced_dimension})
+
+    @staticmethod
+    def _truncate(vector: List[float], size: int) -> List[float]:
+        """Tronque un embedding Matryoshka et le renormalise."""
+        head = np.asarray(vector[:size], dtype=np.float32)
+        norm = np.linalg.norm(head)
+        return (head / norm if norm > 0 else head).tolist()
+
+    def point_vector(self, vector: List[float]) -> Any:
+        """Vecteur(s) à écrire pour un point."""
+        if self.reduced_dimension is None:
+            return vector
+        return {FAST_VECTOR: self._truncate(vector, self.reduced_dimension), FULL_VECTOR: list(vector)}
+
+    def batch_vectors(self, vectors: np.ndarray) -> Any:
+        """Équivalent de point_vector pour une matrice (chargement en bloc)."""
+        if self.reduced_dimension is None:
+            return vectors
+        head = np.asarray(vectors[:, :self.reduced_dimension], dtype=np.float32)
+        head = head / np.linalg.norm(head, axis=1, keepdims=True).clip(min=1e-12)
+        return {FAST_VECTOR: head, FULL_VECTOR: np.asarray(vectors, dtype=np.float32)}
+
+    def query_vector(self, vector: List[float]) -> Any:
+        """Vecteur de requête de la première passe HNSW."""
+        if self.reduced_dimension is None:
+            return vector
+        return models.NamedVector(name=FAST_VECTOR, vector=self._truncate(vector, self.reduced_dimension))
+
+    def search_limit(self, limit: int) -> int:
+        """Nombre de candidats de la première passe."""
+        if self.reduced_dimension is None:
+            return limit
+        return int(limit * self.reduced_oversampling)
+
+    def search_vectors(self, with_vectors: bool) -> Any:
+        """Vecteurs renvoyés avec les résultats (le vecteur complet pour le re-scoring)."""
+        if self.reduced_dimension is None:
+            return with_vectors
+        return [FULL_VECTOR]
+
+    @staticmethod
+    def full_vector(vector: Any) -> Optional[List[float]]:
+        """Vecteur complet d'un point, quelle que soit la disposition de la collection."""
+        if isinstance(vector, dict):
+            return vector.get(FULL_VECTOR)
+        return vector
+
+    def rescore(self, query_vector: List[float], hits: List[Any], limit: Optional[int] = None) -> List[Any]:
+        """
+        Re-score exact (cosinus sur les vecteurs complets, calcul NumPy vectorisé)
+        des candidats de la première passe; sans effet hors dimension réduite.
+        """
+        if self.reduced_dimension is None or not hits:
+            return hits[:limit] if limit is not None else hits
+
+        vectors = np.asarray([self.full_vector(hit.vector) for hit in hits], dtype=np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True).clip(min=1e-12)
+        query = np.asarray(query_vector, dtype=np.float32)
+        query /= max(float(np.linalg.norm(query)), 1e-12)
+        scores = vectors @ query
+
+        order = np.argsort(-scores)[:limit]
+        return [
+            hits[i].copy(update={"score": float(scores[i]), "vector": vectors[i].tolist()})
+            for i in order
+        ]
+
+    def hnsw_config(self) -> models.HnswConfigDiff:
+        return models.HnswConfigDiff(m=self.hnsw_m, ef_construct=self.hnsw_ef_construct)
+
+    def quantization_config(self) -> Optional[models.QuantizationConfig]:
+        if self.quantization == "scalar":
+            return models.ScalarQuantization(
+                scalar=models.ScalarQuantizationConfig(
+                    type=models.ScalarType.INT8,
+                    quantile=0.99,
+                    always_ram=self.quantization_always_ram
+                )
+            )
+        if self.quantization == "binary":
+            return models.BinaryQuantization(
+                binary=models.BinaryQuantizationConfig(always_ram=self.quantization_always_ram)
+            )
+        if self.quantization != "none":
+            logger.warning(f"Quantification inconnue ignorée: {self.quantization}")
+        return None
+
+    def search_params(self) -> Optional[models.SearchParams]:
+        quantization = None
+        if self.quantization in ("scalar", "binary"):
+            quantization = models.QuantizationSearchParams(
+                rescore=self.quantization_rescore,
+                oversampling=self.quantization_oversampling
+            )
+        if self.search_ef is None and quantization is None:
+            return None
+        return models.SearchParams(hnsw_ef=self.search_ef, quantization=quantization)
+
+
 class VectorService:
     """Service pour la gestion de la base de données vectorielle (Qdrant)."""
     
-    def __init__(self):
-        # Connexion à Qdrant
-        qdrant_uri = os.getenv("QDRANT_URI", "http://qdrant:6333")
-        self.client = QdrantClient(url=qdrant_uri)
+    def __init__(self, collection_config: Optional[CollectionConfig] = None):
+        # Backend vectoriel: "qdrant" (serveur) ou "local" (index NumPy embarqué)
+        self.backend = os.getenv("VECTOR_BACKEND", "qdrant").lower()
+        self.local_fallback = os.getenv("VECTOR_FALLBACK_LOCAL", "false").lower() == "true"
+        
+        if self.backend == "local":
+            self.client = get_local_vector_client()
+        else:
+            # Connexion à Qdrant
+            qdrant_uri = os.getenv("QDRANT_URI", "http://qdrant:6333")
+            self.client = QdrantClient(url=qdrant_uri)
+        
+        # Nom de la collection pour les précédents juridiques. Avec Qdrant, c'est un
+        # alias pointant vers une collection versionnée (legal_precedents_vN)
+        self.collection_name = os.getenv("PRECEDENT_COLLECTION", "legal_precedents")
+        self.alias_ttl = float(os.getenv("PRECEDENT_ALIAS_TTL", "30"))
+        
+        # Modèle d'embedding des nouvelles collections et dimensionnalité des vecteurs
+        self.embedding_model = os.getenv("EMBEDDING_MODEL", DEFAULT_EMBEDDING_MODEL)
+        self.vector_size = embedding_dimension(self.embedding_model)
+        
+        # Paramètres HNSW, stockage sur disque et quantification
+        self.collection_config = collection_config or CollectionConfig.from_env()
+        
+        # Recherche hybride (dense + BM25) fusionnée par Reciprocal Rank Fusion
+        self.hybrid_search = os.getenv("PRECEDENT_HYBRID_SEARCH", "true").lower() == "true"
+        self.rrf_k = int(os.getenv("PRECEDENT_RRF_K", "60"))
+        self.hybrid_candidates_factor = int(os.getenv("PRECEDENT_HYBRID_CANDIDATES_FACTOR", "4"))
+        
+        # Découpage des précédents longs en passages (un point par passage, regroupés
+        # par parent_id) et diversification des résultats par MMR
+        self.passage_words = int(os.getenv("PRECEDENT_PASSAGE_WORDS", "200"))
+        self.passage_overlap = int(os.getenv("PRECEDENT_PASSAGE_OVERLAP", "50"))
+        self.passage_oversampling = int(os.getenv("PRECEDENT_PASSAGE_OVERSAMPLING", "3"))
+        self.mmr = os.getenv("PRECEDENT_MMR", "true").lower() == "true"
+        self.mmr_lambda = float(os.getenv("PRECEDENT_MMR_LAMBDA", "0.7"))
         
-        # Nom de la collection pour les précédents juridiques
-        self.collection_name = "legal_precedents"
+        # Re-classement des candidats par un cross-encoder local (None si désactivé)
+        self.reranker = get_reranker()
+        self.rerank_candidates = int(os.getenv("PRECEDENT_RERANK_CANDIDATES", "50"))
         
-        # Dimensionnalité des vecteurs
-        self.vector_size = 768
+        # Listes restreintes de passages par (type de document, type de clause),
+        # interrogées en mémoire avant la collection complète
+        self.shortlists = os.getenv("PRECEDENT_SHORTLIST", "true").lower() == "true"
+        self.shortlist_size = int(os.getenv("PRECEDENT_SHORTLIST_SIZE", "200"))
+        self.shortlist_min_score = float(os.getenv("PRECEDENT_SHORTLIST_MIN_SCORE", "0.5"))
+        self.shortlist_rebuild = int(os.getenv("PRECEDENT_SHORTLIST_REBUILD", "200"))
+        
+        # Doublons à l'ingestion: "merge" (fusion des métadonnées dans le précédent
+        # existant), "skip" (ignoré) ou "off"
+        self.dedup_mode = os.getenv("PRECEDENT_DEDUP", "merge").lower()
+        self.dedup_threshold = float(os.getenv("PRECEDENT_DEDUP_THRESHOLD", "0.8"))
+        
+        # Artefact de précédents pré-vectorisés (scripts/build_precedent_snapshot.py)
+        self.snapshot_dir = os.getenv("PRECEDENT_SNAPSHOT_DIR", DEFAULT_SNAPSHOT_DIR)
+        # Image construite avec l'artefact: son absence au démarrage est une erreur
+        self.snapshot_required = os.getenv("PRECEDENT_SNAPSHOT_REQUIRED", "false").lower() == "true"
+        
+        # Cache des résultats de recherche (None si désactivé) et versions des données
+        # des collections (invalidation du cache et des index en mémoire)
+        self.search_cache = get_search_cache()
+        self.versions = get_collection_versions()
         
         # Initialiser la collection si elle n'existe pas
+        try:
+            self._init_collection()
+        except Exception as e:
+            if not self._switch_to_local_backend(e):
+                raise
+    
+    @property
+    def _cache_key(self) -> str:
+        """Clé des caches de module (index lexical, collections initialisées)."""
+        return f"{self.backend}:{self.collection_name}"
+    
+    def _switch_to_local_backend(self, error: Exception) -> bool:
+        """Bascule sur l'index local si Qdrant est indisponible et que le repli est activé."""
+        if self.backend == "local" or not self.local_fallback:
+            return False
+        logger.warning(f"Qdrant indisponible ({str(error)}), repli sur l'index vectoriel local")
+        self.backend = "local"
+        self.client = get_local_vector_client()
         self._init_collection()
-        
+        return True
+    
+    @property
+    def supports_aliases(self) -> bool:
+        """Les alias (et donc la réindexation sans interruption) n'existent que dans Qdrant."""
+        return self.backend != "local"
+    
+    def versioned_collection_name(self, version: int) -> str:
+        return f"{self.collection_name}_v{version}"
+    
+    def collection_versions(self) -> List[int]:
+        """Numéros de version des collections existantes (legal_precedents_vN)."""
+        pattern = re.compile(rf"^{re.escape(self.collection_name)}_v(\d+)$")
+        versions = []
+        for col in self.client.get_collections().collections:
+            match = pattern.match(col.name)
+            if match:
+                versions.append(int(match.group(1)))
+        return sorted(versions)
+    
+    def alias_target(self) -> Optional[str]:
+        """Collection actuellement désignée par l'alias (None si pas d'alias)."""
+        for alias in self.client.get_aliases().aliases:
+            if alias.alias_name == self.collection_name:
+                return alias.collection_name
+        return None
+    
+    def create_collection(self, collection_name: str, vector_size: int):
+        """Crée une collection avec la configuration de stockage et les index de payload."""
+        config = self.collection_config
+        if not self.supports_aliases:
+            # L'index local est exact: pas de première passe en dimension réduite
+            config = config.with_reduced_dimension(None)
+        vectors_config = config.vectors_config(vector_size)
+        self.client.create_collection(
+            collection_name=collection_name,
+            vectors_config=vectors_config,
+            hnsw_config=config.hnsw_config(),
+            quantization_config=config.quantization_config()
+        )
+        _collection_reduced_dimensions[f"{self.backend}:{collection_name}"] = (
+            config.reduced_dimension if isinstance(vectors_config, dict) else None
+        )
+        self._create_payload_indexes(collection_name)
+    
+    def collection_reduced_dimension(self, collection_name: str) -> Optional[int]:
+        """Dimension du vecteur "fast" d'une collection (None si vecteur unique)."""
+        key = f"{self.backend}:{collection_name}"
+        if key not in _collection_reduced_dimensions:
+            reduced_dimension = None
+            if self.supports_aliases:
+                vectors = self.client.get_collection(collection_name).config.params.vectors
+                if isinstance(vectors, dict) and FAST_VECTOR in vectors:
+                    reduced_dimension = vectors[FAST_VECTOR].size
+            _collection_reduced_dimensions[key] = reduced_dimension
+        return _collection_reduced_dimensions[key]
+    
+    def config_for(self, collection_name: str) -> CollectionConfig:
+        """
+        Configuration effective d'une collection: la disposition des vecteurs est
+        celle de la collection existante (une nouvelle valeur de
+        QDRANT_REDUCED_DIMENSION s'applique à la prochaine version).
+        """
+        return self.collection_config.with_reduced_dimension(self.collection_reduced_dimension(collection_name))
+    
+    def _create_payload_indexes(self, collection_name: str):
+        """Index de payload pour le filtrage (sans effet s'ils existent déjà)."""
+        for field_name, field_schema in PAYLOAD_INDEXES.items():
+            try:
+                self.client.create_payload_index(
+                    collection_name=collection_name,
+                    field_name=field_name,
+                    field_schema=field_schema
+                )
+            except Exception as e:
+                logger.warning(f"Index de payload {field_name} non créé: {str(e)}")
+    
     def _init_collection(self):
-        """Initialise la collection Qdrant si elle n'existe pas."""
+        """Initialise la collection Qdrant et ses index de payload si nécessaire."""
+        if self._cache_key in _initialized_collections:
+            return
+        
         collections = self.client.get_collections().collections
         collection_names = [col.name for col in collections]
         
-        if self.collection_name not in collection_names:
-            # Créer la collection
-            self.client.create_collection(
-                collection_name=self.collection_name,
-                vectors_config=models.VectorParams(
-                    size=self.vector_size,
-                    distance=models.Distance.COSINE
+        target = self.alias_target() if self.supports_aliases else None
+        pending = self.pending_alias() if self.supports_aliases and target is None else None
+        
+        if not self.supports_aliases:
+            if self.collection_name not in collection_names:
+                self.create_collection(self.collection_name, self.vector_size)
+        elif target is not None:
+            self._create_payload_indexes(target)
+        elif pending is not None:
+            # Migration initiale interrompue (collection historique peut-être déjà supprimée)
+            self.finish_alias_migration(pending)
+        elif self.collection_name in collection_names:
+            # Collection historique non versionnée: utilisée telle quelle jusqu'à la
+            # première réindexation, qui la remplacera par un alias
+            self._create_payload_indexes(self.collection_name)
+        else:
+            versions = self.collection_versions()
+            if versions:
+                raise RuntimeError(
+                    f"Alias {self.collection_name} absent alors que des versions existent "
+                    f"({', '.join(self.versioned_collection_name(v) for v in versions)}): "
+                    f"créer l'alias vers la version à servir"
                 )
+            # Première installation: collection v1 désignée par l'alias
+            version = self.versioned_collection_name(1)
+            self.create_collection(version, self.vector_size)
+            self.client.update_collection_aliases(
+                change_aliases_operations=[
+                    models.CreateAliasOperation(
+                        create_alias=models.CreateAlias(
+                            collection_name=version,
+                            alias_name=self.collection_name
+                        )
+                    )
+                ]
             )
+        
+        _initialized_collections.add(self._cache_key)
+    
+    def resolve_collection(self, fresh: bool = False) -> Tuple[str, str]:
+        """
+        Retourne la collection concrète à interroger et son modèle d'embedding.
+        
+        Le couple reste cohérent pendant une réindexation: tant que le cache
+        d'alias n'a pas expiré, on continue d'interroger l'ancienne version
+        (conservée) avec l'ancien modèle.
+        """
+        collection = self.collection_name
+        if self.supports_aliases:
+            cached = _alias_targets.get(self._cache_key)
+            if cached and not fresh and cached[1] > time.monotonic():
+                collection = cached[0]
+            else:
+                collection = self.alias_target() or self.unaliased_collection()
+                _alias_targets[self._cache_key] = (collection, time.monotonic() + self.alias_ttl)
+        return collection, self.collection_model(collection)
+    
+    def unaliased_collection(self) -> str:
+        """
+        Collection interrogée en l'absence d'alias: la version inscrite par une
+        migration initiale en cours (dont la bascule est alors terminée si
+        possible), sinon la collection historique.
+        """
+        target = self.pending_alias()
+        if target is None:
+            return self.collection_name
+        try:
+            self.finish_alias_migration(target)
+        except Exception as e:
+            logger.error(f"Création de l'alias {self.collection_name} -> {target} impossible: {str(e)}")
+        return target
+    
+    def pending_alias(self) -> Optional[str]:
+        """Version que l'alias doit désigner si une migration initiale est en cours."""
+        journal = self.reindex_journal
+        if journal is None:
+            return None
+        try:
+            return journal.pending_alias()
+        except Exception as e:
+            logger.error(f"Lecture de la migration en cours impossible: {str(e)}")
+            return None
+    
+    def finish_alias_migration(self, target: str):
+        """
+        Termine la migration initiale: supprime la collection historique si elle
+        existe encore, crée l'alias vers `target` et efface la migration en cours.
+        """
+        names = {col.name for col in self.client.get_collections().collections}
+        if self.collection_name in names:
+            logger.warning(f"Suppression de la collection historique non versionnée {self.collection_name} (copiée dans {target})")
+            self.client.delete_collection(self.collection_name)
+        if self.alias_target() is None:
+            self.client.update_collection_aliases(change_aliases_operations=[
+                models.CreateAliasOperation(create_alias=models.CreateAlias(
+                    collection_name=target, alias_name=self.collection_name
+                ))
+            ])
+            logger.info(f"Alias {self.collection_name} -> {target} créé")
+        self.reindex_journal.clear_pending_alias()
+    
+    @property
+    def reindex_journal(self) -> Optional[ReindexJournal]:
+        """Coordination des écritures avec les réindexations (Qdrant uniquement)."""
+        if not self.supports_aliases:
+            return None
+        if getattr(self, "_reindex_journal", None) is None:
+            self._reindex_journal = ReindexJournal(self._cache_key)
+        return self._reindex_journal
     
-    async def _vectorize(self, text: str) -> List[float]:
+    @asynccontextmanager
+    async def writing(self):
+        """Écriture dans la version active, suspendue pendant la bascule d'une réindexation."""
+        journal = self.reindex_journal
+        if journal is None:
+            yield
+            return
+        async with journal.writing():
+            yield
+    
+    def record_writes(self, precedent_ids: Iterable[str]):
+        """Signale les précédents modifiés à une réindexation en cours (recopiés avant la bascule)."""
+        journal = self.reindex_journal
+        if journal is not None:
+            journal.record(precedent_ids)
+    
+    def collection_model(self, collection_name: str) -> str:
+        """
+        Modèle d'embedding d'une collection, lu dans le payload de ses points.
+        
+        Les points de la collection historique (768 dimensions) ne portent pas
+        de modèle: il est alors déduit de la dimension des vecteurs de la
+        collection, pour ne pas l'interroger avec des vecteurs d'une autre
+        dimension avant sa réindexation.
+        """
+        key = f"{self.backend}:{collection_name}"
+        model = _collection_models.get(key)
+        if model is not None:
+            return model
+        
+        points, _ = self.client.scroll(
+            collection_name=collection_name,
+            limit=1,
+            with_payload=True,
+            with_vectors=False
+        )
+        model = (points[0].payload or {}).get("embedding_model") if points else None
+        if not model:
+            model = self.model_for_dimension(self.collection_vector_size(collection_name))
+        _collection_models[key] = model
+        return model
+    
+    def collection_vector_size(self, collection_name: str) -> Optional[int]:
+        """Dimension des vecteurs (complets) d'une collection Qdrant, None si inconnue."""
+        if not self.supports_aliases:
+            return None
+        vectors = self.client.get_collection(collection_name).config.params.vectors
+        if isinstance(vectors, dict):
+            vectors = vectors.get(FULL_VECTOR)
+        return getattr(vectors, "size", None)
+    
+    def model_for_dimension(self, size: Optional[int]) -> str:
+        """Modèle produisant des vecteurs de `size` dimensions (le modèle configuré en priorité)."""
+        if size is None or embedding_dimension(self.embedding_model) == size:
+            return self.embedding_model
+        for model, dimension in EMBEDDING_DIMENSIONS.items():
+            if dimension == size:
+                return model
+        logger.warning(f"Aucun modèle d'embedding connu en {size} dimensions, utilisation de {self.embedding_model}")
+        return self.embedding_model
+    
+    async def _vectorize(self, text: str, model: Optional[str] = None) -> List[float]:
         """
         Convertit un texte en embedding vectoriel via LLMService.
         En cas d'erreur, renvoie un vecteur aléatoire (fallback).
         """
+        model = model or self.embedding_model
         try:
             llm_service = LLMService()
             # IMPORTANT: on "await" l'appel pour obtenir réellement la liste de floats
-            embedding = await llm_service.get_embedding(text)
+            embedding = await llm_service.get_embedding(text, model=model)
             return embedding
         except Exception as e:
             logger.error(f"Erreur lors de la vectorisation: {str(e)}", exc_info=True)
@@ -62,42 +619,601 @@ class VectorService:
             import hashlib
             seed = int(hashlib.md5(text.encode()).hexdigest(), 16) % (10 ** 8)
             np.random.seed(seed)
-            return np.random.random(self.vector_size).tolist()
+            return np.random.random(embedding_dimension(model)).tolist()
+    
+    async def _vectorize_many(self, texts: List[str], model: Optional[str] = None) -> List[List[float]]:
+        """Vectorise plusieurs textes en un appel, avec repli texte par texte."""
+        model = model or self.embedding_model
+        try:
+            return await LLMService().get_embeddings(texts, model=model)
+        except Exception as e:
+            logger.error(f"Erreur lors de la vectorisation par lot: {str(e)}")
+            return [await self._vectorize(text, model) for text in texts]
+        
+    @staticmethod
+    def _point_id(precedent_id: str):
+        """Convertit un ID textuel en ID de point Qdrant (entier ou UUID)."""
+        return int(precedent_id) if precedent_id.isdigit() else precedent_id
+    
+    @staticmethod
+    def _passage_point_id(precedent_id: str, position: int) -> str:
+        """Le premier passage porte l'ID du précédent, les suivants un ID dérivé."""
+        if position == 0:
+            return precedent_id
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{precedent_id}:{position}"))
+    
+    @staticmethod
+    def precedent_payload(
+        title: str,
+        description: str,
+        precedent_type: str,
+        relevance: str,
+        source: Optional[str],
+        jurisdiction: Optional[str],
+        document_types: Optional[List[str]],
+        model: str
+    ) -> Dict[str, Any]:
+        """Payload d'un précédent (commun à tous ses passages, hors description)."""
+        created_at = datetime.now()
+        payload = {
+            "title": title,
+            "description": description,
+            "type": precedent_type,
+            "relevance": relevance,
+            "created_at": created_at.isoformat(),
+            "created_at_ts": created_at.timestamp()
+        }
+        if source:
+            payload["source"] = source
+        if jurisdiction:
+            payload["jurisdiction"] = jurisdiction
+        if document_types:
+            payload["document_types"] = document_types
+        payload["embedding_model"] = model
+        return payload
+    
+    @classmethod
+    def passage_payloads(
+        cls,
+        precedent_id: str,
+        payload: Dict[str, Any],
+        passages: List[str]
+    ) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Couples (ID de point, payload) des passages d'un précédent; seul le
+        premier passage conserve la description complète.
+        """
+        points = []
+        for position, passage in enumerate(passages):
+            passage_payload = {**payload, "parent_id": precedent_id, "passage_index": position}
+            if len(passages) > 1:
+                passage_payload["passage"] = passage
+            if position > 0:
+                del passage_payload["description"]
+            points.append((cls._passage_point_id(precedent_id, position), passage_payload))
+        return points
+    
+    @staticmethod
+    def _parent_id(point: Any) -> str:
+        """ID du précédent auquel appartient un point (passage)."""
+        return (point.payload or {}).get("parent_id") or str(point.id)
+    
+    @staticmethod
+    def _lexical_text(payload: Dict[str, Any]) -> str:
+        """Texte indexé lexicalement: titre, description et source."""
+        return " ".join(
+            payload.get(field) or "" for field in ("title", "description", "source")
+        )
+    
+    @staticmethod
+    def _rerank_text(payload: Optional[Dict[str, Any]]) -> str:
+        """Texte d'un précédent présenté au cross-encoder."""
+        payload = payload or {}
+        return f"{payload.get('title', '')}. {payload.get('description') or payload.get('passage', '')}"
+    
+    @staticmethod
+    def _lexical_metadata(payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Champs filtrables conservés dans l'index lexical."""
+        return {field: payload.get(field) for field in PAYLOAD_INDEXES}
+    
+    @staticmethod
+    def _build_filter(filters: Optional[PrecedentFilters]) -> Optional[models.Filter]:
+        """Traduit les filtres de recherche en filtre Qdrant."""
+        if filters is None or filters.is_empty():
+            return None
+        
+        must = []
+        if filters.type:
+            must.append(models.FieldCondition(key="type", match=models.MatchValue(value=filters.type)))
+        if filters.jurisdiction:
+            must.append(models.FieldCondition(key="jurisdiction", match=models.MatchValue(value=filters.jurisdiction)))
+        if filters.document_type:
+            # Un précédent sans types de documents déclarés s'applique à tous les types
+            must.append(models.Filter(should=[
+                models.FieldCondition(key="document_types", match=models.MatchValue(value=filters.document_type)),
+                models.IsEmptyCondition(is_empty=models.PayloadField(key="document_types"))
+            ]))
+        if filters.created_after or filters.created_before:
+            must.append(models.FieldCondition(
+                key="created_at_ts",
+                range=models.Range(
+                    gte=filters.created_after.timestamp() if filters.created_after else None,
+                    lte=filters.created_before.timestamp() if filters.created_before else None
+                )
+            ))
+        return models.Filter(must=must)
+    
+    @staticmethod
+    def _matches_filters(metadata: Dict[str, Any], filters: Optional[PrecedentFilters]) -> bool:
+        """Équivalent local de _build_filter, appliqué aux résultats lexicaux."""
+        if filters is None or filters.is_empty():
+            return True
+        if filters.type and metadata.get("type") != filters.type:
+            return False
+        if filters.jurisdiction and metadata.get("jurisdiction") != filters.jurisdiction:
+            return False
+        if filters.document_type:
+            document_types = metadata.get("document_types") or []
+            if document_types and filters.document_type not in document_types:
+                return False
+        if filters.created_after or filters.created_before:
+            created_at_ts = metadata.get("created_at_ts")
+            if created_at_ts is None:
+                return False
+            if filters.created_after and created_at_ts < filters.created_after.timestamp():
+                return False
+            if filters.created_before and created_at_ts > filters.created_before.timestamp():
+                return False
+        return True
+    
+    @staticmethod
+    def _to_precedent(payload: Optional[Dict[str, Any]], score: float) -> Precedent:
+        """Construit un Precedent à partir d'un payload Qdrant."""
+        payload = payload or {}
+        return Precedent(
+            title=payload.get("title", ""),
+            description=payload.get("description", ""),
+            type=payload.get("type", ""),
+            relevance=payload.get("relevance", ""),
+            source=payload.get("source"),
+            similarity_score=score
+        )
+    
+    def _data_version(self, collection: str) -> str:
+        """Version courante des données d'une collection (partagée entre processus)."""
+        return self.versions.get(f"{self.backend}:{collection}")
+    
+    def _data_written(self, collection: str, *indexes):
+        """
+        Signale une écriture dans la collection: invalide le cache de recherche et
+        les index en mémoire des autres processus. Les `indexes` déjà mis à jour
+        par l'écriture restent valides s'ils étaient à jour juste avant elle.
+        """
+        version = self.versions.bump(f"{self.backend}:{collection}")
+        for index in indexes:
+            if index is None or index.data_version is None:
+                continue
+            indexed_collection, indexed_version = index.data_version
+            if indexed_collection == collection and CollectionVersions.follows(indexed_version, version):
+                index.data_version = (collection, version)
+    
+    def _get_lexical_index(self) -> BM25Index:
+        """
+        Retourne l'index BM25 de la collection, en le construisant au premier appel
+        (ou quand la collection a été modifiée par un autre processus) à partir des
+        payloads stockés dans Qdrant.
+        """
+        collection, _ = self.resolve_collection()
+        data_version = (collection, self._data_version(collection))
+        index = _lexical_indexes.get(self._cache_key)
+        if index is not None and index.data_version == data_version:
+            return index
+        
+        # Version lue avant le parcours: une écriture concurrente provoquera une nouvelle reconstruction
+        index = BM25Index()
+        index.data_version = data_version
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=self.collection_name,
+                limit=256,
+                offset=offset,
+                with_payload=True,
+                with_vectors=False
+            )
+            # Un document lexical par précédent: seul le premier passage porte la description
+            index.add_many(
+                (
+                    self._parent_id(point),
+                    self._lexical_text(point.payload or {}),
+                    self._lexical_metadata(point.payload or {})
+                )
+                for point in points
+                if not (point.payload or {}).get("passage_index")
+            )
+            if offset is None:
+                break
+        
+        logger.info(f"Index lexical construit pour {self.collection_name}: {len(index)} documents")
+        _lexical_indexes[self._cache_key] = index
+        return index
+    
+    def _scroll_precedents(self, batch_size: int = 256):
+        """Parcourt les précédents de la collection (premier passage de chacun)."""
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=self.collection_name,
+                limit=batch_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=False
+            )
+            for point in points:
+                if not (point.payload or {}).get("passage_index"):
+                    yield point
+            if offset is None:
+                break
+    
+    def _get_duplicate_index(self, collection: Optional[str] = None) -> DuplicateIndex:
+        """
+        Retourne l'index MinHash/LSH de la collection, construit au premier appel
+        (ou quand la collection a été modifiée par un autre processus) à partir
+        des descriptions stockées.
+        """
+        collection = collection or self.resolve_collection(fresh=True)[0]
+        data_version = (collection, self._data_version(collection))
+        index = _duplicate_indexes.get(self._cache_key)
+        if index is not None and index.data_version == data_version:
+            return index
+        
+        index = DuplicateIndex(threshold=self.dedup_threshold)
+        index.data_version = data_version
+        for point in self._scroll_precedents():
+            index.add(self._parent_id(point), (point.payload or {}).get("description", ""))
+        
+        logger.info(f"Index de doublons construit pour {self.collection_name}: {len(index)} précédents")
+        _duplicate_indexes[self._cache_key] = index
+        return index
+    
+    @staticmethod
+    def _merged_metadata(
+        payload: Dict[str, Any],
+        source: Optional[str],
+        jurisdiction: Optional[str],
+        document_types: Optional[List[str]]
+    ) -> Dict[str, Any]:
+        """Métadonnées d'un précédent enrichies par celles d'un doublon."""
+        merged = {}
+        sources = list(payload.get("sources") or ([payload["source"]] if payload.get("source") else []))
+        if source and source not in sources:
+            sources.append(source)
+            merged["sources"] = sources
+        if jurisdiction and not payload.get("jurisdiction"):
+            merged["jurisdiction"] = jurisdiction
+        # Une liste vide signifie "tous les types de documents": elle l'emporte
+        existing_types = payload.get("document_types") or []
+        if existing_types:
+            new_types = existing_types + [t for t in document_types if t not in existing_types] if document_types else []
+            if new_types != existing_types:
+                merged["document_types"] = new_types
+        return merged
+    
+    def _precedent_selector(self, precedent_ids: List[str]) -> models.Filter:
+        """Filtre désignant tous les passages des précédents donnés."""
+        return models.Filter(should=[
+            models.FieldCondition(key="parent_id", match=models.MatchAny(any=precedent_ids)),
+            models.HasIdCondition(has_id=[self._point_id(precedent_id) for precedent_id in precedent_ids])
+        ])
+    
+    def _merge_into(self, collection: str, precedent_id: str, payload: Dict[str, Any], merged: Dict[str, Any]):
+        """Applique des métadonnées fusionnées à tous les passages d'un précédent."""
+        if not merged:
+            return
+        self.client.set_payload(
+            collection_name=collection,
+            payload=merged,
+            points=self._precedent_selector([precedent_id])
+        )
+        lexical_index = _lexical_indexes.get(self._cache_key)
+        if lexical_index is not None:
+            full_payload = {**payload, **merged}
+            lexical_index.add(precedent_id, self._lexical_text(full_payload), self._lexical_metadata(full_payload))
+        # Les payloads des listes restreintes sont périmés: elles seront reconstruites
+        _shortlist_indexes.pop(f"{self.backend}:{collection}", None)
+    
+    def _shortlist_key(
+        self,
+        filters: Optional[PrecedentFilters],
+        clause_type: Optional[str]
+    ) -> Optional[ShortlistKey]:
+        """
+        Couple (type de document, type de clause) de la liste restreinte applicable,
+        ou None si la recherche porte sur d'autres filtres que le type de document.
+        """
+        if not self.shortlists or not clause_type:
+            return None
+        filters = filters or PrecedentFilters()
+        if any(value is not None for field, value in filters.dict().items() if field != "document_type"):
+            return None
+        return filters.document_type or "", getattr(clause_type, "value", clause_type)
+    
+    def _get_shortlist_index(self, collection: str) -> ShortlistIndex:
+        key = f"{self.backend}:{collection}"
+        index = _shortlist_indexes.get(key)
+        if index is None:
+            index = _shortlist_indexes.setdefault(key, ShortlistIndex(self.shortlist_size))
+        return index
+    
+    def build_shortlist(self, collection: str, key: ShortlistKey, centroid: List[float]) -> PrecedentShortlist:
+        """
+        Précalcule la liste restreinte d'un couple (type de document, type de
+        clause): les passages applicables au type de document les plus proches
+        du centroïde.
+        """
+        document_type, _ = key
+        config = self.config_for(collection)
+        hits = self.client.search(
+            collection_name=collection,
+            query_vector=config.query_vector(centroid),
+            query_filter=self._build_filter(PrecedentFilters(document_type=document_type or None)),
+            search_params=config.search_params(),
+            limit=config.search_limit(self.shortlist_size),
+            with_vectors=config.search_vectors(True)
+        )
+        shortlist = PrecedentShortlist(centroid, self.shortlist_size)
+        for hit in config.rescore(centroid, hits, self.shortlist_size):
+            shortlist.consider(str(hit.id), hit.payload or {}, CollectionConfig.full_vector(hit.vector))
+        self._get_shortlist_index(collection).set(key, shortlist)
+        return shortlist
+    
+    def precompute_shortlists(self, centroids: Dict[ShortlistKey, List[float]]) -> Dict[str, int]:
+        """Construit les listes restreintes à partir de centroïdes connus (ex: corpus de clauses)."""
+        collection, _ = self.resolve_collection(fresh=True)
+        return {
+            f"{document_type or '*'}:{clause_type}": len(self.build_shortlist(collection, (document_type, clause_type), centroid))
+            for (document_type, clause_type), centroid in centroids.items()
+        }
+    
+    def _shortlist_search(
+        self,
+        collection: str,
+        key: ShortlistKey,
+        query_vector: List[float],
+        passage_limit: int,
+        limit: int
+    ) -> Optional[List[Any]]:
+        """
+        Recherche exacte dans la liste restreinte du couple (construite au premier
+        appel, puis recentrée sur les requêtes reçues). Renvoie None si les scores
+        sont insuffisants: la collection complète est alors interrogée.
+        """
+        shortlist = self._get_shortlist_index(collection).get(key)
+        if shortlist is None:
+            shortlist = self.build_shortlist(collection, key, query_vector)
+        else:
+            shortlist.observe(query_vector)
+            if shortlist.queries_since_build >= self.shortlist_rebuild:
+                queries = shortlist.queries
+                shortlist = self.build_shortlist(collection, key, shortlist.centroid.tolist())
+                shortlist.queries = queries
         
+        hits = [
+            models.ScoredPoint(id=point_id, version=0, score=score, payload=payload, vector=vector)
+            for point_id, score, payload, vector in shortlist.search(query_vector, passage_limit)
+        ]
+        grouped = group_by_parent(hits, self._parent_id)
+        if len(grouped) < limit or grouped[limit - 1].score < self.shortlist_min_score:
+            return None
+        return hits
+    
+    def _learn_shortlist(self, collection: str, key: ShortlistKey, hits: List[Any]):
+        """Après un repli sur la collection complète, propose ses résultats à la liste restreinte."""
+        shortlist = self._get_shortlist_index(collection).get(key)
+        if shortlist is None:
+            return
+        for hit in hits:
+            vector = CollectionConfig.full_vector(hit.vector)
+            if vector is not None:
+                shortlist.consider(str(hit.id), hit.payload or {}, vector)
+    
     async def search_precedents(
         self,
         query: str,
-        limit: int = 10
+        limit: int = 10,
+        hybrid: Optional[bool] = None,
+        filters: Optional[PrecedentFilters] = None,
+        clause_type: Optional[str] = None
     ) -> List[Precedent]:
         """
-        Recherche des précédents juridiques similaires dans Qdrant.
-        Retourne une liste de Precedent.
+        Recherche des précédents juridiques, en passant par le cache de résultats.
+        
+        La clé de cache combine la requête normalisée, la limite, le mode, les filtres,
+        le type de clause, la collection active et sa version de données
+        (incrémentée à chaque ajout).
         """
-        # 1) Vectoriser la requête (avec await)
-        query_vector = await self._vectorize(query)
+        use_hybrid = self.hybrid_search if hybrid is None else hybrid
+        clause_type = getattr(clause_type, "value", clause_type)
+        if self.search_cache is None:
+            return await self._search_precedents(query, limit, use_hybrid, filters, clause_type)
         
-        # 2) Appeler Qdrant pour la similarité
-        search_result = self.client.search(
-            collection_name=self.collection_name,
-            query_vector=query_vector,  # liste[float]
-            limit=limit
+        try:
+            collection, _ = self.resolve_collection()
+        except Exception as e:
+            if not self._switch_to_local_backend(e):
+                raise
+            collection, _ = self.resolve_collection()
+        cache_key = self.search_cache.make_key(
+            f"{self.backend}:{collection}",
+            query,
+            limit=limit,
+            hybrid=use_hybrid,
+            filters=filters.dict() if filters is not None else None,
+            clause_type=clause_type
         )
+        cached = self.search_cache.get(cache_key)
+        if cached is not None:
+            return [Precedent(**item) for item in cached]
         
-        # 3) Convertir en liste de Precedent
-        precedents = []
-        for result in search_result:
-            payload = result.payload or {}
-            precedent = Precedent(
-                title=payload.get("title", ""),
-                description=payload.get("description", ""),
-                type=payload.get("type", ""),
-                relevance=payload.get("relevance", ""),
-                source=payload.get("source"),
-                similarity_score=result.score
-            )
-            precedents.append(precedent)
+        start = time.perf_counter()
+        precedents = await self._search_precedents(query, limit, use_hybrid, filters, clause_type)
+        self.search_cache.set(
+            cache_key,
+            [precedent.dict() for precedent in precedents],
+            compute_ms=(time.perf_counter() - start) * 1000
+        )
         return precedents
     
+    async def _search_precedents(
+        self,
+        query: str,
+        limit: int,
+        use_hybrid: bool,
+        filters: Optional[PrecedentFilters] = None,
+        clause_type: Optional[str] = None
+    ) -> List[Precedent]:
+        """
+        Recherche des précédents juridiques similaires dans Qdrant.
+        
+        En mode hybride, la recherche dense est complétée par une recherche BM25
+        (titre, description, source) afin de retrouver les références exactes
+        ("article L1237-19", "n°20-22.210"), puis les deux classements sont
+        fusionnés par Reciprocal Rank Fusion.
+        Les filtres (type, juridiction, type de document, date) sont appliqués
+        pendant la recherche HNSW grâce aux index de payload.
+        Avec un type de clause, la recherche dense interroge d'abord la liste
+        restreinte du couple (type de document, type de clause).
+        Retourne une liste de Precedent.
+        """
+        candidate_limit = limit * self.hybrid_candidates_factor if (use_hybrid or self.mmr) else limit
+        if self.reranker is not None and self.reranker.available:
+            candidate_limit = max(candidate_limit, self.rerank_candidates)
+        
+        async def dense_search():
+            # 1) Vectoriser la requête avec le modèle de la collection interrogée
+            collection, model = self.resolve_collection()
+            query_vector = await self._vectorize(query, model)
+            
+            # 2) Appeler Qdrant pour la similarité; plusieurs passages d'un même
+            # précédent pouvant sortir, on sur-échantillonne avant regroupement.
+            # En dimension réduite, les candidats sont re-scorés sur les vecteurs complets
+            config = self.config_for(collection)
+            passage_limit = candidate_limit * self.passage_oversampling
+            shortlist_key = self._shortlist_key(filters, clause_type)
+            if shortlist_key is not None:
+                shortlist_hits = self._shortlist_search(collection, shortlist_key, query_vector, passage_limit, limit)
+                if shortlist_hits is not None:
+                    return collection, query_vector, shortlist_hits
+            
+            search_result = self.client.search(
+                collection_name=collection,
+                query_vector=config.query_vector(query_vector),
+                query_filter=self._build_filter(filters),
+                search_params=config.search_params(),
+                limit=config.search_limit(passage_limit),
+                with_vectors=config.search_vectors(self.mmr)
+            )
+            search_result = config.rescore(query_vector, search_result, passage_limit)
+            if shortlist_key is not None:
+                self._learn_shortlist(collection, shortlist_key, search_result)
+            return collection, query_vector, search_result
+        
+        try:
+            collection, query_vector, search_result = await dense_search()
+        except Exception as e:
+            if not self._switch_to_local_backend(e):
+                raise
+            collection, query_vector, search_result = await dense_search()
+        
+        # 3) Un seul résultat par précédent: son meilleur passage
+        grouped = group_by_parent(search_result, self._parent_id)[:candidate_limit]
+        dense_hits = {self._parent_id(result): result for result in grouped}
+        
+        # 4) Recherche lexicale puis fusion des deux classements
+        if use_hybrid:
+            lexical_hits = self._get_lexical_index().search(
+                query,
+                candidate_limit,
+                where=lambda metadata: self._matches_filters(metadata, filters)
+            )
+            ranked = reciprocal_rank_fusion(
+                [
+                    list(dense_hits),
+                    [doc_id for doc_id, _ in lexical_hits]
+                ],
+                k=self.rrf_k,
+                limit=candidate_limit
+            )
+        else:
+            ranked = [(doc_id, result.score) for doc_id, result in dense_hits.items()]
+        
+        # 5) Récupérer les précédents trouvés uniquement par la recherche lexicale et
+        # le premier passage (qui porte la description) de ceux trouvés par un autre
+        # passage; le score d'un précédent lexical reste une similarité cosinus
+        lexical_only = [doc_id for doc_id, _ in ranked if doc_id not in dense_hits]
+        missing = lexical_only + [
+            doc_id for doc_id, _ in ranked
+            if doc_id in dense_hits and "description" not in (dense_hits[doc_id].payload or {})
+        ]
+        parents = {}
+        if missing:
+            points = self.client.retrieve(
+                collection_name=collection,
+                ids=[self._point_id(doc_id) for doc_id in missing],
+                with_payload=True,
+                with_vectors=self.config_for(collection).search_vectors(bool(lexical_only))
+            )
+            parents = {str(point.id): point for point in points}
+        
+        query_array = np.asarray(query_vector, dtype=np.float32)
+        query_norm = np.linalg.norm(query_array) or 1.0
+        candidates = []
+        for doc_id, rank_score in ranked:
+            if doc_id in dense_hits:
+                hit = dense_hits[doc_id]
+                payload = parents[doc_id].payload if doc_id in parents else hit.payload
+                candidates.append((payload, hit.score, hit.vector, rank_score))
+            elif doc_id in parents:
+                point = parents[doc_id]
+                full_vector = CollectionConfig.full_vector(point.vector)
+                vector = np.asarray(full_vector, dtype=np.float32)
+                score = float(vector @ query_array / ((np.linalg.norm(vector) or 1.0) * query_norm))
+                candidates.append((point.payload, score, full_vector, rank_score))
+        
+        # 6) Re-classement par cross-encoder: son score calibré dans [0, 1] devient
+        # le score de similarité et la pertinence utilisée par MMR
+        reranked = False
+        if self.reranker is not None and candidates:
+            rerank_scores = await self.reranker.score(
+                query,
+                [self._rerank_text(payload) for payload, _, _, _ in candidates]
+            )
+            if rerank_scores is not None:
+                candidates = sorted(
+                    [
+                        (payload, rerank_score, vector, rerank_score)
+                        for (payload, _, vector, _), rerank_score in zip(candidates, rerank_scores)
+                    ],
+                    key=lambda candidate: candidate[3],
+                    reverse=True
+                )
+                reranked = True
+        
+        # 7) Diversification MMR: écarte les précédents quasi identiques à ceux déjà
+        # retenus, la pertinence étant le score du cross-encoder, de fusion
+        # (hybride) ou le cosinus
+        if self.mmr and len(candidates) > limit and all(c[2] is not None for c in candidates):
+            order = maximal_marginal_relevance(
+                query_vector,
+                [c[2] for c in candidates],
+                limit,
+                lambda_mult=self.mmr_lambda,
+                relevance=[c[3] for c in candidates] if (use_hybrid or reranked) else None
+            )
+            candidates = [candidates[i] for i in order]
+        
+        return [self._to_precedent(payload, score) for payload, score, _, _ in candidates[:limit]]
+    
     async def get_precedent(self, precedent_id: str) -> Optional[Precedent]:
         """
         Récupère un précédent juridique par son ID dans Qdrant.
@@ -111,15 +1227,8 @@ class VectorService:
                 return None
             
             point = points[0]
-            payload = point.payload or {}
-            return Precedent(
-                title=payload.get("title", ""),
-                description=payload.get("description", ""),
-                type=payload.get("type", ""),
-                relevance=payload.get("relevance", ""),
-                source=payload.get("source"),
-                similarity_score=1.0  # On met 1.0 par défaut (récupération directe)
-            )
+            # On met 1.0 par défaut (récupération directe)
+            return self._to_precedent(point.payload, 1.0)
         except Exception as e:
             logger.error(f"Erreur lors de get_precedent: {str(e)}", exc_info=True)
             return None
@@ -130,40 +1239,114 @@ class VectorService:
         description: str,
         precedent_type: str,
         relevance: str,
-        source: Optional[str] = None
+        source: Optional[str] = None,
+        jurisdiction: Optional[str] = None,
+        document_types: Optional[List[str]] = None
     ) -> str:
         """
         Ajoute un nouveau précédent juridique à la base vectorielle et renvoie son ID.
+        Pour un doublon (exact ou quasi), renvoie l'ID du précédent existant.
         """
+        precedent_id, _ = await self._ingest_precedent(
+            title, description, precedent_type, relevance, source, jurisdiction, document_types
+        )
+        return precedent_id
+    
+    async def _ingest_precedent(
+        self,
+        title: str,
+        description: str,
+        precedent_type: str,
+        relevance: str,
+        source: Optional[str] = None,
+        jurisdiction: Optional[str] = None,
+        document_types: Optional[List[str]] = None
+    ) -> Tuple[str, bool]:
+        """Ajoute un précédent sauf doublon; renvoie (ID, créé ou non)."""
+        async with self.writing():
+            precedent_id, created = await self._write_precedent(
+                title, description, precedent_type, relevance, source, jurisdiction, document_types
+            )
+            # Nouveau précédent ou métadonnées fusionnées dans un précédent existant
+            self.record_writes([precedent_id])
+            return precedent_id, created
+    
+    async def _write_precedent(
+        self,
+        title: str,
+        description: str,
+        precedent_type: str,
+        relevance: str,
+        source: Optional[str] = None,
+        jurisdiction: Optional[str] = None,
+        document_types: Optional[List[str]] = None
+    ) -> Tuple[str, bool]:
+        # Écrire dans la version active (sans cache) avec son modèle d'embedding
+        collection, model = self.resolve_collection(fresh=True)
+        
+        # Détection des doublons exacts et quasi-doublons (MinHash/LSH)
+        duplicate_index = None
+        if self.dedup_mode != "off":
+            duplicate_index = self._get_duplicate_index(collection)
+            duplicate = duplicate_index.find(description)
+            if duplicate is not None:
+                existing_id, similarity = duplicate
+                logger.info(f"Doublon de {existing_id} ignoré (similarité {similarity:.2f}): {title}")
+                if self.dedup_mode == "merge":
+                    points = self.client.retrieve(collection_name=collection, ids=[self._point_id(existing_id)])
+                    if points:
+                        payload = points[0].payload or {}
+                        self._merge_into(
+                            collection,
+                            existing_id,
+                            payload,
+                            self._merged_metadata(payload, source, jurisdiction, document_types)
+                        )
+                        self._data_written(collection, _lexical_indexes.get(self._cache_key), duplicate_index)
+                return existing_id, False
+        
         # Générer un ID
         precedent_id = str(uuid.uuid4())
         
         # Création du payload
-        payload = {
-            "title": title,
-            "description": description,
-            "type": precedent_type,
-            "relevance": relevance,
-            "created_at": datetime.now().isoformat()
-        }
-        if source:
-            payload["source"] = source
+        payload = self.precedent_payload(
+            title, description, precedent_type, relevance, source, jurisdiction, document_types, model
+        )
         
-        # Vectoriser la description
-        vector = await self._vectorize(description)
+        # Découper les décisions longues en passages qui se chevauchent, vectorisés
+        # en un seul lot
+        passages = split_passages(description, self.passage_words, self.passage_overlap)
+        vectors = await self._vectorize_many(passages, model)
+        config = self.config_for(collection)
+        points = [
+            models.PointStruct(id=point_id, vector=config.point_vector(vector), payload=passage_payload)
+            for (point_id, passage_payload), vector in zip(
+                self.passage_payloads(precedent_id, payload, passages), vectors
+            )
+        ]
         
         # Upsert dans Qdrant
         self.client.upsert(
-            collection_name=self.collection_name,
-            points=[
-                models.PointStruct(
-                    id=precedent_id,
-                    vector=vector,
-                    payload=payload
-                )
-            ]
+            collection_name=collection,
+            points=points
         )
-        return precedent_id
+        
+        # Tenir l'index lexical à jour s'il est déjà construit
+        lexical_index = _lexical_indexes.get(self._cache_key)
+        if lexical_index is not None:
+            lexical_index.add(precedent_id, self._lexical_text(payload), self._lexical_metadata(payload))
+        if duplicate_index is not None:
+            duplicate_index.add(precedent_id, description)
+        shortlist_index = _shortlist_indexes.get(f"{self.backend}:{collection}")
+        if shortlist_index is not None:
+            shortlist_index.add_points([
+                (str(point.id), point.payload, vector) for point, vector in zip(points, vectors)
+            ])
+        
+        # Invalider les résultats de recherche en cache et les index des autres processus
+        self._data_written(collection, lexical_index, duplicate_index)
+        
+        return precedent_id, True
     
     async def seed_precedents(self, precedents_file: str) -> int:
         """
@@ -177,12 +1360,173 @@ class VectorService:
             
         count = 0
         for precedent in precedents_data:
-            await self.add_precedent(
+            _, created = await self._ingest_precedent(
                 title=precedent["title"],
                 description=precedent["description"],
                 precedent_type=precedent["type"],
                 relevance=precedent["relevance"],
-                source=precedent.get("source")
+                source=precedent.get("source"),
+                jurisdiction=precedent.get("jurisdiction"),
+                document_types=precedent.get("document_types")
             )
-            count += 1
+            count += int(created)
         return count
+    
+    async def restore_snapshot(self, path: Optional[str] = None, batch_size: int = 256) -> int:
+        """
+        Charge en bloc un artefact de précédents pré-vectorisés dans la collection
+        active, sans appel au modèle d'embedding. Les IDs de l'artefact étant
+        déterministes, un second chargement remplace les mêmes points.
+        """
+        path = path or self.snapshot_dir
+        manifest, vectors, ids, payloads = read_snapshot(path)
+        
+        # Collection résolue une fois l'écriture autorisée (pas pendant une bascule)
+        async with self.writing():
+            collection, model = self.resolve_collection(fresh=True)
+            if manifest["embedding_model"] != model or manifest["dimension"] != embedding_dimension(model):
+                raise ValueError(
+                    f"Artefact incompatible: {manifest['embedding_model']} ({manifest['dimension']}) "
+                    f"pour une collection {model} ({embedding_dimension(model)})"
+                )
+            
+            start = time.perf_counter()
+            self.client.upload_collection(
+                collection_name=collection,
+                vectors=self.config_for(collection).batch_vectors(vectors),
+                payload=payloads,
+                ids=ids,
+                batch_size=batch_size,
+                wait=True
+            )
+            self.record_writes({
+                (payload or {}).get("parent_id") or str(point_id) for point_id, payload in zip(ids, payloads)
+            })
+        
+        # Les index en mémoire seront reconstruits à partir de la collection
+        _lexical_indexes.pop(self._cache_key, None)
+        _duplicate_indexes.pop(self._cache_key, None)
+        _shortlist_indexes.pop(f"{self.backend}:{collection}", None)
+        self._data_written(collection)
+        
+        logger.info(
+            f"Artefact {path} chargé dans {collection}: {manifest['points']} points "
+            f"en {time.perf_counter() - start:.2f}s"
+        )
+        return manifest["points"]
+    
+    async def bootstrap_precedents(self) -> int:
+        """
+        Démarrage à froid: charge l'artefact si la collection est vide.
+        
+        Lève FileNotFoundError si l'artefact est absent alors qu'il est attendu
+        (PRECEDENT_SNAPSHOT_REQUIRED), au lieu de démarrer sans précédents.
+        """
+        if not snapshot_exists(self.snapshot_dir):
+            if self.snapshot_required:
+                raise FileNotFoundError(
+                    f"Artefact de précédents introuvable dans {self.snapshot_dir} "
+                    f"(PRECEDENT_SNAPSHOT_REQUIRED=true): construire l'image avec "
+                    f"scripts/build_precedent_snapshot.py"
+                )
+            logger.warning(f"Aucun artefact de précédents dans {self.snapshot_dir}, collection non initialisée")
+            return 0
+        collection, _ = self.resolve_collection(fresh=True)
+        if self.client.count(collection_name=collection, exact=True).count > 0:
+            return 0
+        return await self.restore_snapshot()
+    
+    async def deduplicate_collection(self, apply: bool = False, batch_size: int = 256) -> Dict[str, Any]:
+        """
+        Détecte (et, si `apply`, supprime) les doublons d'une collection existante.
+        
+        Le plus ancien précédent de chaque groupe est conservé et reçoit les
+        métadonnées (sources, juridiction, types de documents) de ses doublons.
+        Renvoie les statistiques du traitement, dont le débit en précédents/s.
+        """
+        start = time.perf_counter()
+        # Avec `apply`, l'analyse et les suppressions forment une seule écriture (pas de bascule entre les deux)
+        async with (self.writing() if apply else nullcontext()):
+            collection, _ = self.resolve_collection(fresh=True)
+            data_version = (collection, self._data_version(collection))
+            precedents = sorted(
+                self._scroll_precedents(batch_size),
+                key=lambda point: (point.payload or {}).get("created_at_ts") or 0
+            )
+            scan_seconds = time.perf_counter() - start
+        
+            signature_start = time.perf_counter()
+            index = DuplicateIndex(threshold=self.dedup_threshold)
+            groups: Dict[str, List[Tuple[Any, float]]] = {}
+            exact = 0
+            for point in precedents:
+                precedent_id = self._parent_id(point)
+                description = (point.payload or {}).get("description", "")
+                signature = index.hasher.signature(description)
+                duplicate = index.find(description, signature)
+                if duplicate is None:
+                    index.add(precedent_id, description, signature)
+                    continue
+                groups.setdefault(duplicate[0], []).append((point, duplicate[1]))
+                exact += int(duplicate[1] >= 1.0)
+            signature_seconds = time.perf_counter() - signature_start
+        
+            duplicates = [point for members in groups.values() for point, _ in members]
+            if apply and duplicates:
+                by_id = {self._parent_id(point): point for point in precedents}
+                for keeper_id, members in groups.items():
+                    payload = dict(by_id[keeper_id].payload or {})
+                    merged: Dict[str, Any] = {}
+                    for point, _ in members:
+                        duplicate_payload = point.payload or {}
+                        update = self._merged_metadata(
+                            {**payload, **merged},
+                            duplicate_payload.get("source"),
+                            duplicate_payload.get("jurisdiction"),
+                            duplicate_payload.get("document_types")
+                        )
+                        merged.update(update)
+                    self._merge_into(collection, keeper_id, payload, merged)
+            
+                duplicate_ids = [self._parent_id(point) for point in duplicates]
+                self.client.delete(
+                    collection_name=collection,
+                    points_selector=models.FilterSelector(filter=self._precedent_selector(duplicate_ids))
+                )
+                lexical_index = _lexical_indexes.get(self._cache_key)
+                for duplicate_id in duplicate_ids:
+                    if lexical_index is not None:
+                        lexical_index.remove(duplicate_id)
+                self.record_writes(list(groups) + duplicate_ids)
+                index.data_version = data_version
+                _duplicate_indexes[self._cache_key] = index
+                _shortlist_indexes.pop(f"{self.backend}:{collection}", None)
+                self._data_written(collection, lexical_index, index)
+        
+        duration = time.perf_counter() - start
+        logger.info(
+            f"Déduplication de {collection}: {len(precedents)} précédents analysés, "
+            f"{len(duplicates)} doublons en {duration:.2f}s"
+        )
+        return {
+            "collection": collection,
+            "applied": apply,
+            "scanned": len(precedents),
+            "duplicates": len(duplicates),
+            "exact_duplicates": exact,
+            "groups": [
+                {
+                    "kept": keeper_id,
+                    "duplicates": [
+                        {"id": self._parent_id(point), "title": (point.payload or {}).get("title"), "similarity": similarity}
+                        for point, similarity in members
+                    ]
+                }
+                for keeper_id, members in groups.items()
+            ],
+            "scan_seconds": scan_seconds,
+            "signature_seconds": signature_seconds,
+            "duration_seconds": duration,
+            "precedents_per_second": len(precedents) / duration if duration else 0.0,
+            "signatures_per_second": len(precedents) / signature_seconds if signature_seconds else 0.0
+        }
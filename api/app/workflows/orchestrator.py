@@ -6,21 +6,20 @@ import asyncio
 import traceback
 from datetime import datetime
 import logging
-import pypdf
-import docx2txt
-
-import redis
-from urllib.parse import urlparse
 
 from motor.motor_asyncio import AsyncIOMotorClient
 from app.models.document import DocumentType, DocumentStatus
 from app.models.analysis import (
     AnalysisStatus, AnalysisResults, Clause, Recommendation,
-    Risk, Precedent, ClauseType, RiskLevel, Priority
+    Risk, Precedent, ClauseType, RiskLevel, Priority, PrecedentFilters
 )
 from app.services.document_service import DocumentService
 from app.services.analysis_service import AnalysisService
 from app.services.vector_service import VectorService
+from app.services.clause_index_service import ClauseIndexService
+from app.services.redis_client import get_redis_client
+from app.services.progress_reporter import ProgressReporter
+from app.services.text_extraction import TextExtractor, SUPPORTED_EXTENSIONS, get_text_extractor
 from app.llm.llm_factory import LLMService, LLMProvider
 
 logger = logging.getLogger(__name__)
@@ -33,42 +32,26 @@ class Orchestrator:
         document_service: Optional[DocumentService] = None,
         analysis_service: Optional[AnalysisService] = None,
         vector_service: Optional[VectorService] = None,
-        llm_service: Optional[LLMService] = None
+        llm_service: Optional[LLMService] = None,
+        clause_index_service: Optional[ClauseIndexService] = None,
+        text_extractor: Optional[TextExtractor] = None
     ):
         self.document_service = document_service or DocumentService()
         self.analysis_service = analysis_service or AnalysisService()
         self.vector_service = vector_service or VectorService()
         self.llm_service = llm_service or LLMService()
+        self._clause_index_service = clause_index_service
+        # Extraction du texte dans le pool de processus partagé (calcul hors de la boucle d'événements)
+        self.text_extractor = text_extractor or get_text_extractor()
         
-        # -- Connexion à Redis (Option 2: on lit l'URI et le password séparément) --
-        redis_uri = os.getenv("REDIS_URI", "redis://redis:6379/0")
-        redis_password = os.getenv("REDIS_PASSWORD", "")
-        
-        # On parse l'URI pour extraire host, port et db
-        parsed_uri = urlparse(redis_uri)
-        host = parsed_uri.hostname or "redis"
-        port = parsed_uri.port or 6379
-        
-        db = 0
-        if parsed_uri.path:
-            db_str = parsed_uri.path.lstrip("/")
-            if db_str.isdigit():
-                db = int(db_str)
+        # Score calibré (cross-encoder) à partir duquel un précédent est jugé pertinent;
+        # le LLM n'est sollicité que s'il en reste moins de `precedent_min_relevant`
+        self.precedent_relevance_threshold = float(os.getenv("PRECEDENT_RELEVANCE_THRESHOLD", "0.5"))
+        self.precedent_min_relevant = int(os.getenv("PRECEDENT_MIN_RELEVANT", "3"))
         
-        # Construction de l'instance Redis
-        self.redis = redis.Redis(
-            host=host,
-            port=port,
-            db=db,
-            password=redis_password
-        )
-        
-        try:
-            # Tester la connexion Redis
-            self.redis.ping()
-            logger.info(f"Connexion à Redis établie avec succès sur {host}:{port}, db={db}")
-        except Exception as e:
-            logger.error(f"Erreur de connexion à Redis: {str(e)}")
+        # -- Client Redis partagé (un orchestrateur par requête: pas de nouveau pool ni de PING) --
+        # Une panne de Redis est signalée par le ProgressReporter, qui n'interrompt pas l'analyse
+        self.redis = get_redis_client()
         
     def normalize_clause_type(self, type_str: str) -> str:
         """Normalise le type de clause pour qu'il corresponde à l'énumération ClauseType."""
@@ -163,6 +146,63 @@ class Orchestrator:
         
         return 3  # Moyen par défaut
     
+    def precedent_filters(self, document_type: Optional[str]) -> Optional[PrecedentFilters]:
+        """Restreint la recherche de précédents aux précédents applicables au type de document."""
+        document_type = getattr(document_type, "value", document_type)
+        if not document_type or document_type == DocumentType.OTHER.value:
+            return None
+        return PrecedentFilters(document_type=document_type)
+    
+    def progress_reporter(self, analysis_id: str) -> ProgressReporter:
+        """Suivi de progression d'une analyse (Redis, Mongo en écriture différée)."""
+        return ProgressReporter(analysis_id, self.analysis_service, self.redis)
+    
+    def merge_precedents(self, precedents: List[Precedent]) -> List[Precedent]:
+        """Fusionne les précédents trouvés pour plusieurs clauses (meilleur score par titre)."""
+        best: Dict[str, Precedent] = {}
+        for precedent in precedents:
+            key = precedent.title.strip().lower()
+            if key not in best or precedent.similarity_score > best[key].similarity_score:
+                best[key] = precedent
+        return sorted(best.values(), key=lambda p: p.similarity_score, reverse=True)
+    
+    def needs_generated_precedents(self, precedents: List[Precedent]) -> bool:
+        """Vrai si la recherche vectorielle n'a pas trouvé assez de précédents pertinents."""
+        relevant = [p for p in precedents if p.similarity_score >= self.precedent_relevance_threshold]
+        return len(relevant) < self.precedent_min_relevant
+    
+    def generated_precedents(self, precedents_data: List[Dict[str, Any]]) -> List[Precedent]:
+        """Convertit les précédents proposés par le LLM (sans score de similarité)."""
+        return [
+            Precedent(
+                title=p_data.get("title", ""),
+                description=p_data.get("description", ""),
+                type=p_data.get("type", ""),
+                relevance=p_data.get("relevance", ""),
+                source=p_data.get("source", ""),
+                similarity_score=0.0,
+                generated=True
+            )
+            for p_data in precedents_data
+        ]
+    
+    async def index_clauses(
+        self,
+        analysis_id: str,
+        document_id: str,
+        document_type: Optional[str],
+        clauses: List[Clause]
+    ):
+        """Alimente le corpus de clauses; un échec d'indexation ne fait pas échouer l'analyse."""
+        try:
+            if self._clause_index_service is None:
+                self._clause_index_service = ClauseIndexService(self.vector_service)
+            await self._clause_index_service.index_analysis_clauses(
+                analysis_id, document_id, document_type, clauses
+            )
+        except Exception as e:
+            logger.error(f"Erreur lors de l'indexation des clauses de l'analyse {analysis_id}: {str(e)}")
+
     async def extract_text_from_document(self, document_id: str) -> Optional[str]:
         """Extrait le texte d'un document (PDF, Word, TXT)."""
         document = await self.document_service.get_document(document_id)
@@ -170,26 +210,19 @@ class Orchestrator:
             logger.error(f"Document non trouvé: {document_id}")
             return None
             
-        file_path = document.file_path
-        if not os.path.exists(file_path):
-            logger.error(f"Fichier non trouvé: {file_path}")
+        # Format tiré du nom d'origine: le blob d'un document n'a pas d'extension
+        extension = os.path.splitext(document.filename)[1].lower() or os.path.splitext(document.file_path)[1].lower()
+        if extension not in SUPPORTED_EXTENSIONS:
+            logger.error(f"Format de fichier non supporté: {document.filename}")
             return None
             
-        text_content = ""
         try:
-            if file_path.lower().endswith(".pdf"):
-                with open(file_path, "rb") as f:
-                    pdf_reader = pypdf.PdfReader(f)
-                    for page in pdf_reader.pages:
-                        text_content += page.extract_text() + "\n\n"
-            elif file_path.lower().endswith((".docx", ".doc")):
-                text_content = docx2txt.process(file_path)
-            elif file_path.lower().endswith(".txt"):
-                with open(file_path, "r", encoding="utf-8") as f:
-                    text_content = f.read()
-            else:
-                logger.error(f"Format de fichier non supporté: {file_path}")
-                return None
+            async with self.document_service.open_document_file(document) as file_path:
+                if not os.path.exists(file_path):
+                    logger.error(f"Fichier non trouvé: {file_path}")
+                    return None
+                    
+                text_content = await self.text_extractor.extract(file_path, extension)
                 
             await self.document_service.update_document_text_content(document_id, text_content)
             logger.info(f"Texte extrait avec succès: {len(text_content)} caractères.")
@@ -206,30 +239,22 @@ class Orchestrator:
         document_type: str
     ):
         """Exécute le workflow complet d'analyse d'un document."""
+        progress = self.progress_reporter(analysis_id)
         try:
             logger.info(f"Démarrage de l'analyse: analysis_id={analysis_id}, document_id={document_id}")
             
-            # 1) Mise à jour du statut (Mongo + Redis)
-            await self.analysis_service.update_analysis_status(analysis_id, AnalysisStatus.IN_PROGRESS)
-            self.redis.set(f"analysis:{analysis_id}:status", AnalysisStatus.IN_PROGRESS.value)
-            
-            # 2) Progression (Mongo + Redis)
-            await self.analysis_service.update_analysis_progress(analysis_id, 0.1)
-            self.redis.set(f"analysis:{analysis_id}:progress", 0.1)
+            # 1) Statut et progression (Redis, Mongo en écriture différée)
+            await progress.start()
+            await progress.report(0.1, stage="text_extraction")
             
             # 3) Extraire le texte
             document_text = await self.extract_text_from_document(document_id)
             if not document_text:
                 logger.error(f"Impossible d'extraire le texte du document: {document_id}")
-                await self.analysis_service.update_analysis_status(
-                    analysis_id, AnalysisStatus.FAILED,
-                    error="Impossible d'extraire le texte du document"
-                )
-                self.redis.set(f"analysis:{analysis_id}:status", AnalysisStatus.FAILED.value)
+                await progress.fail("Impossible d'extraire le texte du document")
                 return
             
-            await self.analysis_service.update_analysis_progress(analysis_id, 0.2)
-            self.redis.set(f"analysis:{analysis_id}:progress", 0.2)
+            await progress.report(0.2, stage="clause_extraction")
             
             # 4) Extraction des clauses
             logger.info("Extraction des clauses...")
@@ -266,8 +291,7 @@ class Orchestrator:
                 )
                 clauses.append(default_clause)
             
-            await self.analysis_service.update_analysis_progress(analysis_id, 0.4)
-            self.redis.set(f"analysis:{analysis_id}:progress", 0.4)
+            await progress.report(0.4, stage="recommendations", partial={"clauses": [c.dict() for c in clauses]})
             
             # 5) Recommandations
             logger.info("Génération des recommandations...")
@@ -292,8 +316,7 @@ class Orchestrator:
                     logger.error(f"Erreur recommandation: {str(e)}")
                     logger.debug(f"Reco data: {rdata}")
             
-            await self.analysis_service.update_analysis_progress(analysis_id, 0.6)
-            self.redis.set(f"analysis:{analysis_id}:progress", 0.6)
+            await progress.report(0.6, stage="risks", partial={"recommendations": [r.dict() for r in recommendations]})
             
             # 6) Identification des risques
             logger.info("Identification des risques...")
@@ -318,8 +341,7 @@ class Orchestrator:
                     logger.error(f"Erreur risque: {str(e)}")
                     logger.debug(f"Risk data: {rdata}")
             
-            await self.analysis_service.update_analysis_progress(analysis_id, 0.8)
-            self.redis.set(f"analysis:{analysis_id}:progress", 0.8)
+            await progress.report(0.8, stage="precedents", partial={"risks": [r.dict() for r in risks]})
             
             # 7) Recherche de précédents (deux approches combinées)
             logger.info("Recherche de précédents...")
@@ -329,31 +351,24 @@ class Orchestrator:
             high_risk_clauses = [c for c in clauses if c.risk_level >= 4]
             if high_risk_clauses:
                 logger.info(f"Recherche vectorielle basée sur {len(high_risk_clauses)} clauses à haut risque.")
+                filters = self.precedent_filters(document_type)
                 for c in high_risk_clauses[:3]:
-                    clause_precedents = await self.vector_service.search_precedents(query=c.content, limit=2)
+                    clause_precedents = await self.vector_service.search_precedents(
+                        query=c.content, limit=2, filters=filters, clause_type=c.type
+                    )
                     precedents.extend(clause_precedents)
+            precedents = self.merge_precedents(precedents)
             
-            # Approche 2: Génération de précédents via LLM (si aucun précédent trouvé par vectorisation)
-            if len(precedents) < 3:
-                logger.info("Pas assez de précédents trouvés par vectorisation, utilisation du LLM.")
+            # Approche 2: Génération de précédents via LLM (si trop peu de précédents pertinents)
+            if self.needs_generated_precedents(precedents):
+                logger.info("Pas assez de précédents pertinents trouvés par vectorisation, utilisation du LLM.")
                 try:
                     # Appeler identify_precedents
                     llm_precedents_data = await self.llm_service.identify_precedents(
                         clauses=clauses_data,
                         document_type=document_type
                     )
-                    
-                    # Convertir en objets Precedent
-                    for p_data in llm_precedents_data:
-                        precedent = Precedent(
-                            title=p_data.get("title", ""),
-                            description=p_data.get("description", ""),
-                            type=p_data.get("type", ""),
-                            relevance=p_data.get("relevance", ""),
-                            source=p_data.get("source", ""),
-                            similarity_score=0.95  # Score élevé pour les précédents générés par LLM
-                        )
-                        precedents.append(precedent)
+                    precedents.extend(self.generated_precedents(llm_precedents_data))
                     
                     logger.info(f"Génération de précédents LLM réussie: {len(llm_precedents_data)} précédents.")
                 except Exception as e:
@@ -381,16 +396,13 @@ class Orchestrator:
                 }
             )
             
-            # 10) Sauvegarde (Mongo) + Update (Redis)
+            # 10) Sauvegarde (Mongo) puis statut final (Redis + Mongo)
             logger.info("Sauvegarde des résultats...")
             await self.analysis_service.update_analysis_results(analysis_id, results)
+            await self.index_clauses(analysis_id, document_id, document_type, clauses)
             
             # Marquer l'analyse comme terminée
-            await self.analysis_service.update_analysis_status(analysis_id, AnalysisStatus.COMPLETED)
-            self.redis.set(f"analysis:{analysis_id}:status", AnalysisStatus.COMPLETED.value)
-            
-            await self.analysis_service.update_analysis_progress(analysis_id, 1.0)
-            self.redis.set(f"analysis:{analysis_id}:progress", 1.0)
+            await progress.complete()
             
             # Mettre à jour le document
             await self.document_service.update_document_status(document_id, DocumentStatus.PROCESSED)
@@ -401,11 +413,7 @@ class Orchestrator:
             logger.error(error_message)
             
             # Statut d'erreur
-            await self.analysis_service.update_analysis_status(
-                analysis_id, AnalysisStatus.FAILED,
-                error=error_message
-            )
-            self.redis.set(f"analysis:{analysis_id}:status", AnalysisStatus.FAILED.value)
+            await progress.fail(error_message)
 
     async def parallel_analysis_workflow(
         self,
@@ -414,28 +422,21 @@ class Orchestrator:
         document_type: str
     ):
         """Exécute le workflow d'analyse en parallélisant certaines tâches."""
+        progress = self.progress_reporter(analysis_id)
         try:
             logger.info(f"Démarrage de l'analyse parallèle: analysis_id={analysis_id}, document_id={document_id}")
             
-            await self.analysis_service.update_analysis_status(analysis_id, AnalysisStatus.IN_PROGRESS)
-            self.redis.set(f"analysis:{analysis_id}:status", AnalysisStatus.IN_PROGRESS.value)
-            
-            await self.analysis_service.update_analysis_progress(analysis_id, 0.1)
-            self.redis.set(f"analysis:{analysis_id}:progress", 0.1)
+            await progress.start()
+            await progress.report(0.1, stage="text_extraction")
             
             # Extraire le texte
             document_text = await self.extract_text_from_document(document_id)
             if not document_text:
                 logger.error(f"Impossible d'extraire le texte du document: {document_id}")
-                await self.analysis_service.update_analysis_status(
-                    analysis_id, AnalysisStatus.FAILED,
-                    error="Impossible d'extraire le texte du document"
-                )
-                self.redis.set(f"analysis:{analysis_id}:status", AnalysisStatus.FAILED.value)
+                await progress.fail("Impossible d'extraire le texte du document")
                 return
             
-            await self.analysis_service.update_analysis_progress(analysis_id, 0.2)
-            self.redis.set(f"analysis:{analysis_id}:progress", 0.2)
+            await progress.report(0.2, stage="clause_extraction")
             
             # Extraction des clauses (parallèle)
             logger.info("Extraction des clauses (async)...")
@@ -473,8 +474,7 @@ class Orchestrator:
                 )
                 clauses.append(default_clause)
             
-            await self.analysis_service.update_analysis_progress(analysis_id, 0.4)
-            self.redis.set(f"analysis:{analysis_id}:progress", 0.4)
+            await progress.report(0.4, stage="recommendations_risks", partial={"clauses": [c.dict() for c in clauses]})
             
             # Recommandations + risques (parallèle)
             logger.info("Génération des recommandations + identification des risques...")
@@ -518,8 +518,10 @@ class Orchestrator:
                     logger.error(f"Erreur risque: {str(e)}")
                     logger.debug(f"Risk data: {rdata}")
             
-            await self.analysis_service.update_analysis_progress(analysis_id, 0.7)
-            self.redis.set(f"analysis:{analysis_id}:progress", 0.7)
+            await progress.report(0.7, stage="precedents_summary", partial={
+                "recommendations": [r.dict() for r in recommendations],
+                "risks": [r.dict() for r in risks]
+            })
             
             # Recherche de précédents + résumé (parallèle)
             logger.info("Recherche de précédents + génération du résumé (async)...")
@@ -529,20 +531,15 @@ class Orchestrator:
             high_risk_clauses = [c for c in clauses if c.risk_level >= 4]
             if high_risk_clauses:
                 logger.info(f"Recherche vectorielle via {len(high_risk_clauses)} clauses à haut risque.")
+                filters = self.precedent_filters(document_type)
                 for c in high_risk_clauses[:3]:
                     task = asyncio.create_task(
-                        self.vector_service.search_precedents(query=c.content, limit=2)
+                        self.vector_service.search_precedents(
+                            query=c.content, limit=2, filters=filters, clause_type=c.type
+                        )
                     )
                     precedents_tasks.append(task)
             
-            # Tâche de génération LLM en parallèle
-            llm_precedents_task = asyncio.create_task(
-                self.llm_service.identify_precedents(
-                    clauses=clauses_data,
-                    document_type=document_type
-                )
-            )
-            
             # Tâche du résumé
             summary_task = asyncio.create_task(
                 self.llm_service.generate_summary(
@@ -561,30 +558,25 @@ class Orchestrator:
             for result in vector_tasks_results:
                 if isinstance(result, list) and not isinstance(result, Exception):
                     precedents.extend(result)
+            precedents = self.merge_precedents(precedents)
             
-            # Traiter les précédents LLM si nécessaire
+            # Précédents LLM uniquement si la recherche vectorielle ne suffit pas
+            # (le résumé continue d'être généré en parallèle)
             try:
-                llm_precedents_data = await llm_precedents_task
-                if len(precedents) < 3:
+                if self.needs_generated_precedents(precedents):
                     logger.info("Utilisation des précédents LLM pour compléter...")
-                    for p_data in llm_precedents_data:
-                        precedent = Precedent(
-                            title=p_data.get("title", ""),
-                            description=p_data.get("description", ""),
-                            type=p_data.get("type", ""),
-                            relevance=p_data.get("relevance", ""),
-                            source=p_data.get("source", ""),
-                            similarity_score=0.95
-                        )
-                        precedents.append(precedent)
+                    llm_precedents_data = await self.llm_service.identify_precedents(
+                        clauses=clauses_data,
+                        document_type=document_type
+                    )
+                    precedents.extend(self.generated_precedents(llm_precedents_data))
             except Exception as e:
                 logger.error(f"Erreur LLM précédents: {str(e)}")
             
             # Obtenir le résumé
             summary = await summary_task
             
-            await self.analysis_service.update_analysis_progress(analysis_id, 0.9)
-            self.redis.set(f"analysis:{analysis_id}:progress", 0.9)
+            await progress.report(0.9, stage="saving")
             
             # Résultat final
             analysis_results = AnalysisResults(
@@ -601,12 +593,9 @@ class Orchestrator:
             
             logger.info("Sauvegarde des résultats en base (Mongo)...")
             await self.analysis_service.update_analysis_results(analysis_id, analysis_results)
+            await self.index_clauses(analysis_id, document_id, document_type, clauses)
             
-            await self.analysis_service.update_analysis_status(analysis_id, AnalysisStatus.COMPLETED)
-            self.redis.set(f"analysis:{analysis_id}:status", AnalysisStatus.COMPLETED.value)
-            
-            await self.analysis_service.update_analysis_progress(analysis_id, 1.0)
-            self.redis.set(f"analysis:{analysis_id}:progress", 1.0)
+            await progress.complete()
             
             await self.document_service.update_document_status(document_id, DocumentStatus.PROCESSED)
             logger.info(f"Analyse parallèle terminée: analysis_id={analysis_id}")
@@ -615,5 +604,4 @@ class Orchestrator:
             error_message = f"Erreur lors de l'analyse parallèle: {str(e)}\n{traceback.format_exc()}"
             logger.error(error_message)
             
-            await self.analysis_service.update_analysis_status(analysis_id, AnalysisStatus.FAILED, error=error_message)
-            self.redis.set(f"analysis:{analysis_id}:status", AnalysisStatus.FAILED.value)
\ No newline at end of file
+            await progress.fail(error_message)
\ No newline at end of file
@@ -0,0 +1,193 @@
+import os
+import asyncio
+import hashlib
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.services import blob_service
+from app.services.blob_service import BlobService
+from app.services.blob_store import LocalBlobStore
+
+
+def _matches(document, query):
+    """Sous-ensemble des filtres MongoDB utilisés par BlobService."""
+    for key, condition in query.items():
+        if key == "$or":
+            if not any(_matches(document, option) for option in condition):
+                return False
+            continue
+        value = document.get(key)
+        if isinstance(condition, dict):
+            for operator, operand in condition.items():
+                if operator == "$exists":
+                    if (key in document) != operand:
+                        return False
+                elif value is None:
+                    return False
+                elif operator == "$lte" and not value <= operand:
+                    return False
+                elif operator == "$lt" and not value < operand:
+                    return False
+        elif value != condition:
+            return False
+    return True
+
+
+def _apply(document, update):
+    for key, amount in update.get("$inc", {}).items():
+        document[key] = document.get(key, 0) + amount
+    document.update(update.get("$set", {}))
+    for key in update.get("$unset", {}):
+        document.pop(key, None)
+
+
+class FakeCursor:
+    def __init__(self, documents):
+        self.documents = documents
+
+    def limit(self, count):
+        self.documents = self.documents[:count]
+        return self
+
+    async def to_list(self, length):
+        return self.documents
+
+
+class FakeBlobCollection:
+    """Collection `blobs` en mémoire (upsert sur _id: DuplicateKeyError si le filtre exclut le document existant)."""
+
+    def __init__(self):
+        self.documents = {}
+
+    async def find_one_and_update(self, query, update, upsert=False, projection=None, return_document=ReturnDocument.BEFORE):
+        document = self.documents.get(query["_id"])
+        if document is not None and not _matches(document, query):
+            if upsert:
+                raise DuplicateKeyError("E11000 duplicate key error")
+            return None
+        before = dict(document) if document is not None else None
+        if document is None:
+            if not upsert:
+                return None
+            document = {"_id": query["_id"], **update.get("$setOnInsert", {})}
+            self.documents[query["_id"]] = document
+        _apply(document, update)
+        return dict(document) if return_document == ReturnDocument.AFTER else before
+
+    async def update_one(self, query, update):
+        document = self.documents.get(query["_id"])
+        if document is None or not _matches(document, query):
+            return SimpleNamespace(modified_count=0)
+        _apply(document, update)
+        return SimpleNamespace(modified_count=1)
+
+    async def find_one(self, query, projection=None):
+        document = self.documents.get(query["_id"])
+        return dict(document) if document is not None else None
+
+    def find(self, query, projection=None):
+        return FakeCursor([dict(d) for d in self.documents.values() if _matches(d, query)])
+
+    async def delete_one(self, query):
+        document = self.documents.get(query["_id"])
+        if document is None or not _matches(document, query):
+            return SimpleNamespace(deleted_count=0)
+        del self.documents[query["_id"]]
+        return SimpleNamespace(deleted_count=1)
+
+
+class PausableStore(LocalBlobStore):
+    """Magasin local dont la suppression attend un signal (pour entrelacer les appels)."""
+
+    def __init__(self, root):
+        super().__init__(root)
+        self.delete_started = asyncio.Event()
+        self.resume_delete = asyncio.Event()
+
+    async def delete(self, digest):
+        self.delete_started.set()
+        await self.resume_delete.wait()
+        return await super().delete(digest)
+
+
+def _service(store):
+    service = BlobService.__new__(BlobService)
+    service.collection = FakeBlobCollection()
+    service.store = store
+    return service
+
+
+def _write(directory, name, content):
+    path = os.path.join(directory, name)
+    with open(path, "wb") as f:
+        f.write(content)
+    return path
+
+
+@pytest.mark.asyncio
+async def test_add_reference_deduplicates_and_gc_removes_orphans(tmp_path):
+    service = _service(LocalBlobStore(str(tmp_path / "blobs")))
+    content = b"contrat de prestation"
+    digest = hashlib.sha256(content).hexdigest()
+
+    for name in ("a", "b"):
+        await service.add_reference(digest, _write(tmp_path, name, content), len(content))
+    assert service.collection.documents[digest]["refcount"] == 2
+
+    assert await service.release(digest) == 1
+    assert await service.collect_garbage(grace_seconds=0) == 0
+    assert await service.release(digest) == 0
+    assert await service.collect_garbage(grace_seconds=0) == 1
+    assert not await service.store.exists(digest)
+    assert digest not in service.collection.documents
+
+
+@pytest.mark.asyncio
+async def test_upload_during_gc_deletion_keeps_content(tmp_path, monkeypatch):
+    monkeypatch.setattr(blob_service, "BLOB_DELETE_POLL_SECONDS", 0.01)
+    store = PausableStore(str(tmp_path / "blobs"))
+    service = _service(store)
+    content = b"clause de confidentialite"
+    digest = hashlib.sha256(content).hexdigest()
+
+    await service.add_reference(digest, _write(tmp_path, "first", content), len(content))
+    await service.release(digest)
+
+    # Le ramasse-miettes a marqué le blob et s'apprête à supprimer le contenu...
+    gc = asyncio.create_task(service.collect_garbage(grace_seconds=0))
+    await store.delete_started.wait()
+    assert "deleting" in service.collection.documents[digest]
+
+    # ...quand le même contenu est de nouveau téléchargé
+    upload = asyncio.create_task(service.add_reference(digest, _write(tmp_path, "second", content), len(content)))
+    await asyncio.sleep(0.05)
+    assert not upload.done()
+
+    store.resume_delete.set()
+    assert await gc == 1
+    await upload
+
+    blob = service.collection.documents[digest]
+    assert blob["refcount"] == 1 and "deleting" not in blob
+    with open(store.path(digest), "rb") as f:
+        assert f.read() == content
+
+
+@pytest.mark.asyncio
+async def test_abandoned_deletion_is_taken_over(tmp_path, monkeypatch):
+    monkeypatch.setattr(blob_service, "BLOB_DELETE_POLL_SECONDS", 0.01)
+    service = _service(LocalBlobStore(str(tmp_path / "blobs")))
+    content = b"avenant"
+    digest = hashlib.sha256(content).hexdigest()
+
+    # Ramasse-miettes arrêté après avoir marqué le blob et supprimé le contenu
+    service.collection.documents[digest] = {"_id": digest, "refcount": 0, "deleting": datetime(2020, 1, 1)}
+
+    await service.add_reference(digest, _write(tmp_path, "upload", content), len(content))
+
+    assert service.collection.documents[digest]["refcount"] == 1
+    assert await service.store.exists(digest)
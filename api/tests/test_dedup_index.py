@@ -0,0 +1,50 @@
+from app.services.dedup_index import DuplicateIndex, MinHasher, content_hash, optimal_bands
+
+TEXT = (
+    "Le bailleur ne peut refuser le renouvellement du bail commercial sans verser au preneur "
+    "une indemnité d'éviction égale au préjudice causé par le défaut de renouvellement, "
+    "qui comprend notamment la valeur marchande du fonds de commerce"
+)
+
+
+def test_content_hash_ignores_case_accents_and_punctuation():
+    assert content_hash("Indemnité  d'éviction.") == content_hash("indemnite d eviction")
+    assert content_hash("indemnité d'éviction") != content_hash("indemnité de licenciement")
+
+
+def test_minhash_estimates_jaccard_similarity():
+    hasher = MinHasher(num_perm=128)
+    signature = hasher.signature(TEXT)
+
+    assert MinHasher.jaccard(signature, hasher.signature(TEXT)) == 1.0
+    near = MinHasher.jaccard(signature, hasher.signature(TEXT.replace("notamment", "en particulier")))
+    assert 0.6 < near < 1.0
+    assert MinHasher.jaccard(signature, hasher.signature("Clause de non-concurrence sans contrepartie financière")) < 0.2
+
+
+def test_optimal_bands_split_the_signature():
+    bands, rows = optimal_bands(128, 0.8)
+    assert bands * rows == 128
+    # Un seuil plus bas demande des bandes plus courtes (davantage de candidats)
+    assert optimal_bands(128, 0.5)[1] <= rows
+
+
+def test_duplicate_index_finds_exact_and_near_duplicates():
+    index = DuplicateIndex(threshold=0.7)
+    index.add("p1", TEXT)
+    index.add("p2", "Clause de non-concurrence sans contrepartie financière, nulle de plein droit")
+
+    assert index.find(TEXT.upper()) == ("p1", 1.0)
+    doc_id, similarity = index.find(TEXT + " au jour de l'éviction")
+    assert doc_id == "p1" and 0.7 <= similarity < 1.0
+    assert index.find("Résiliation du contrat de travail pour faute grave du salarié") is None
+
+
+def test_removed_documents_are_no_longer_found():
+    index = DuplicateIndex()
+    index.add("p1", TEXT)
+    index.remove("p1")
+
+    assert len(index) == 0
+    assert index.find(TEXT) is None
+    assert all(not bucket for bucket in index.buckets)
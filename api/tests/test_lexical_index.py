@@ -0,0 +1,44 @@
+import pytest
+
+from app.services.lexical_index import BM25Index, reciprocal_rank_fusion, tokenize
+
+
+def test_tokenize_keeps_legal_references_and_their_parts():
+    tokens = tokenize("Article L1237-19 du Code du travail")
+    assert "l1237-19" in tokens and "l1237" in tokens and "19" in tokens
+    assert "du" not in tokens
+
+
+def test_replace_and_remove_only_touch_the_document_terms():
+    index = BM25Index()
+    index.add("a", "clause de non-concurrence")
+    index.add("b", "clause pénale")
+
+    index.add("a", "indemnité de licenciement")
+    assert [doc_id for doc_id, _ in index.search("concurrence")] == []
+    assert [doc_id for doc_id, _ in index.search("licenciement")] == ["a"]
+    assert set(index.postings["clause"]) == {"b"}
+
+    index.remove("b")
+    assert "clause" not in index.postings
+    assert len(index) == 1 and index.total_length == index.doc_lengths["a"]
+    assert set(index.doc_terms) == {"a"}
+
+
+def test_bm25_ranks_rare_terms_and_filters_on_metadata():
+    index = BM25Index()
+    index.add("a", "clause pénale et clause résolutoire", {"type": "contrat"})
+    index.add("b", "clause pénale", {"type": "bail"})
+    index.add("c", "dépôt de garantie du bail", {"type": "bail"})
+
+    assert [doc_id for doc_id, _ in index.search("clause résolutoire")] == ["a", "b"]
+    assert [doc_id for doc_id, _ in index.search("clause", where=lambda meta: meta.get("type") == "bail")] == ["b"]
+    assert index.search("inconnu") == []
+
+
+def test_reciprocal_rank_fusion_rewards_agreement_between_rankings():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "c", "d"]], k=60)
+
+    assert [doc_id for doc_id, _ in fused] == ["b", "c", "a", "d"]
+    assert fused[0][1] == pytest.approx(1 / 62 + 1 / 61)
+    assert [doc_id for doc_id, _ in reciprocal_rank_fusion([["a", "b", "c"]], limit=2)] == ["a", "b"]
@@ -0,0 +1,44 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.llm.llm_factory import LLMProvider, LLMService
+
+
+class FakeEmbedding:
+    def __init__(self):
+        self.models = []
+
+    def create(self, model, input):
+        self.models.append(model)
+        texts = input if isinstance(input, list) else [input]
+        return SimpleNamespace(data=[
+            SimpleNamespace(index=i, embedding=[float(i)]) for i in range(len(texts))
+        ])
+
+
+class FakeFactory:
+    """Fournisseur par défaut Groq (sans embeddings), OpenAI disponible en repli."""
+
+    default_provider = LLMProvider.GROQ
+
+    def __init__(self):
+        self.client = SimpleNamespace(Embedding=FakeEmbedding())
+
+    def is_provider_available(self, provider):
+        return provider == LLMProvider.OPENAI
+
+    def get_client(self, provider=None):
+        assert provider == LLMProvider.OPENAI
+        return self.client
+
+
+@pytest.mark.asyncio
+async def test_groq_fallback_keeps_requested_model():
+    factory = FakeFactory()
+    service = LLMService(llm_factory=factory)
+
+    await service.get_embedding("clause de non-concurrence", model="text-embedding-3-large")
+    await service.get_embeddings(["a", "b"], model="text-embedding-3-large")
+
+    assert factory.client.Embedding.models == ["text-embedding-3-large", "text-embedding-3-large"]
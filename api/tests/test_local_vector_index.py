@@ -0,0 +1,99 @@
+import pytest
+from qdrant_client.http import models
+
+from app.services.local_vector_index import LocalVectorClient, filter_matches
+
+
+PAYLOAD = {"type": "jurisprudence", "document_types": ["bail", "contrat"], "created_at_ts": 100, "tags": []}
+
+
+def _match(key, value):
+    return models.FieldCondition(key=key, match=models.MatchValue(value=value))
+
+
+def test_field_match_accepts_scalar_and_list_values():
+    assert filter_matches(PAYLOAD, "p1", models.Filter(must=[_match("type", "jurisprudence")]))
+    assert filter_matches(PAYLOAD, "p1", models.Filter(must=[_match("document_types", "bail")]))
+    assert not filter_matches(PAYLOAD, "p1", models.Filter(must=[_match("document_types", "vente")]))
+    assert filter_matches(PAYLOAD, "p1", models.Filter(must=[
+        models.FieldCondition(key="document_types", match=models.MatchAny(any=["vente", "contrat"]))
+    ]))
+
+
+def test_range_is_empty_and_has_id_conditions():
+    assert filter_matches(PAYLOAD, "p1", models.Filter(must=[
+        models.FieldCondition(key="created_at_ts", range=models.Range(gte=100, lt=200))
+    ]))
+    assert not filter_matches(PAYLOAD, "p1", models.Filter(must=[
+        models.FieldCondition(key="created_at_ts", range=models.Range(gt=100))
+    ]))
+    assert not filter_matches(PAYLOAD, "p1", models.Filter(must=[
+        models.FieldCondition(key="absent", range=models.Range(gte=0))
+    ]))
+    assert filter_matches(PAYLOAD, "p1", models.Filter(must=[
+        models.IsEmptyCondition(is_empty=models.PayloadField(key="tags"))
+    ]))
+    assert filter_matches(PAYLOAD, "p1", models.Filter(must=[models.HasIdCondition(has_id=["p1"])]))
+
+
+def test_should_must_not_and_nested_filters():
+    assert filter_matches(PAYLOAD, "p1", None)
+    assert filter_matches(PAYLOAD, "p1", models.Filter(should=[_match("type", "loi"), _match("type", "jurisprudence")]))
+    assert not filter_matches(PAYLOAD, "p1", models.Filter(should=[_match("type", "loi")]))
+    assert not filter_matches(PAYLOAD, "p1", models.Filter(must_not=[_match("document_types", "bail")]))
+    assert filter_matches(PAYLOAD, "p1", models.Filter(must=[
+        models.Filter(should=[_match("type", "loi"), _match("document_types", "contrat")])
+    ]))
+
+
+@pytest.fixture
+def client(tmp_path):
+    client = LocalVectorClient(str(tmp_path))
+    client.create_collection("precedents", models.VectorParams(size=3, distance=models.Distance.COSINE))
+    client.upsert("precedents", [
+        models.PointStruct(id="a", vector=[1.0, 0.0, 0.0], payload={"type": "loi"}),
+        models.PointStruct(id="b", vector=[0.0, 1.0, 0.0], payload={"type": "jurisprudence"}),
+        models.PointStruct(id="c", vector=[0.7, 0.7, 0.0], payload={"type": "jurisprudence"}),
+    ])
+    return client
+
+
+def test_upsert_replaces_existing_points(client):
+    client.upsert("precedents", [models.PointStruct(id="a", vector=[0.0, 0.0, 1.0], payload={"type": "doctrine"})])
+
+    assert client.count("precedents").count == 3
+    record = client.retrieve("precedents", ["a"], with_vectors=True)[0]
+    assert record.payload == {"type": "doctrine"}
+    assert record.vector == pytest.approx([0.0, 0.0, 1.0])
+
+
+def test_delete_by_ids_and_by_filter(client):
+    jurisprudence = models.Filter(must=[_match("type", "jurisprudence")])
+    assert client.count("precedents", count_filter=jurisprudence).count == 2
+
+    client.delete("precedents", points_selector=models.PointIdsList(points=["b"]))
+    assert client.count("precedents").count == 2
+    assert client.retrieve("precedents", ["b"]) == []
+
+    client.delete("precedents", points_selector=models.FilterSelector(filter=jurisprudence))
+    assert client.count("precedents").count == 1
+    assert [hit.id for hit in client.search("precedents", [0.0, 1.0, 0.0], limit=5)] == ["a"]
+
+
+def test_search_applies_the_filter_before_top_k(client):
+    hits = client.search("precedents", [1.0, 0.0, 0.0], limit=2)
+    assert [hit.id for hit in hits] == ["a", "c"]
+
+    hits = client.search(
+        "precedents", [1.0, 0.0, 0.0], limit=1,
+        query_filter=models.Filter(must=[_match("type", "jurisprudence")])
+    )
+    assert [hit.id for hit in hits] == ["c"]
+
+
+def test_collection_is_reloaded_from_disk(client, tmp_path):
+    client.delete("precedents", points_selector=models.PointIdsList(points=["a"]))
+
+    reopened = LocalVectorClient(str(tmp_path))
+    assert reopened.count("precedents").count == 2
+    assert [hit.id for hit in reopened.search("precedents", [0.0, 1.0, 0.0], limit=1)] == ["b"]
@@ -0,0 +1,39 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.pagination import decode_cursor, encode_cursor, keyset_filter, next_cursor
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2024, 3, 1, 12, 30, 15, 123456)
+    cursor = encode_cursor(created_at, "analyse-42")
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created_at, "analyse-42")
+
+
+def test_invalid_cursor_raises_value_error():
+    with pytest.raises(ValueError):
+        decode_cursor("pas-un-curseur")
+
+
+def test_next_cursor_points_after_the_last_item_of_a_full_page():
+    items = [
+        SimpleNamespace(created_at=datetime(2024, 3, 2), id="b"),
+        SimpleNamespace(created_at=datetime(2024, 3, 1), id="a"),
+    ]
+
+    assert next_cursor(items, limit=3) is None
+    assert next_cursor([], limit=2) is None
+    assert decode_cursor(next_cursor(items, limit=2)) == (datetime(2024, 3, 1), "a")
+
+
+def test_keyset_filter_breaks_ties_on_id():
+    assert keyset_filter(None) == {}
+    created_at = datetime(2024, 3, 1)
+    assert keyset_filter(encode_cursor(created_at, "a")) == {"$or": [
+        {"created_at": {"$lt": created_at}},
+        {"created_at": created_at, "id": {"$lt": "a"}},
+    ]}
@@ -0,0 +1,31 @@
+from app.services.passage_search import group_by_parent, maximal_marginal_relevance, split_passages
+
+
+def test_split_passages_overlap():
+    text = " ".join(f"m{i}" for i in range(10))
+    passages = split_passages(text, passage_words=4, overlap_words=1)
+
+    assert passages == ["m0 m1 m2 m3", "m3 m4 m5 m6", "m6 m7 m8 m9"]
+    assert split_passages("texte court", passage_words=4) == ["texte court"]
+
+
+def test_group_by_parent_keeps_the_best_passage():
+    hits = [("p1", 0.9), ("p2", 0.8), ("p1", 0.7), ("p3", 0.6)]
+    assert group_by_parent(hits, lambda hit: hit[0]) == [("p1", 0.9), ("p2", 0.8), ("p3", 0.6)]
+
+
+def test_mmr_skips_near_duplicates():
+    query = [1.0, 0.0]
+    candidates = [[1.0, 0.0], [0.99, 0.01], [0.6, 0.8]]
+
+    assert maximal_marginal_relevance(query, candidates, limit=2, lambda_mult=1.0) == [0, 1]
+    assert maximal_marginal_relevance(query, candidates, limit=2, lambda_mult=0.3) == [0, 2]
+
+
+def test_mmr_uses_given_relevance_and_bounds():
+    candidates = [[1.0, 0.0], [0.0, 1.0], [0.7, 0.7]]
+
+    assert maximal_marginal_relevance([1.0, 0.0], candidates, limit=1, relevance=[0.1, 0.9, 0.5]) == [1]
+    assert sorted(maximal_marginal_relevance([1.0, 0.0], candidates, limit=10)) == [0, 1, 2]
+    assert maximal_marginal_relevance([1.0, 0.0], [], limit=3) == []
+    assert maximal_marginal_relevance([1.0, 0.0], candidates, limit=0) == []
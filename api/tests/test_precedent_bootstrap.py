@@ -0,0 +1,28 @@
+import uuid
+
+import pytest
+
+from app.services.vector_service import VectorService
+
+
+@pytest.fixture
+def no_snapshot(tmp_path, monkeypatch):
+    """Backend local, artefact de précédents non construit."""
+    monkeypatch.setenv("VECTOR_BACKEND", "local")
+    monkeypatch.setenv("LOCAL_VECTOR_DIR", str(tmp_path / "vectors"))
+    monkeypatch.setenv("PRECEDENT_COLLECTION", f"precedents_{uuid.uuid4().hex[:8]}")
+    monkeypatch.setenv("PRECEDENT_CACHE_ENABLED", "false")
+    monkeypatch.setenv("PRECEDENT_SNAPSHOT_DIR", str(tmp_path / "snapshot"))
+
+
+@pytest.mark.asyncio
+async def test_missing_snapshot_fails_when_required(no_snapshot, monkeypatch):
+    monkeypatch.setenv("PRECEDENT_SNAPSHOT_REQUIRED", "true")
+    with pytest.raises(FileNotFoundError):
+        await VectorService().bootstrap_precedents()
+
+
+@pytest.mark.asyncio
+async def test_missing_snapshot_is_skipped_when_optional(no_snapshot, monkeypatch):
+    monkeypatch.setenv("PRECEDENT_SNAPSHOT_REQUIRED", "false")
+    assert await VectorService().bootstrap_precedents() == 0
@@ -0,0 +1,17 @@
+from app.services.precedent_shortlist import PrecedentShortlist, ShortlistIndex
+
+
+def test_new_precedents_reach_matching_shortlists():
+    index = ShortlistIndex(size=10)
+    index.set(("", "termination"), PrecedentShortlist([1.0, 0.0], size=10))
+    index.set(("employment", "termination"), PrecedentShortlist([1.0, 0.0], size=10))
+    index.set(("lease", "termination"), PrecedentShortlist([1.0, 0.0], size=10))
+
+    index.add_points([
+        ("typed", {"document_types": ["employment"]}, [1.0, 0.1]),
+        ("untyped", {"document_types": []}, [1.0, 0.2]),
+    ])
+
+    assert set(index.get(("", "termination")).members) == {"typed", "untyped"}
+    assert set(index.get(("employment", "termination")).members) == {"typed", "untyped"}
+    assert set(index.get(("lease", "termination")).members) == {"untyped"}
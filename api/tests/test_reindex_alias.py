@@ -0,0 +1,98 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import reindex_service
+from app.services.reindex_journal import ReindexJournal
+from app.services.reindex_service import ReindexService
+from app.services.vector_service import VectorService
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, **kwargs):
+        self.values[key] = value
+
+    def delete(self, key):
+        self.values.pop(key, None)
+
+
+class FakeQdrant:
+    """Collections et alias Qdrant; la création d'alias échoue tant que `alias_failures` > 0."""
+
+    def __init__(self, collections):
+        self.collections = set(collections)
+        self.aliases = {}
+        self.alias_failures = 0
+
+    def get_collections(self):
+        return SimpleNamespace(collections=[SimpleNamespace(name=name) for name in self.collections])
+
+    def get_aliases(self):
+        return SimpleNamespace(aliases=[
+            SimpleNamespace(alias_name=alias, collection_name=target) for alias, target in self.aliases.items()
+        ])
+
+    def delete_collection(self, name):
+        self.collections.discard(name)
+
+    def update_collection_aliases(self, change_aliases_operations):
+        if self.alias_failures:
+            self.alias_failures -= 1
+            raise ConnectionError("qdrant injoignable")
+        for operation in change_aliases_operations:
+            if getattr(operation, "delete_alias", None):
+                self.aliases.pop(operation.delete_alias.alias_name, None)
+            if getattr(operation, "create_alias", None):
+                create = operation.create_alias
+                assert create.alias_name not in self.collections
+                self.aliases[create.alias_name] = create.collection_name
+
+
+def _services(client):
+    vector_service = VectorService.__new__(VectorService)
+    vector_service.backend = "qdrant"
+    vector_service.collection_name = "legal_precedents"
+    vector_service.client = client
+    vector_service._reindex_journal = ReindexJournal(vector_service._cache_key, redis_client=FakeRedis())
+    service = ReindexService.__new__(ReindexService)
+    service.vector_service = vector_service
+    service.client = client
+    service.journal = vector_service.reindex_journal
+    return vector_service, service
+
+
+@pytest.mark.asyncio
+async def test_failed_legacy_migration_is_finished_on_next_resolution(monkeypatch):
+    monkeypatch.setattr(reindex_service, "ALIAS_CREATE_ATTEMPTS", 1)
+    client = FakeQdrant({"legal_precedents", "legal_precedents_v1"})
+    vector_service, service = _services(client)
+
+    client.alias_failures = 1
+    with pytest.raises(ConnectionError):
+        await service._swap_alias("legal_precedents", "legal_precedents", "legal_precedents_v1")
+
+    # Collection historique supprimée, alias absent: la migration inscrite sert les lectures
+    assert "legal_precedents" not in client.collections
+    assert service.journal.pending_alias() == "legal_precedents_v1"
+
+    assert vector_service.unaliased_collection() == "legal_precedents_v1"
+    assert client.aliases == {"legal_precedents": "legal_precedents_v1"}
+    assert service.journal.pending_alias() is None
+
+
+@pytest.mark.asyncio
+async def test_version_swap_is_a_single_alias_operation():
+    client = FakeQdrant({"legal_precedents_v1", "legal_precedents_v2"})
+    client.aliases["legal_precedents"] = "legal_precedents_v1"
+    _, service = _services(client)
+
+    await service._swap_alias("legal_precedents", "legal_precedents_v1", "legal_precedents_v2")
+
+    assert client.aliases == {"legal_precedents": "legal_precedents_v2"}
+    assert service.journal.pending_alias() is None
@@ -0,0 +1,72 @@
+from app.services.collection_versions import CollectionVersions
+from app.services.search_cache import SearchCache, normalize_query
+
+
+class FakeRedis:
+    """Compteurs Redis partagés entre processus (get/incr)."""
+
+    def __init__(self):
+        self.values = {}
+        self.down = False
+
+    def get(self, key):
+        if self.down:
+            raise ConnectionError("redis injoignable")
+        return self.values.get(key)
+
+    def incr(self, key):
+        if self.down:
+            raise ConnectionError("redis injoignable")
+        self.values[key] = int(self.values.get(key, 0)) + 1
+        return self.values[key]
+
+
+def _cache(redis_client):
+    return SearchCache(max_entries=8, ttl=60, versions=CollectionVersions(redis_client))
+
+
+def test_key_ignores_case_and_spacing():
+    cache = _cache(FakeRedis())
+    assert normalize_query("  Clause   PÉNALE ") == "clause pénale"
+    assert cache.make_key("qdrant:c", "Clause  pénale", limit=5) == cache.make_key("qdrant:c", "clause pénale", limit=5)
+    assert cache.make_key("qdrant:c", "clause pénale", limit=5) != cache.make_key("qdrant:c", "clause pénale", limit=10)
+
+
+def test_bump_in_another_process_invalidates_local_entries():
+    redis_client = FakeRedis()
+    api_worker, seed_script = _cache(redis_client), _cache(redis_client)
+
+    key = api_worker.make_key("qdrant:c", "résiliation", limit=5)
+    api_worker.set(key, [{"id": "1"}])
+    assert api_worker.get(key) == [{"id": "1"}]
+
+    seed_script.bump_version("qdrant:c")
+
+    fresh_key = api_worker.make_key("qdrant:c", "résiliation", limit=5)
+    assert fresh_key != key
+    assert api_worker.get(fresh_key) is None
+
+
+def test_local_counter_when_redis_is_down():
+    redis_client = FakeRedis()
+    cache = _cache(redis_client)
+    redis_version = cache.version("qdrant:c")
+
+    redis_client.down = True
+    assert cache.version("qdrant:c") != redis_version
+    before = cache.version("qdrant:c")
+    cache.bump_version("qdrant:c")
+    assert cache.version("qdrant:c") != before
+
+
+def test_bump_only_invalidates_its_namespace():
+    cache = _cache(FakeRedis())
+    key = cache.make_key("qdrant:c", "bail", limit=5)
+    other_key = cache.make_key("qdrant:autre", "bail", limit=5)
+    cache.set(key, [{"id": "1"}])
+    cache.set(other_key, [{"id": "2"}])
+
+    cache.bump_version("qdrant:c")
+
+    assert cache.get(cache.make_key("qdrant:c", "bail", limit=5)) is None
+    assert cache.get(cache.make_key("qdrant:autre", "bail", limit=5)) == [{"id": "2"}]
@@ -0,0 +1,24 @@
+import pytest
+
+from app.services.text_extraction import TextExtractor, TextExtractionError
+
+
+@pytest.mark.asyncio
+async def test_extract_reads_text_in_worker(tmp_path):
+    path = tmp_path / "contrat.txt"
+    path.write_text("Article 1 - Objet du contrat", encoding="utf-8")
+    extractor = TextExtractor(max_workers=1, timeout=30)
+    try:
+        assert await extractor.extract(str(path), ".TXT") == "Article 1 - Objet du contrat"
+    finally:
+        extractor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_missing_file_raises_extraction_error(tmp_path):
+    extractor = TextExtractor(max_workers=1, timeout=30)
+    try:
+        with pytest.raises(TextExtractionError):
+            await extractor.extract(str(tmp_path / "absent.pdf"), ".pdf")
+    finally:
+        extractor.shutdown()
@@ -0,0 +1,41 @@
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+
+from app.services.upload_storage import UploadSizeLimitMiddleware
+
+
+def _client(max_size):
+    app = FastAPI()
+    app.add_middleware(UploadSizeLimitMiddleware, max_size=max_size)
+
+    @app.post("/upload")
+    async def upload(file: UploadFile = File(...)):
+        return {"size": len(await file.read())}
+
+    return TestClient(app)
+
+
+def test_small_upload_is_accepted():
+    response = _client(4096).post("/upload", files={"file": ("a.txt", b"x" * 100, "text/plain")})
+    assert response.status_code == 200
+    assert response.json() == {"size": 100}
+
+
+def test_declared_oversized_upload_is_rejected():
+    response = _client(4096).post("/upload", files={"file": ("a.txt", b"x" * 10000, "text/plain")})
+    assert response.status_code == 413
+
+
+def test_chunked_oversized_upload_is_rejected():
+    body = b"--b\r\nContent-Disposition: form-data; name=\"file\"; filename=\"a.txt\"\r\n\r\n" + b"x" * 10000 + b"\r\n--b--\r\n"
+
+    def chunks():
+        for start in range(0, len(body), 1000):
+            yield body[start:start + 1000]
+
+    response = _client(4096).post(
+        "/upload",
+        content=chunks(),
+        headers={"Content-Type": "multipart/form-data; boundary=b"}
+    )
+    assert response.status_code == 413
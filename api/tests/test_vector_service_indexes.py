@@ -0,0 +1,71 @@
+import uuid
+
+import pytest
+from qdrant_client.http import models
+
+from app.services.collection_versions import CollectionVersions
+from app.services.vector_service import VectorService
+from tests.test_search_cache import FakeRedis
+
+
+@pytest.fixture
+def vector_service(tmp_path, monkeypatch):
+    """Service sur le backend local, sans cache de résultats, versions dans un Redis simulé."""
+    monkeypatch.setenv("VECTOR_BACKEND", "local")
+    monkeypatch.setenv("LOCAL_VECTOR_DIR", str(tmp_path / "vectors"))
+    monkeypatch.setenv("PRECEDENT_COLLECTION", f"precedents_{uuid.uuid4().hex[:8]}")
+    monkeypatch.setenv("PRECEDENT_CACHE_ENABLED", "false")
+    service = VectorService()
+    service.versions = CollectionVersions(FakeRedis())
+    return service
+
+
+def _write_from_other_process(service: VectorService, description: str) -> str:
+    """Précédent écrit dans la collection par un autre processus (script d'amorçage, autre worker)."""
+    collection, model = service.resolve_collection(fresh=True)
+    precedent_id = str(uuid.uuid4())
+    payload = service.precedent_payload("Arrêt", description, "jurisprudence", "haute", None, None, None, model)
+    service.client.upsert(collection_name=collection, points=[
+        models.PointStruct(id=precedent_id, vector=[0.1] * service.vector_size, payload=payload)
+    ])
+    CollectionVersions(service.versions._redis).bump(f"{service.backend}:{collection}")
+    return precedent_id
+
+
+def _ids(hits):
+    return [doc_id for doc_id, _ in hits]
+
+
+@pytest.mark.asyncio
+async def test_lexical_index_sees_writes_from_other_processes(vector_service):
+    own_id = await vector_service.add_precedent(
+        "Arrêt", "Clause de non-concurrence sans contrepartie financière", "jurisprudence", "haute"
+    )
+    index = vector_service._get_lexical_index()
+    assert _ids(index.search("concurrence")) == [own_id]
+
+    other_id = _write_from_other_process(vector_service, "Licenciement pour faute grave du salarié")
+
+    index = vector_service._get_lexical_index()
+    assert _ids(index.search("licenciement")) == [other_id]
+
+
+@pytest.mark.asyncio
+async def test_own_writes_keep_the_lexical_index(vector_service):
+    index = vector_service._get_lexical_index()
+    precedent_id = await vector_service.add_precedent(
+        "Arrêt", "Indemnité d'éviction du bail commercial", "jurisprudence", "haute"
+    )
+    assert vector_service._get_lexical_index() is index
+    assert _ids(index.search("eviction")) == [precedent_id]
+
+
+@pytest.mark.asyncio
+async def test_duplicate_written_by_other_process_is_detected(vector_service):
+    vector_service.dedup_mode = "skip"
+    vector_service._get_duplicate_index()
+
+    description = "Le salarié licencié pour faute grave ne perçoit pas d'indemnité de préavis"
+    other_id = _write_from_other_process(vector_service, description)
+
+    assert await vector_service.add_precedent("Arrêt", description, "jurisprudence", "haute") == other_id
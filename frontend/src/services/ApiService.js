@@ -58,8 +58,26 @@ const ApiService = {
     }).then(response => response.data);
   },
   
-  getAnalysisStatus(analysisId) {
-    return apiClient.get(`/analysis/${analysisId}/status`).then(response => response.data);
+  getAnalysisStatus(analysisId, includeResults = false) {
+    // Sans include_results, le statut est servi depuis Redis (aucun accès MongoDB)
+    const params = includeResults ? { include_results: true } : {};
+    return apiClient.get(`/analysis/${analysisId}/status`, { params }).then(response => response.data);
+  },
+  
+  // Suivi en temps réel (Server-Sent Events); renvoie null si le navigateur ne le permet pas
+  watchAnalysis(analysisId, onEvent, onError) {
+    if (typeof window === 'undefined' || !window.EventSource) {
+      return null;
+    }
+    const source = new EventSource(`${apiClient.defaults.baseURL}/analysis/${analysisId}/events`);
+    source.addEventListener('progress', event => onEvent(JSON.parse(event.data)));
+    // Analyse supprimée: le repli sur /status signale l'erreur
+    source.addEventListener('not_found', event => {
+      source.close();
+      onError(JSON.parse(event.data));
+    });
+    source.onerror = error => onError(error);
+    return source;
   },
   
   getAnalysisResults(analysisId) {
@@ -70,6 +88,15 @@ const ApiService = {
     return apiClient.get('/analysis/history').then(response => response.data);
   },
   
+  // Page de l'historique par curseur: { items, nextCursor } (nextCursor null sur la dernière page)
+  getAnalysisHistoryPage(cursor = null, limit = 25) {
+    const params = cursor ? { limit, cursor } : { limit };
+    return apiClient.get('/analysis/history', { params }).then(response => ({
+      items: response.data,
+      nextCursor: response.headers['x-next-cursor'] || null
+    }));
+  },
+  
   retryAnalysis(analysisId) {
     return apiClient.post(`/analysis/${analysisId}/retry`).then(response => response.data);
   },
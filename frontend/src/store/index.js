@@ -130,8 +130,10 @@ export default createStore({
     },
     async checkAnalysisStatus({ commit }, analysisId) {
       try {
-        const status = await ApiService.getAnalysisStatus(analysisId);
+        let status = await ApiService.getAnalysisStatus(analysisId);
         if (status.status === 'completed') {
+          // Les résultats ne sont chargés qu'une fois, à la fin de l'analyse
+          status = await ApiService.getAnalysisStatus(analysisId, true);
           commit('SET_CURRENT_ANALYSIS', status);
         }
         return status;
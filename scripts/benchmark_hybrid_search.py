@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la recherche de précédents: vectorielle seule vs hybride (dense + BM25).
+
+Les requêtes sont générées à partir des précédents de référence: pour chaque
+précédent, on interroge la base avec ses références juridiques exactes
+(numéros d'arrêt, de délibération, articles) et avec son titre. Le précédent
+d'origine est la réponse attendue.
+
+Usage (depuis le conteneur API, collection déjà initialisée):
+    python3 scripts/benchmark_hybrid_search.py --k 5
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import asyncio
+import argparse
+import statistics
+
+API_DIR = os.getenv("API_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+sys.path.insert(0, API_DIR)
+
+from app.services.vector_service import VectorService  # noqa: E402
+
+DATA_FILE = os.path.join(API_DIR, "app", "data", "initial_precedents.json")
+
+REFERENCE_PATTERN = re.compile(r"(?:n°\s*|article\s+)[\w.-]+|[A-Z]\d{3,}(?:-\d+)*", re.IGNORECASE)
+
+
+def build_queries(precedents):
+    """Construit les couples (requête, titre attendu)."""
+    queries = []
+    for precedent in precedents:
+        text = f"{precedent['title']} {precedent.get('source', '')}"
+        for reference in set(REFERENCE_PATTERN.findall(text)):
+            queries.append((reference, precedent["title"]))
+        queries.append((precedent["title"], precedent["title"]))
+    return queries
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run(mode: str, service: VectorService, queries, k: int):
+    hits = 0
+    latencies = []
+    for query, expected_title in queries:
+        start = time.perf_counter()
+        results = await service.search_precedents(query, limit=k, hybrid=(mode == "hybrid"))
+        latencies.append((time.perf_counter() - start) * 1000)
+        if any(p.title == expected_title for p in results):
+            hits += 1
+
+    return {
+        "mode": mode,
+        "queries": len(queries),
+        f"recall@{k}": hits / len(queries) if queries else 0.0,
+        "p50_ms": statistics.median(latencies) if latencies else 0.0,
+        "p99_ms": percentile(latencies, 99) if latencies else 0.0,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--k", type=int, default=5, help="Nombre de résultats évalués (recall@k)")
+    parser.add_argument("--data-file", default=DATA_FILE, help="Fichier JSON des précédents de référence")
+    args = parser.parse_args()
+
+    with open(args.data_file, "r", encoding="utf-8") as f:
+        precedents = json.load(f)
+
+    queries = build_queries(precedents)
+    service = VectorService()
+
+    # Construire l'index lexical avant de mesurer les latences
+    service._get_lexical_index()
+
+    print(f"{len(queries)} requêtes générées depuis {args.data_file}")
+    for mode in ("dense", "hybrid"):
+        report = await run(mode, service, queries, args.k)
+        print(json.dumps(report, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la pagination de l'historique des analyses: skip/limit contre curseur.
+
+Crée des analyses synthétiques (en-têtes seuls), puis mesure la latence et le
+nombre de clés d'index / documents examinés par MongoDB pour la première et
+la dernière page:
+  - skip: .skip(n).limit(l), qui parcourt toutes les entrées sautées;
+  - curseur: filtre (created_at, id) < curseur sur l'index composé, dont
+    le coût ne dépend pas de la profondeur de la page.
+
+Les analyses synthétiques sont supprimées à la fin.
+
+Usage (depuis le conteneur API):
+    python3 scripts/benchmark_pagination.py --count 200000 --limit 10
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import asyncio
+import argparse
+import statistics
+from datetime import datetime, timedelta
+
+API_DIR = os.getenv("API_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+sys.path.insert(0, API_DIR)
+
+from app.services.mongo_client import create_mongo_client  # noqa: E402
+from app.services.analysis_service import AnalysisService, HISTORY_PROJECTION  # noqa: E402
+from app.services.mongo_indexes import ensure_indexes  # noqa: E402
+from app.services.pagination import KEYSET_SORT, keyset_filter, encode_cursor  # noqa: E402
+
+SEED_DOCUMENT_ID = "pagination-benchmark"
+
+
+async def seed(service: AnalysisService, count: int, batch_size: int = 5000):
+    start = datetime.now() - timedelta(days=365)
+    for offset in range(0, count, batch_size):
+        await service.collection.insert_many([
+            {
+                "id": str(uuid.uuid4()),
+                "document_id": SEED_DOCUMENT_ID,
+                "document_type": "service",
+                "status": "completed",
+                # Quelques créations simultanées: l'ID départage l'ordre
+                "created_at": start + timedelta(seconds=(offset + i) // 2),
+                "updated_at": start,
+                "processing_time": 12.5,
+                "counters": {"clause_count": 10, "max_risk_level": 3, "recommendation_count": 4, "risk_count": 2}
+            }
+            for i in range(min(batch_size, count - offset))
+        ])
+
+
+async def timed(run, repeat: int):
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await run()
+        durations.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(durations), 2)
+
+
+async def examined(cursor):
+    stats = (await cursor.explain()).get("executionStats", {})
+    return {"keys_examined": stats.get("totalKeysExamined"), "docs_examined": stats.get("totalDocsExamined")}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=200000, help="Nombre d'analyses synthétiques")
+    parser.add_argument("--limit", type=int, default=10, help="Taille d'une page")
+    parser.add_argument("--repeat", type=int, default=20, help="Répétitions par mesure (médiane)")
+    args = parser.parse_args()
+
+    client = create_mongo_client()
+    service = AnalysisService(client)
+    try:
+        await ensure_indexes(service.db)
+        await seed(service, args.count)
+        total = await service.collection.count_documents({})
+        last_skip = max(total - args.limit, 0)
+
+        # Curseur désignant la dernière page: position de l'élément qui la précède
+        before_last = await service.collection.find({}, {"_id": 0, "id": 1, "created_at": 1}).sort(KEYSET_SORT).skip(max(last_skip - 1, 0)).limit(1).to_list(1)
+        last_cursor = encode_cursor(before_last[0]["created_at"], before_last[0]["id"]) if last_skip else None
+
+        def skip_query(skip):
+            return service.collection.find({}, HISTORY_PROJECTION).sort(KEYSET_SORT).skip(skip).limit(args.limit)
+
+        def cursor_query(cursor):
+            return service.collection.find(keyset_filter(cursor), HISTORY_PROJECTION).sort(KEYSET_SORT).limit(args.limit)
+
+        report = {"analyses": total, "page_size": args.limit, "pages": []}
+        for label, query in (
+            ("skip, première page", lambda: skip_query(0)),
+            ("skip, dernière page", lambda: skip_query(last_skip)),
+            ("curseur, première page", lambda: cursor_query(None)),
+            ("curseur, dernière page", lambda: cursor_query(last_cursor)),
+        ):
+            latency = await timed(lambda: query().to_list(args.limit), args.repeat)
+            report["pages"].append({"mode": label, "latency_ms": latency, **(await examined(query()))})
+    finally:
+        await service.collection.delete_many({"document_id": SEED_DOCUMENT_ID})
+        client.close()
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Benchmark des allers-retours MongoDB et Redis consacrés au suivi d'une analyse.
+
+Rejoue les transitions du workflow séquentiel (démarrage, progressions 0.1 à
+0.8, fin) sur une analyse temporaire, de deux façons:
+  - avant: lecture + écriture MongoDB puis SET Redis à chaque transition,
+    comme le faisait l'orchestrateur;
+  - après: ProgressReporter (pipeline Redis HSET+PUBLISH par transition,
+    écriture MongoDB différée et immédiate pour le statut final).
+
+Les commandes MongoDB sont comptées par un CommandListener pymongo, les
+allers-retours Redis au niveau de la connexion (un pipeline = un envoi).
+
+Usage (depuis le conteneur API):
+    python3 scripts/benchmark_progress_reporting.py --step-delay 0.5
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+
+from pymongo import monitoring
+from redis.connection import Connection
+
+API_DIR = os.getenv("API_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+sys.path.insert(0, API_DIR)
+
+from app.models.analysis import AnalysisStatus  # noqa: E402
+from app.services.mongo_client import create_mongo_client  # noqa: E402
+from app.services.redis_client import create_redis_client  # noqa: E402
+from app.services.analysis_service import AnalysisService  # noqa: E402
+from app.services.progress_reporter import ProgressReporter, progress_key  # noqa: E402
+
+# Progressions intermédiaires du workflow séquentiel
+STEPS = [
+    (0.1, "text_extraction"),
+    (0.2, "clause_extraction"),
+    (0.4, "recommendations"),
+    (0.6, "risks"),
+    (0.8, "precedents"),
+]
+
+
+class CommandCounter(monitoring.CommandListener):
+    def __init__(self):
+        self.count = 0
+
+    def started(self, event):
+        self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+class RedisCounter:
+    """Compte les envois de commandes sur les connexions Redis (un pipeline = un envoi)."""
+
+    def __init__(self):
+        self.count = 0
+        self._send = Connection.send_packed_command
+        counter = self
+
+        def send_packed_command(connection, command, check_health=True):
+            counter.count += 1
+            return counter._send(connection, command, check_health)
+
+        Connection.send_packed_command = send_packed_command
+
+
+async def legacy_run(service: AnalysisService, redis_client, analysis_id: str, step_delay: float):
+    """Ancien suivi: lecture + écriture MongoDB et SET Redis par transition."""
+    async def status(value):
+        await service.get_analysis(analysis_id)
+        await service.update_analysis_status(analysis_id, value)
+        redis_client.set(f"analysis:{analysis_id}:status", value.value)
+
+    async def progress(value):
+        await service.get_analysis(analysis_id)
+        await service.update_analysis_progress(analysis_id, value)
+        redis_client.set(f"analysis:{analysis_id}:progress", value)
+
+    await status(AnalysisStatus.IN_PROGRESS)
+    for value, _ in STEPS:
+        await progress(value)
+        await asyncio.sleep(step_delay)
+    await status(AnalysisStatus.COMPLETED)
+    await progress(1.0)
+
+
+async def reporter_run(service: AnalysisService, redis_client, analysis_id: str, step_delay: float, flush_interval: float):
+    reporter = ProgressReporter(analysis_id, service, redis_client, flush_interval=flush_interval)
+    await reporter.start()
+    for value, stage in STEPS:
+        await reporter.report(value, stage=stage)
+        await asyncio.sleep(step_delay)
+    await reporter.complete()
+
+
+async def measure(label, run, mongo_counter, redis_counter):
+    mongo_before, redis_before = mongo_counter.count, redis_counter.count
+    start = time.perf_counter()
+    await run()
+    return {
+        "mode": label,
+        "mongo_round_trips": mongo_counter.count - mongo_before,
+        "redis_round_trips": redis_counter.count - redis_before,
+        "duration_s": round(time.perf_counter() - start, 2)
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--step-delay", type=float, default=0.5, help="Durée simulée de chaque étape (s)")
+    parser.add_argument("--flush-interval", type=float, default=float(os.getenv("PROGRESS_FLUSH_INTERVAL", "2.0")), help="Intervalle d'écriture différée MongoDB (s)")
+    args = parser.parse_args()
+
+    mongo_counter = CommandCounter()
+    client = create_mongo_client(event_listeners=[mongo_counter])
+    service = AnalysisService(client)
+    redis_client = create_redis_client()
+    redis_counter = RedisCounter()
+
+    reports = []
+    for label in ("avant", "après"):
+        analysis = await service.create_analysis(document_id="benchmark", document_type="other")
+        if label == "avant":
+            run = lambda: legacy_run(service, redis_client, analysis.id, args.step_delay)  # noqa: E731
+        else:
+            run = lambda: reporter_run(service, redis_client, analysis.id, args.step_delay, args.flush_interval)  # noqa: E731
+        report = await measure(label, run, mongo_counter, redis_counter)
+        # Nettoyage hors mesure (l'écriture différée éventuelle est déjà terminée)
+        await asyncio.sleep(args.flush_interval)
+        await service.collection.delete_one({"id": analysis.id})
+        redis_client.delete(
+            progress_key(analysis.id),
+            f"analysis:{analysis.id}:status",
+            f"analysis:{analysis.id}:progress"
+        )
+        report["total_round_trips"] = report["mongo_round_trips"] + report["redis_round_trips"]
+        reports.append(report)
+
+    client.close()
+    print(json.dumps(reports, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
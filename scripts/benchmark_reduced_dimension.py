@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Benchmark du mode dimension réduite (embeddings Matryoshka) sur notre corpus.
+
+Les vecteurs complets sont lus depuis l'artefact de précédents pré-vectorisés
+(scripts/build_precedent_snapshot.py) ou depuis une collection Qdrant (ex: le
+corpus de clauses legal_clauses). Une partie des points sert de requêtes; pour
+chaque dimension réduite, le script mesure:
+  - la mémoire vive estimée (vecteurs "fast" + graphe HNSW, vecteurs complets sur disque),
+  - le recall@k de la première passe seule (vecteurs tronqués),
+  - le recall@k après re-scoring exact des `oversampling` x k premiers candidats,
+par rapport à la recherche exacte sur les vecteurs complets.
+
+La première passe est exacte (NumPy) pour isoler l'effet de la troncature;
+l'effet de HNSW est mesuré par scripts/benchmark_vector_storage.py.
+
+Usage:
+    python3 scripts/benchmark_reduced_dimension.py --dims 128 256 512
+    python3 scripts/benchmark_reduced_dimension.py --collection legal_clauses --queries 500
+"""
+
+import os
+import sys
+import json
+import argparse
+
+import numpy as np
+
+API_DIR = os.getenv("API_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+sys.path.insert(0, API_DIR)
+
+from app.services.precedent_snapshot import DEFAULT_SNAPSHOT_DIR, read_snapshot  # noqa: E402
+from app.services.vector_service import CollectionConfig  # noqa: E402
+
+
+def load_collection(collection_name: str, limit: int) -> np.ndarray:
+    from qdrant_client import QdrantClient
+
+    client = QdrantClient(url=os.getenv("QDRANT_URI", "http://qdrant:6333"), timeout=600)
+    vectors = []
+    offset = None
+    while len(vectors) < limit:
+        points, offset = client.scroll(
+            collection_name=collection_name,
+            limit=1024,
+            offset=offset,
+            with_payload=False,
+            with_vectors=True
+        )
+        vectors.extend(CollectionConfig.full_vector(point.vector) for point in points)
+        if offset is None:
+            break
+    return np.asarray(vectors[:limit], dtype=np.float32)
+
+
+def normalize(matrix: np.ndarray) -> np.ndarray:
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True).clip(min=1e-12)
+
+
+def top_k(queries: np.ndarray, corpus: np.ndarray, k: int) -> np.ndarray:
+    scores = queries @ corpus.T
+    k = min(k, corpus.shape[0])
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1)
+    return np.take_along_axis(top, order, axis=1)
+
+
+def recall(found: np.ndarray, expected: np.ndarray) -> float:
+    return float(np.mean([len(set(f) & set(e)) / len(e) for f, e in zip(found, expected)]))
+
+
+def estimated_ram_mb(points: int, dim: int, hnsw_m: int) -> float:
+    """Vecteurs float32 en RAM + graphe HNSW (m * 2 liens de 4 octets), marge de 50%."""
+    return points * (dim * 4 + hnsw_m * 2 * 4) * 1.5 / (1024 * 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--snapshot", default=os.getenv("PRECEDENT_SNAPSHOT_DIR", DEFAULT_SNAPSHOT_DIR), help="Artefact de vecteurs complets")
+    parser.add_argument("--collection", default=None, help="Lire les vecteurs dans cette collection Qdrant plutôt que dans l'artefact")
+    parser.add_argument("--max-points", type=int, default=1_000_000)
+    parser.add_argument("--dims", type=int, nargs="*", default=[64, 128, 256, 512])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--oversampling", type=float, default=4.0)
+    parser.add_argument("--hnsw-m", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if args.collection:
+        vectors = load_collection(args.collection, args.max_points)
+    else:
+        _, vectors, _, _ = read_snapshot(args.snapshot)
+        vectors = np.asarray(vectors[:args.max_points], dtype=np.float32)
+
+    # Requêtes tirées du corpus et retirées de l'index
+    rng = np.random.default_rng(args.seed)
+    n_queries = min(args.queries, max(1, len(vectors) // 5))
+    query_rows = rng.choice(len(vectors), size=n_queries, replace=False)
+    mask = np.ones(len(vectors), dtype=bool)
+    mask[query_rows] = False
+    queries, corpus = normalize(vectors[query_rows]), normalize(vectors[mask])
+    full_dim = corpus.shape[1]
+    k = min(args.k, len(corpus))
+
+    ground_truth = top_k(queries, corpus, k)
+    print(f"{len(corpus)} points de dimension {full_dim}, {len(queries)} requêtes")
+    print(json.dumps({
+        "dimension": full_dim,
+        "estimated_ram_mb": round(estimated_ram_mb(len(corpus), full_dim, args.hnsw_m), 1),
+        f"recall@{k}": 1.0,
+    }))
+
+    candidates = int(k * args.oversampling)
+    for dim in sorted(d for d in args.dims if d < full_dim):
+        fast_queries = normalize(queries[:, :dim])
+        fast_corpus = normalize(corpus[:, :dim])
+        first_pass = top_k(fast_queries, fast_corpus, candidates)
+
+        # Re-scoring exact des candidats sur les vecteurs complets
+        rescored_scores = np.einsum("qd,qcd->qc", queries, corpus[first_pass])
+        order = np.argsort(-rescored_scores, axis=1)[:, :k]
+        rescored = np.take_along_axis(first_pass, order, axis=1)
+
+        print(json.dumps({
+            "dimension": dim,
+            "oversampling": args.oversampling,
+            "estimated_ram_mb": round(estimated_ram_mb(len(corpus), dim, args.hnsw_m), 1),
+            "full_vectors_on_disk_mb": round(len(corpus) * full_dim * 4 / (1024 * 1024), 1),
+            f"recall@{k}_first_pass": round(recall(first_pass[:, :k], ground_truth), 4),
+            f"recall@{k}_rescored": round(recall(rescored, ground_truth), 4),
+        }))
+
+
+if __name__ == "__main__":
+    main()
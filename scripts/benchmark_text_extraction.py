@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Benchmark de l'extraction de texte: dans la boucle d'événements contre pool de processus.
+
+Génère des PDF synthétiques (texte de contrat, N pages), puis lance leur
+extraction simultanée de deux façons:
+  - en ligne: pypdf appelé directement dans une coroutine, comme avant le
+    pool (la boucle d'événements est bloquée pendant chaque extraction);
+  - pool: TextExtractor (un processus par cœur, délai et mémoire plafonnés).
+
+Pour chaque mode: durée totale, latence des extractions (médiane, p95) et
+retard de la boucle d'événements, mesuré par une tâche qui se réveille toutes
+les 10 ms (un retard de plusieurs secondes = API figée).
+
+Usage (depuis le conteneur API):
+    python3 scripts/benchmark_text_extraction.py --documents 50 --pages 200
+    python3 scripts/benchmark_text_extraction.py --skip-inline --workers 8
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import statistics
+
+API_DIR = os.getenv("API_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+sys.path.insert(0, API_DIR)
+
+from app.services.text_extraction import TextExtractor, read_text  # noqa: E402
+
+TICK_SECONDS = 0.01
+
+
+def generate_pdf(path: str, pages: int, lines_per_page: int = 45):
+    """PDF minimal de `pages` pages de texte (police Helvetica standard, sans dépendance)."""
+    line = "Article {page}.{index} - Le prestataire s'engage a respecter les obligations du present contrat."
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # arbre des pages, complété après les pages
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_ids = []
+    for page in range(pages):
+        text = " ".join(
+            f"({line.format(page=page + 1, index=index + 1)}) Tj T*"
+            for index in range(lines_per_page)
+        )
+        stream = f"BT /F1 9 Tf 11 TL 40 800 Td {text} ET".encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(len(objects))
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids).encode()
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, pages)
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    output += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, "wb") as f:
+        f.write(output)
+
+
+async def loop_lag(samples, stop: asyncio.Event):
+    """Retards (ms) de réveil d'une tâche programmée toutes les TICK_SECONDS."""
+    while not stop.is_set():
+        expected = time.perf_counter() + TICK_SECONDS
+        await asyncio.sleep(TICK_SECONDS)
+        samples.append(max(0.0, (time.perf_counter() - expected) * 1000))
+
+
+async def run(mode: str, paths, extractor=None):
+    lags = []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(loop_lag(lags, stop))
+    await asyncio.sleep(TICK_SECONDS * 2)
+
+    # Latence mesurée depuis la soumission commune: inclut l'attente derrière les autres extractions
+    async def extract(path):
+        if extractor is None:
+            text = read_text(path, ".pdf")  # bloque la boucle, comme avant le pool
+        else:
+            text = await extractor.extract(path, ".pdf")
+        return time.perf_counter() - start, len(text)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(extract(path) for path in paths))
+    wall = time.perf_counter() - start
+    stop.set()
+    await ticker
+
+    latencies = sorted(latency for latency, _ in results)
+    lags.sort()
+    return {
+        "mode": mode,
+        "wall_s": round(wall, 2),
+        "documents_per_s": round(len(paths) / wall, 2),
+        "latency_p50_s": round(statistics.median(latencies), 2),
+        "latency_p95_s": round(latencies[int(0.95 * (len(latencies) - 1))], 2),
+        "loop_lag_max_ms": round(lags[-1], 1) if lags else None,
+        "loop_lag_p99_ms": round(lags[int(0.99 * (len(lags) - 1))], 1) if lags else None,
+        "characters": sum(length for _, length in results)
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=50, help="Nombre de PDF extraits simultanément")
+    parser.add_argument("--pages", type=int, default=200, help="Pages par PDF")
+    parser.add_argument("--workers", type=int, default=None, help="Processus du pool (défaut: un par cœur)")
+    parser.add_argument("--timeout", type=float, default=None, help="Délai maximum d'une extraction (secondes)")
+    parser.add_argument("--max-memory-mb", type=int, default=None, help="Mémoire maximum d'un processus (Mo)")
+    parser.add_argument("--skip-inline", action="store_true", help="Ne mesurer que le pool de processus")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="extraction-benchmark-") as directory:
+        # Un fichier par document: pas d'effet de cache entre extractions d'un même fichier
+        paths = []
+        for index in range(args.documents):
+            path = os.path.join(directory, f"contrat-{index}.pdf")
+            generate_pdf(path, args.pages)
+            paths.append(path)
+
+        extractor = TextExtractor(max_workers=args.workers, timeout=args.timeout, max_memory_mb=args.max_memory_mb)
+        report = {
+            "documents": args.documents,
+            "pages": args.pages,
+            "cpu_count": os.cpu_count(),
+            "workers": extractor.max_workers,
+            "runs": []
+        }
+        try:
+            if not args.skip_inline:
+                report["runs"].append(await run("en ligne (boucle d'événements)", paths))
+            # Démarrage des processus hors mesure
+            await extractor.extract(paths[0], ".pdf")
+            report["runs"].append(await run("pool de processus", paths, extractor))
+        finally:
+            extractor.shutdown()
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
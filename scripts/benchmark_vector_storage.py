@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Benchmark des configurations de stockage vectoriel Qdrant.
+
+Pour chaque configuration (HNSW m/ef_construct, ef de recherche, vecteurs sur
+disque, quantification scalaire/binaire avec rescoring), le script crée une
+collection temporaire, y charge un corpus synthétique puis mesure:
+  - la mémoire vive estimée (vecteurs + quantification + graphe HNSW),
+  - les latences p50/p99 de recherche,
+  - le recall@k par rapport à une recherche exacte (force brute NumPy).
+
+La configuration "local-numpy" exécute le même protocole sur l'index embarqué
+(app.services.local_vector_index) pour le comparer à Qdrant.
+
+Usage (Qdrant accessible via QDRANT_URI):
+    python3 scripts/benchmark_vector_storage.py --points 1000000 --dim 768
+"""
+
+import os
+import sys
+import time
+import json
+import argparse
+import statistics
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+API_DIR = os.getenv("API_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+sys.path.insert(0, API_DIR)
+
+from app.services.vector_service import CollectionConfig  # noqa: E402
+from app.services.local_vector_index import LocalVectorClient, get_local_vector_client  # noqa: E402
+
+QDRANT_URI = os.getenv("QDRANT_URI", "http://qdrant:6333")
+
+CONFIGURATIONS = {
+    "float32": CollectionConfig(),
+    "float32-ef128": CollectionConfig(search_ef=128),
+    "on-disk": CollectionConfig(on_disk=True),
+    "scalar-rescore": CollectionConfig(on_disk=True, quantization="scalar"),
+    "scalar-norescore": CollectionConfig(on_disk=True, quantization="scalar", quantization_rescore=False),
+    "binary-rescore": CollectionConfig(on_disk=True, quantization="binary", quantization_oversampling=3.0),
+    "m32-ef200": CollectionConfig(hnsw_m=32, hnsw_ef_construct=200),
+    "local-numpy": CollectionConfig(on_disk=True),
+}
+
+# Configurations servies par l'index local plutôt que par Qdrant
+LOCAL_CONFIGURATIONS = {"local-numpy"}
+
+
+def synthetic_chunk(index: int, size: int, dim: int, centroids: np.ndarray, seed: int) -> np.ndarray:
+    """Génère un bloc déterministe de vecteurs normalisés regroupés autour de centroïdes."""
+    rng = np.random.default_rng(seed + index + 1)
+    assignments = rng.integers(0, len(centroids), size=size)
+    vectors = centroids[assignments] + 0.35 * rng.standard_normal((size, dim), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype(np.float32)
+
+
+def iter_chunks(points: int, chunk_size: int, dim: int, centroids: np.ndarray, seed: int):
+    for index, start in enumerate(range(0, points, chunk_size)):
+        size = min(chunk_size, points - start)
+        yield start, synthetic_chunk(index, size, dim, centroids, seed)
+
+
+def exact_top_k(queries: np.ndarray, args, centroids: np.ndarray) -> np.ndarray:
+    """Vérité terrain: top-k exact par produit scalaire, bloc par bloc."""
+    best_scores = np.full((len(queries), args.k), -np.inf, dtype=np.float32)
+    best_ids = np.zeros((len(queries), args.k), dtype=np.int64)
+    for start, chunk in iter_chunks(args.points, args.chunk_size, args.dim, centroids, args.seed):
+        scores = queries @ chunk.T
+        ids = np.broadcast_to(np.arange(start, start + len(chunk)), scores.shape)
+        all_scores = np.concatenate([best_scores, scores], axis=1)
+        all_ids = np.concatenate([best_ids, ids], axis=1)
+        top = np.argpartition(-all_scores, args.k - 1, axis=1)[:, :args.k]
+        best_scores = np.take_along_axis(all_scores, top, axis=1)
+        best_ids = np.take_along_axis(all_ids, top, axis=1)
+    return best_ids
+
+
+def estimated_ram_mb(config: CollectionConfig, points: int, dim: int) -> float:
+    """Estimation de la mémoire résidente (formules de dimensionnement Qdrant)."""
+    ram = 0.0
+    if not config.on_disk:
+        ram += points * dim * 4
+    if config.quantization == "scalar" and config.quantization_always_ram:
+        ram += points * dim
+    elif config.quantization == "binary" and config.quantization_always_ram:
+        ram += points * dim / 8
+    # Graphe HNSW: m * 2 liens de 4 octets par point sur la couche 0
+    ram += points * config.hnsw_m * 2 * 4
+    return ram * 1.5 / (1024 * 1024)
+
+
+def wait_for_indexing(client, collection_name: str):
+    if isinstance(client, LocalVectorClient):
+        return
+    while client.get_collection(collection_name).status != models.CollectionStatus.GREEN:
+        time.sleep(1)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def benchmark(client, name: str, config: CollectionConfig, queries, ground_truth, centroids, args):
+    collection_name = f"bench_storage_{name.replace('-', '_')}"
+    client.recreate_collection(
+        collection_name=collection_name,
+        vectors_config=config.vectors_config(args.dim),
+        hnsw_config=config.hnsw_config(),
+        quantization_config=config.quantization_config()
+    )
+
+    start = time.perf_counter()
+    for offset, chunk in iter_chunks(args.points, args.chunk_size, args.dim, centroids, args.seed):
+        client.upload_collection(
+            collection_name=collection_name,
+            vectors=chunk,
+            ids=range(offset, offset + len(chunk)),
+            batch_size=1024,
+            parallel=4
+        )
+    wait_for_indexing(client, collection_name)
+    build_time = time.perf_counter() - start
+
+    latencies = []
+    recalls = []
+    for query, expected in zip(queries, ground_truth):
+        start = time.perf_counter()
+        result = client.search(
+            collection_name=collection_name,
+            query_vector=query.tolist(),
+            search_params=config.search_params(),
+            limit=args.k
+        )
+        latencies.append((time.perf_counter() - start) * 1000)
+        found = {point.id for point in result}
+        recalls.append(len(found & set(expected.tolist())) / args.k)
+
+    if not args.keep:
+        client.delete_collection(collection_name)
+
+    return {
+        "configuration": name,
+        "points": args.points,
+        "dim": args.dim,
+        "build_s": round(build_time, 1),
+        "estimated_ram_mb": round(estimated_ram_mb(config, args.points, args.dim), 1),
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        f"recall@{args.k}": round(float(np.mean(recalls)), 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=1_000_000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument("--clusters", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--configs", nargs="*", default=list(CONFIGURATIONS), choices=list(CONFIGURATIONS))
+    parser.add_argument("--keep", action="store_true", help="Conserver les collections de benchmark")
+    parser.add_argument("--local-dir", default="/tmp/bench_vector_index", help="Répertoire de l'index local")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    centroids = rng.standard_normal((args.clusters, args.dim), dtype=np.float32)
+    queries = synthetic_chunk(-1, args.queries, args.dim, centroids, args.seed + 10_000)
+
+    print(f"Calcul de la vérité terrain sur {args.points} points...")
+    ground_truth = exact_top_k(queries, args, centroids)
+
+    qdrant_client = QdrantClient(url=QDRANT_URI, timeout=600)
+    local_client = get_local_vector_client(args.local_dir)
+    for name in args.configs:
+        client = local_client if name in LOCAL_CONFIGURATIONS else qdrant_client
+        report = benchmark(client, name, CONFIGURATIONS[name], queries, ground_truth, centroids, args)
+        print(json.dumps(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Construit l'artefact de précédents pré-vectorisés chargé au démarrage de l'API.
+
+Les précédents de référence sont découpés en passages (mêmes paramètres que
+VectorService), vectorisés par lots avec le modèle d'embedding configuré, puis
+écrits dans un répertoire versionné:
+    manifest.json   format, modèle, dimension, empreintes, fichier source
+    vectors.npy     matrice float32 (points x dimension)
+    payloads.jsonl  une ligne {"id", "payload"} par point, dans le même ordre
+
+Les IDs sont dérivés du contenu: recharger l'artefact n'ajoute pas de doublons.
+Une fois l'artefact construit, un nouvel environnement démarre sans modèle ni réseau.
+
+Exécuté à la construction de l'image API (api/Dockerfile), qui range l'artefact
+dans /opt/precedent_snapshot. Usage manuel (clé du fournisseur d'embeddings requise):
+    python3 scripts/build_precedent_snapshot.py
+    python3 scripts/build_precedent_snapshot.py --model text-embedding-3-large --output /tmp/snapshot
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import asyncio
+import argparse
+
+import numpy as np
+
+API_DIR = os.getenv("API_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+sys.path.insert(0, API_DIR)
+
+from app.llm.llm_factory import LLMService  # noqa: E402
+from app.services.dedup_index import content_hash  # noqa: E402
+from app.services.passage_search import split_passages  # noqa: E402
+from app.services.precedent_snapshot import DEFAULT_SNAPSHOT_DIR, file_sha256, write_snapshot  # noqa: E402
+from app.services.vector_service import VectorService, DEFAULT_EMBEDDING_MODEL, embedding_dimension  # noqa: E402
+
+DATA_FILE = os.path.join(API_DIR, "app", "data", "initial_precedents.json")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data-file", default=DATA_FILE, help="Fichier JSON des précédents de référence")
+    parser.add_argument("--output", default=os.getenv("PRECEDENT_SNAPSHOT_DIR", DEFAULT_SNAPSHOT_DIR), help="Répertoire de l'artefact")
+    parser.add_argument("--model", default=os.getenv("EMBEDDING_MODEL", DEFAULT_EMBEDDING_MODEL), help="Modèle d'embedding")
+    parser.add_argument("--batch-size", type=int, default=64, help="Passages par appel d'embeddings")
+    parser.add_argument("--passage-words", type=int, default=int(os.getenv("PRECEDENT_PASSAGE_WORDS", "200")))
+    parser.add_argument("--passage-overlap", type=int, default=int(os.getenv("PRECEDENT_PASSAGE_OVERLAP", "50")))
+    args = parser.parse_args()
+
+    with open(args.data_file, "r", encoding="utf-8") as f:
+        precedents = json.load(f)
+
+    ids, payloads, texts = [], [], []
+    for precedent in precedents:
+        precedent_id = str(uuid.uuid5(uuid.NAMESPACE_URL, f"precedent:{content_hash(precedent['description'])}"))
+        payload = VectorService.precedent_payload(
+            precedent["title"],
+            precedent["description"],
+            precedent["type"],
+            precedent["relevance"],
+            precedent.get("source"),
+            precedent.get("jurisdiction"),
+            precedent.get("document_types"),
+            args.model
+        )
+        passages = split_passages(precedent["description"], args.passage_words, args.passage_overlap)
+        for (point_id, passage_payload), passage in zip(
+            VectorService.passage_payloads(precedent_id, payload, passages), passages
+        ):
+            ids.append(point_id)
+            payloads.append(passage_payload)
+            texts.append(passage)
+
+    start = time.perf_counter()
+    llm_service = LLMService()
+    vectors = []
+    for offset in range(0, len(texts), args.batch_size):
+        vectors.extend(await llm_service.get_embeddings(texts[offset:offset + args.batch_size], model=args.model))
+    matrix = np.asarray(vectors, dtype=np.float32)
+    if matrix.shape[1] != embedding_dimension(args.model):
+        raise SystemExit(f"Dimension inattendue {matrix.shape[1]} pour {args.model}")
+
+    manifest = write_snapshot(
+        args.output,
+        ids,
+        matrix,
+        payloads,
+        args.model,
+        precedents=len(precedents),
+        source_file=os.path.basename(args.data_file),
+        source_sha256=file_sha256(args.data_file),
+        passage_words=args.passage_words,
+        passage_overlap=args.passage_overlap
+    )
+    print(f"{len(precedents)} précédents, {len(ids)} passages vectorisés en {time.perf_counter() - start:.1f}s")
+    print(json.dumps(manifest, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Contrôle des plans d'exécution MongoDB des requêtes des services.
+
+Crée les index manquants (comme au démarrage de l'API), puis demande à
+MongoDB le plan retenu (explain) pour chaque forme de requête émise par
+DocumentService et AnalysisService. Le script échoue (code 1) si l'une
+d'elles parcourt toute la collection (COLLSCAN).
+
+Usage (depuis le conteneur API):
+    python3 scripts/check_mongo_query_plans.py
+    docker-compose exec -T -e API_DIR=/app api python3 - < scripts/check_mongo_query_plans.py
+"""
+
+import os
+import sys
+import asyncio
+import argparse
+
+API_DIR = os.getenv("API_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+sys.path.insert(0, API_DIR)
+
+from app.services.mongo_client import create_mongo_client, get_mongo_database  # noqa: E402
+from app.services.mongo_indexes import ensure_indexes, audit_query_shapes  # noqa: E402
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--no-create", action="store_true", help="Ne pas créer les index manquants avant le contrôle")
+    args = parser.parse_args()
+
+    client = create_mongo_client()
+    db = get_mongo_database(client)
+    try:
+        if not args.no_create:
+            await ensure_indexes(db)
+        results = await audit_query_shapes(db)
+    finally:
+        client.close()
+
+    failures = 0
+    for result in results:
+        status = "❌ COLLSCAN" if result["collscan"] else "✅"
+        failures += int(result["collscan"])
+        print(f"{status} {result['collection']}.{result['name']}: {' > '.join(result['stages'])} (index: {result['index']})")
+
+    if failures:
+        print(f"{failures} requête(s) sans index")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Déduplication par lots de la collection de précédents (MinHash/LSH).
+
+Sans --apply, affiche seulement les groupes de doublons détectés. Avec
+--apply, conserve le plus ancien précédent de chaque groupe (enrichi des
+métadonnées de ses doublons) et supprime les autres. Le rapport inclut le
+débit de traitement (précédents/s et signatures/s).
+
+Usage (depuis le conteneur API):
+    python3 scripts/dedup_precedents.py --threshold 0.8
+    python3 scripts/dedup_precedents.py --apply
+"""
+
+import os
+import sys
+import json
+import asyncio
+import argparse
+
+API_DIR = os.getenv("API_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+sys.path.insert(0, API_DIR)
+
+from app.services.vector_service import VectorService  # noqa: E402
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--apply", action="store_true", help="Supprimer les doublons détectés")
+    parser.add_argument("--threshold", type=float, default=None, help="Similarité de Jaccard minimale (défaut: PRECEDENT_DEDUP_THRESHOLD)")
+    parser.add_argument("--batch-size", type=int, default=256, help="Taille des lots de lecture")
+    args = parser.parse_args()
+
+    service = VectorService()
+    if args.threshold is not None:
+        service.dedup_threshold = args.threshold
+
+    report = await service.deduplicate_collection(apply=args.apply, batch_size=args.batch_size)
+    for group in report.pop("groups"):
+        print(f"conservé {group['kept']}:")
+        for duplicate in group["duplicates"]:
+            print(f"  - {duplicate['id']} ({duplicate['similarity']:.2f}) {duplicate['title']}")
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Test de charge des connexions MongoDB de l'API.
+
+Envoie des requêtes concurrentes à des routes qui lisent MongoDB (historique
+des analyses, liste des documents) et relève pendant le test le nombre de
+connexions ouvertes côté serveur (serverStatus.connections.current). Avec le
+client partagé, ce nombre doit rester plat (borné par MONGODB_MAX_POOL_SIZE)
+quel que soit le nombre de requêtes.
+
+Usage (API démarrée, depuis le conteneur API ou l'hôte):
+    python3 scripts/load_test_mongo_connections.py --requests 2000 --concurrency 50
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import statistics
+
+import httpx
+
+API_DIR = os.getenv("API_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+sys.path.insert(0, API_DIR)
+
+from app.services.mongo_client import create_mongo_client  # noqa: E402
+
+ROUTES = ["/analysis/history?limit=10", "/documents/"]
+
+
+async def current_connections(admin_db) -> int:
+    status = await admin_db.command("serverStatus")
+    return status["connections"]["current"]
+
+
+async def sample_connections(admin_db, samples, stop: asyncio.Event, interval: float):
+    while not stop.is_set():
+        samples.append(await current_connections(admin_db))
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=os.getenv("API_URL", "http://localhost:8000"), help="URL de l'API")
+    parser.add_argument("--requests", type=int, default=2000, help="Nombre total de requêtes")
+    parser.add_argument("--concurrency", type=int, default=50, help="Requêtes simultanées")
+    parser.add_argument("--interval", type=float, default=0.2, help="Intervalle d'échantillonnage des connexions (s)")
+    parser.add_argument("--max-growth", type=int, default=None, help="Croissance maximale tolérée (défaut: MONGODB_MAX_POOL_SIZE)")
+    args = parser.parse_args()
+
+    # Connexion de mesure distincte: elle compte pour une connexion dans les relevés
+    monitor = create_mongo_client()
+    admin_db = monitor.admin
+    baseline = await current_connections(admin_db)
+
+    samples = []
+    stop = asyncio.Event()
+    sampler = asyncio.create_task(sample_connections(admin_db, samples, stop, args.interval))
+
+    latencies = []
+    errors = 0
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async with httpx.AsyncClient(base_url=args.url, timeout=30.0) as http:
+        async def call(index: int):
+            nonlocal errors
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    response = await http.get(ROUTES[index % len(ROUTES)])
+                    response.raise_for_status()
+                except Exception:
+                    errors += 1
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(call(i) for i in range(args.requests)))
+        duration = time.perf_counter() - start
+
+    stop.set()
+    await sampler
+    final = await current_connections(admin_db)
+    monitor.close()
+
+    max_growth = args.max_growth if args.max_growth is not None else int(os.getenv("MONGODB_MAX_POOL_SIZE", "50"))
+    peak = max(samples) if samples else final
+    report = {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "errors": errors,
+        "duration_s": round(duration, 2),
+        "requests_per_s": round(args.requests / duration, 1) if duration else None,
+        "latency_p50_ms": round(statistics.median(latencies), 1) if latencies else None,
+        "latency_p95_ms": round(statistics.quantiles(latencies, n=20)[18], 1) if len(latencies) >= 20 else None,
+        "connections_baseline": baseline,
+        "connections_peak": peak,
+        "connections_final": final,
+        "connections_growth": peak - baseline,
+        "flat": peak - baseline <= max_growth
+    }
+    print(json.dumps(report, indent=2))
+    sys.exit(0 if report["flat"] else 1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Range les fichiers des documents dans le magasin de blobs (adressé par contenu).
+
+Les documents téléchargés avant le magasin de blobs pointent vers un fichier
+propre `/app/uploads/{id}{ext}`, dupliqué à chaque envoi du même contenu.
+Pour chacun de ces documents, le script:
+  1. calcule l'empreinte SHA-256 du fichier;
+  2. ajoute une référence au blob correspondant (le fichier y est déplacé,
+     ou supprimé si le même contenu est déjà stocké);
+  3. fait pointer le document vers le blob (blob_id, file_path, content_hash).
+
+Les fichiers absents sont signalés sans modifier le document. Avec --gc, les
+blobs orphelins sont ensuite supprimés sans attendre le ramasse-miettes de
+l'API.
+
+Usage (depuis le conteneur API):
+    python3 scripts/migrate_uploads_to_blobs.py
+    python3 scripts/migrate_uploads_to_blobs.py --dry-run
+    python3 scripts/migrate_uploads_to_blobs.py --gc --grace 0
+"""
+
+import os
+import sys
+import json
+import asyncio
+import hashlib
+import argparse
+
+API_DIR = os.getenv("API_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+sys.path.insert(0, API_DIR)
+
+from app.services.mongo_client import create_mongo_client  # noqa: E402
+from app.services.document_service import DocumentService  # noqa: E402
+from app.services.mongo_indexes import ensure_indexes  # noqa: E402
+from app.services.upload_storage import UPLOAD_CHUNK_SIZE  # noqa: E402
+
+
+def file_digest(path: str):
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(UPLOAD_CHUNK_SIZE), b""):
+            digest.update(chunk)
+            size += len(chunk)
+    return size, digest.hexdigest()
+
+
+async def migrate(service: DocumentService, dry_run: bool):
+    report = {"migrated": 0, "missing_files": [], "bytes_before": 0, "distinct_contents": set()}
+    cursor = service.collection.find(
+        {"blob_id": None},
+        {"_id": 0, "id": 1, "file_path": 1, "content_type": 1}
+    )
+    async for document in cursor:
+        path = document.get("file_path")
+        if not path or not os.path.exists(path):
+            report["missing_files"].append(document["id"])
+            continue
+
+        size, digest = await asyncio.to_thread(file_digest, path)
+        report["bytes_before"] += size
+        report["distinct_contents"].add(digest)
+        if dry_run:
+            continue
+
+        uri = await service.blobs.add_reference(digest, path, size, document.get("content_type"))
+        await service.collection.update_one(
+            {"id": document["id"]},
+            {"$set": {"blob_id": digest, "file_path": uri, "content_hash": digest}}
+        )
+        report["migrated"] += 1
+    return report
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="Compter les doublons sans rien déplacer")
+    parser.add_argument("--gc", action="store_true", help="Supprimer ensuite les blobs orphelins")
+    parser.add_argument("--grace", type=int, default=None, help="Délai de grâce des blobs orphelins (secondes)")
+    args = parser.parse_args()
+
+    client = create_mongo_client()
+    service = DocumentService(client)
+    try:
+        await ensure_indexes(service.db)
+        report = await migrate(service, args.dry_run)
+        if args.gc and not args.dry_run:
+            removed = 0
+            while True:
+                batch = await service.blobs.collect_garbage(grace_seconds=args.grace)
+                removed += batch
+                if not batch:
+                    break
+            report["garbage_collected"] = removed
+    finally:
+        client.close()
+
+    distinct = report.pop("distinct_contents")
+    report["distinct_contents"] = len(distinct)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
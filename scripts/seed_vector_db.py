@@ -1,79 +1,38 @@
 #!/usr/bin/env python3
+"""
+Initialise la collection de précédents.
+
+Si l'artefact pré-vectorisé existe (scripts/build_precedent_snapshot.py), il est
+chargé en bloc: aucun modèle à télécharger ni appel réseau. Sinon, les
+précédents du fichier JSON sont vectorisés et ajoutés un par un.
+"""
 
 import os
 import sys
-import json
 import asyncio
-from sentence_transformers import SentenceTransformer
-from qdrant_client import QdrantClient
-from qdrant_client.http import models
+
+API_DIR = os.getenv("API_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+sys.path.insert(0, API_DIR)
+
+from app.services.precedent_snapshot import snapshot_exists  # noqa: E402
+from app.services.vector_service import VectorService  # noqa: E402
 
 # Configuration
-QDRANT_HOST = os.getenv("QDRANT_URI", "http://qdrant:6333")
-COLLECTION_NAME = "legal_precedents"
-DATA_FILE = "/app/data/precedents.json"
+DATA_FILE = os.getenv("PRECEDENTS_FILE", os.path.join(API_DIR, "app", "data", "initial_precedents.json"))
 
 async def main():
-    print(f"Connexion à Qdrant sur {QDRANT_HOST}...")
-    client = QdrantClient(url=QDRANT_HOST)
-    
-    # Vérifier si la collection existe déjà
-    collections = client.get_collections().collections
-    collection_names = [collection.name for collection in collections]
-    
-    # Charger le modèle de vectorisation
-    print("Chargement du modèle de vectorisation...")
-    model = SentenceTransformer('paraphrase-multilingual-mpnet-base-v2')
-    vector_size = model.get_sentence_embedding_dimension()
-    
-    # Créer la collection si elle n'existe pas
-    if COLLECTION_NAME not in collection_names:
-        print(f"Création de la collection {COLLECTION_NAME}...")
-        client.create_collection(
-            collection_name=COLLECTION_NAME,
-            vectors_config=models.VectorParams(
-                size=vector_size,
-                distance=models.Distance.COSINE
-            )
-        )
-    else:
-        print(f"La collection {COLLECTION_NAME} existe déjà.")
-    
-    # Charger les données des précédents juridiques
-    print(f"Chargement des données depuis {DATA_FILE}...")
-    with open(DATA_FILE, 'r', encoding='utf-8') as f:
-        precedents = json.load(f)
-    
-    # Vectoriser et ajouter les précédents à Qdrant
-    print(f"Ajout de {len(precedents)} précédents juridiques à Qdrant...")
-    
-    points = []
-    for i, precedent in enumerate(precedents):
-        # Vectoriser la description
-        vector = model.encode(precedent["description"]).tolist()
-        
-        # Créer le point
-        points.append(
-            models.PointStruct(
-                id=i,
-                vector=vector,
-                payload={
-                    "title": precedent["title"],
-                    "description": precedent["description"],
-                    "type": precedent["type"],
-                    "relevance": precedent["relevance"],
-                    "source": precedent.get("source", "")
-                }
-            )
-        )
-    
-    # Ajouter les points à Qdrant
-    client.upsert(
-        collection_name=COLLECTION_NAME,
-        points=points
-    )
-    
-    print(f"Initialisation terminée! {len(precedents)} précédents juridiques ajoutés à Qdrant.")
+    print(f"Connexion à la base vectorielle ({os.getenv('VECTOR_BACKEND', 'qdrant')})...")
+    vector_service = VectorService()
+    
+    if snapshot_exists(vector_service.snapshot_dir):
+        print(f"Chargement de l'artefact pré-vectorisé {vector_service.snapshot_dir}...")
+        count = await vector_service.restore_snapshot()
+        print(f"Initialisation terminée! {count} passages de précédents chargés.")
+        return
+    
+    print(f"Ajout des précédents depuis {DATA_FILE}...")
+    count = await vector_service.seed_precedents(DATA_FILE)
+    print(f"Initialisation terminée! {count} précédents juridiques ajoutés.")
 
 if __name__ == "__main__":
     asyncio.run(main())
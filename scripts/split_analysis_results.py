@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Sépare les résultats des analyses de leur en-tête et mesure le gain en lecture.
+
+Les analyses enregistrées avant la séparation embarquent leurs résultats
+(clauses, recommandations, risques, précédents, résumé) dans le document de
+la collection `analyses`. Le script:
+  1. mesure les octets renvoyés par MongoDB pour une page d'historique et un
+     appel de statut avec les anciennes requêtes (documents complets);
+  2. déplace les résultats embarqués vers la collection `analysis_results`
+     et calcule les compteurs de l'historique (clauses, risque maximal,
+     recommandations) des analyses qui n'en ont pas;
+  3. refait la mesure avec les requêtes actuelles d'AnalysisService
+     (en-têtes seuls, résultats chargés à la demande).
+
+Les octets sont ceux des réponses MongoDB (BSON), relevés par un
+CommandListener pymongo.
+
+Usage (depuis le conteneur API):
+    python3 scripts/split_analysis_results.py
+    python3 scripts/split_analysis_results.py --seed 50   # analyses synthétiques, supprimées à la fin
+    python3 scripts/split_analysis_results.py --dry-run   # mesure sans migrer
+"""
+
+import os
+import sys
+import json
+import asyncio
+import argparse
+from datetime import datetime, timedelta
+
+import bson
+from pymongo import monitoring
+
+API_DIR = os.getenv("API_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+sys.path.insert(0, API_DIR)
+
+from app.models.analysis import Analysis, AnalysisStatus, AnalysisResults, AnalysisCounters, Clause, Recommendation, Risk, ClauseType, RiskLevel, Priority  # noqa: E402
+from app.services.mongo_client import create_mongo_client  # noqa: E402
+from app.services.analysis_service import AnalysisService  # noqa: E402
+from app.services.mongo_indexes import ensure_indexes  # noqa: E402
+
+SEED_DOCUMENT_ID = "split-analysis-results-benchmark"
+
+
+class ReplyBytes(monitoring.CommandListener):
+    """Somme des tailles (BSON) des réponses MongoDB aux lectures."""
+
+    def __init__(self):
+        self.bytes = 0
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        if event.command_name in ("find", "getMore"):
+            self.bytes += len(bson.encode(event.reply))
+
+    def failed(self, event):
+        pass
+
+
+def synthetic_results(index: int) -> AnalysisResults:
+    """Résultats de taille réaliste (une vingtaine de clauses commentées)."""
+    paragraph = "Le prestataire s'engage à respecter les obligations définies au présent contrat. " * 6
+    return AnalysisResults(
+        clauses=[
+            Clause(title=f"Clause {index}-{i}", content=paragraph, type=ClauseType.OBLIGATION, risk_level=RiskLevel.MEDIUM, analysis=paragraph)
+            for i in range(20)
+        ],
+        recommendations=[
+            Recommendation(title=f"Recommandation {i}", description=paragraph, priority=Priority.MEDIUM, suggested_text=paragraph)
+            for i in range(8)
+        ],
+        risks=[
+            Risk(title=f"Risque {i}", description=paragraph, level=RiskLevel.HIGH, impact=paragraph)
+            for i in range(8)
+        ],
+        summary="## Résumé\n\n" + paragraph * 4
+    )
+
+
+async def seed(service: AnalysisService, count: int):
+    """Analyses terminées au format antérieur (résultats embarqués)."""
+    now = datetime.now()
+    documents = []
+    for index in range(count):
+        analysis = Analysis(
+            document_id=SEED_DOCUMENT_ID,
+            document_type="service",
+            status=AnalysisStatus.COMPLETED,
+            results=synthetic_results(index),
+            created_at=now + timedelta(seconds=index),
+            metadata={"progress": 1.0}
+        )
+        documents.append(analysis.dict())
+    if documents:
+        await service.collection.insert_many(documents)
+
+
+async def measure(service: AnalysisService, listener: ReplyBytes, legacy: bool, history_limit: int):
+    """Octets lus pour une page d'historique et pour un appel de statut."""
+    sample = await service.collection.find_one({}, {"_id": 0, "id": 1}, sort=[("created_at", -1)])
+    if not sample:
+        return None
+
+    before = listener.bytes
+    if legacy:
+        # Anciennes requêtes: documents complets
+        await service.collection.find().skip(0).limit(history_limit).sort("created_at", -1).to_list(history_limit)
+    else:
+        await service.list_analyses(0, history_limit)
+    history_bytes = listener.bytes - before
+
+    before = listener.bytes
+    if legacy:
+        await service.collection.find_one({"id": sample["id"]})
+    else:
+        await service.get_analysis_status(sample["id"])
+    status_bytes = listener.bytes - before
+
+    return {"history_page_bytes": history_bytes, "status_call_bytes": status_bytes}
+
+
+async def migrate(service: AnalysisService) -> int:
+    """Déplace les résultats embarqués vers analysis_results (idempotent)."""
+    moved = 0
+    cursor = service.collection.find({"results": {"$exists": True}}, {"_id": 0, "id": 1, "results": 1, "updated_at": 1})
+    async for analysis in cursor:
+        update = {"$unset": {"results": ""}}
+        if analysis.get("results"):
+            await service.results_collection.replace_one(
+                {"analysis_id": analysis["id"]},
+                {"analysis_id": analysis["id"], "results": analysis["results"], "updated_at": analysis.get("updated_at")},
+                upsert=True
+            )
+            counters = AnalysisCounters.from_results(AnalysisResults(**analysis["results"]))
+            update["$set"] = {"counters": counters.dict()}
+        await service.collection.update_one({"id": analysis["id"]}, update)
+        moved += 1
+    return moved
+
+
+async def backfill_counters(service: AnalysisService) -> int:
+    """Compteurs des analyses dont les résultats sont déjà séparés mais sans compteurs."""
+    filled = 0
+    cursor = service.collection.find({"status": AnalysisStatus.COMPLETED.value, "counters": None}, {"_id": 0, "id": 1})
+    async for analysis in cursor:
+        results = await service.get_analysis_results(analysis["id"])
+        if results:
+            counters = AnalysisCounters.from_results(results)
+            await service.collection.update_one({"id": analysis["id"]}, {"$set": {"counters": counters.dict()}})
+            filled += 1
+    return filled
+
+
+def reduction(before, after):
+    return round(100 * (1 - after / before), 1) if before else None
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=0, help="Analyses synthétiques à créer pour la mesure (supprimées à la fin)")
+    parser.add_argument("--history-limit", type=int, default=10, help="Taille d'une page d'historique")
+    parser.add_argument("--dry-run", action="store_true", help="Mesurer sans migrer")
+    args = parser.parse_args()
+
+    listener = ReplyBytes()
+    client = create_mongo_client(event_listeners=[listener])
+    service = AnalysisService(client)
+
+    try:
+        await ensure_indexes(service.db)
+        if args.seed:
+            await seed(service, args.seed)
+
+        before = await measure(service, listener, legacy=True, history_limit=args.history_limit)
+        moved = 0 if args.dry_run else await migrate(service)
+        filled = 0 if args.dry_run else await backfill_counters(service)
+        after = await measure(service, listener, legacy=False, history_limit=args.history_limit)
+    finally:
+        if args.seed:
+            seeded = await service.collection.find({"document_id": SEED_DOCUMENT_ID}, {"_id": 0, "id": 1}).to_list(None)
+            await service.results_collection.delete_many({"analysis_id": {"$in": [a["id"] for a in seeded]}})
+            await service.collection.delete_many({"document_id": SEED_DOCUMENT_ID})
+        client.close()
+
+    report = {"migrated": moved, "counters_filled": filled, "before": before, "after": after}
+    if before and after:
+        report["reduction_percent"] = {
+            "history_page": reduction(before["history_page_bytes"], after["history_page_bytes"]),
+            "status_call": reduction(before["status_call_bytes"], after["status_call_bytes"])
+        }
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
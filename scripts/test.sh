@@ -16,6 +16,10 @@ fi
 echo "Exécution des tests unitaires du backend..."
 docker-compose exec api pytest -v
 
+# Vérifier que les requêtes des services utilisent un index (pas de COLLSCAN)
+echo "Contrôle des plans d'exécution MongoDB..."
+docker-compose exec -T -e API_DIR=/app api python3 - < scripts/check_mongo_query_plans.py || exit 1
+
 # Vérifier l'état de santé de l'API
 echo "Vérification de l'état de santé de l'API..."
 curl -s http://localhost/api/health | grep -q "ok" && echo "API en bon état" || echo "API en erreur"